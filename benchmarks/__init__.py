@@ -0,0 +1 @@
+"""Benchmark suite of the X12 parser, see benchmarks.run."""
@@ -0,0 +1,190 @@
+"""
+Synthetic X12 generator, producing 835/837 shaped files of configurable size,
+valid against the bundled schemas (see x12.schemas).
+
+    python -m benchmarks.generate 835 file.x12 --transactions 100 --claims 20
+"""
+
+import argparse
+import random
+import string
+from typing import Iterator, TextIO
+
+ISA = (
+    "ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+    "*230101*1200*^*00501*000000001*0*P*:"
+)
+
+VERSIONS = {"835": ("HP", "005010X221A1"), "837": ("HC", "005010X222A1")}
+
+
+class Generator:
+    """
+    Generator of the transaction sets of given kind (835 or 837),
+    with the number of the claims per transaction set, the number of
+    the services per claim and the width of the text elements.
+    """
+
+    def __init__(
+        self,
+        kind: str = "835",
+        claims: int = 20,
+        services: int = 5,
+        width: int = 10,
+        seed: int = 0,
+    ) -> None:
+        if kind not in VERSIONS:
+            raise ValueError(f"unsupported transaction set {kind}")
+        self.kind = kind
+        self.claims = claims
+        self.services = services
+        self.width = width
+        self.random = random.Random(seed)
+
+    def text(self) -> str:
+        """Random text element of the configured width."""
+
+        return "".join(
+            self.random.choices(string.ascii_uppercase + string.digits, k=self.width)
+        )
+
+    def amount(self) -> str:
+        """Random monetary amount element."""
+
+        return f"{self.random.randint(1, 100000) / 100:.2f}"
+
+    def transaction(self, control: int) -> list[str]:
+        """Segments of the transaction set of given control number."""
+
+        body = self.remittance() if self.kind == "835" else self.claim()
+        return [
+            f"ST*{self.kind}*{control:04}",
+            *body,
+            f"SE*{len(body) + 2}*{control:04}",
+        ]
+
+    def remittance(self) -> list[str]:
+        """Segments of the 835 transaction set (without ST/SE)."""
+
+        res = [
+            f"BPR*I*{self.amount()}*C*ACH",
+            f"TRN*1*{self.text()}*1512345678",
+            "DTM*405*20230101",
+            f"N1*PR*{self.text()}",
+            f"N3*{self.text()}",
+            f"N4*{self.text()}*ST*12345",
+            f"N1*PE*{self.text()}*XX*1234567893",
+            "LX*1",
+        ]
+        for claim in range(self.claims):
+            res += [
+                f"CLP*{self.text()}{claim}*1*{self.amount()}*{self.amount()}**12*"
+                + self.text(),
+                f"CAS*CO*45*{self.amount()}",
+                f"NM1*QC*1*{self.text()}*{self.text()}",
+                "DTM*232*20230101",
+            ]
+            for _ in range(self.services):
+                res += [
+                    f"SVC*HC:99213*{self.amount()}*{self.amount()}**1",
+                    "DTM*472*20230101",
+                    f"CAS*CO*45*{self.amount()}",
+                    f"AMT*B6*{self.amount()}",
+                ]
+        return res
+
+    def claim(self) -> list[str]:
+        """Segments of the 837 professional transaction set (without ST/SE)."""
+
+        res = [
+            f"BHT*0019*00*{self.text()}*20230101*1200*CH",
+            f"NM1*41*2*{self.text()}*****46*1",
+            f"PER*IC*{self.text()}*TE*5555555555",
+            f"NM1*40*2*{self.text()}*****46*2",
+            "HL*1**20*1",
+            f"NM1*85*2*{self.text()}*****XX*1234567893",
+            f"N3*{self.text()}",
+            f"N4*{self.text()}*ST*12345",
+            "REF*EI*123456789",
+        ]
+        for claim in range(self.claims):
+            res += [
+                f"HL*{claim + 2}*1*22*0",
+                "SBR*P*18*******CI",
+                f"NM1*IL*1*{self.text()}*{self.text()}****MI*{self.text()}",
+                f"NM1*PR*2*{self.text()}*****PI*1",
+                f"CLM*{self.text()}{claim}*{self.amount()}***11:B:1*Y*A*Y*Y",
+                "HI*ABK:R69",
+            ]
+            for service in range(self.services):
+                res += [
+                    f"LX*{service + 1}",
+                    f"SV1*HC:99213*{self.amount()}*UN*1***1",
+                    "DTP*472*D8*20230101",
+                ]
+        return res
+
+
+def generate(
+    kind: str = "835",
+    transactions: int = 100,
+    claims: int = 20,
+    services: int = 5,
+    width: int = 10,
+    seed: int = 0,
+) -> Iterator[str]:
+    """
+    Generate the segments (without the segment terminator) of the interchange
+    with a single functional group of the transaction sets of given kind.
+    """
+
+    generator = Generator(kind, claims, services, width, seed)
+    code, version = VERSIONS[kind]
+    yield ISA
+    yield f"GS*{code}*SENDER*RECEIVER*20230101*1200*1*X*{version}"
+    for control in range(1, transactions + 1):
+        yield from generator.transaction(control)
+    yield f"GE*{transactions}*1"
+    yield "IEA*1*000000001"
+
+
+def write(fp: TextIO, segments: Iterator[str]) -> int:
+    """Write the segments, one per line, returns the number of the segments."""
+
+    count = 0
+    for segment in segments:
+        fp.write(f"{segment}~\n")
+        count += 1
+    return count
+
+
+def main() -> None:
+    """Command line entry point."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("kind", choices=sorted(VERSIONS))
+    parser.add_argument("file_path")
+    parser.add_argument("--transactions", type=int, default=100)
+    parser.add_argument("--claims", type=int, default=20)
+    parser.add_argument("--services", type=int, default=5)
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.file_path, "w", encoding="utf-8") as file:
+        count = write(
+            file,
+            generate(
+                args.kind,
+                args.transactions,
+                args.claims,
+                args.services,
+                args.width,
+                args.seed,
+            ),
+        )
+    print(f"{count} segments written to {args.file_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Benchmark suite of the parser operations on the synthetic X12 files
+(see benchmarks.generate), measuring the throughput, the peak RSS and
+the peak of the traced allocations, with a comparison against a stored
+baseline to detect regressions.
+
+    python -m benchmarks.run --save baseline.json
+    python -m benchmarks.run --compare baseline.json --threshold 0.1
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable
+
+from benchmarks.generate import generate, write
+from x12 import schemas
+from x12.parser.analyze import analyze
+from x12.parser.loop import Loop
+from x12.parser.parse import parse
+from x12.parser.route import by_transaction, route_file
+from x12.parser.write import to_bytes
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+# Bundled transaction, claim loop, service loop and service segment by the kind.
+KINDS = {
+    "835": ("835", "2100", "2110", "SVC"),
+    "837": ("837P", "2300", "2400", "SV1"),
+}
+
+# Metrics compared against the baseline, lower is better.
+COMPARED = ("seconds", "alloc_peak_mb")
+
+
+class Fixture:
+    # pylint: disable=too-few-public-methods
+    """Benchmark input: the generated file, its schema and the parsed loop."""
+
+    __slots__ = ("file_path", "kind", "schema", "loop")
+
+    def __init__(self, file_path: str, kind: str) -> None:
+        self.file_path = file_path
+        self.kind = kind
+        self.schema = schemas.load([KINDS[kind][0]])
+        self.loop: Loop | None = None
+
+
+def run_parse(fixture: Fixture) -> Any:
+    """Parse the file."""
+
+    return parse(fixture.file_path, fixture.schema)
+
+
+def run_project(fixture: Fixture) -> Any:
+    """Parse the claim segments of the file only."""
+
+    _, claim, _, _ = KINDS[fixture.kind]
+    segment_id = "CLP" if fixture.kind == "835" else "CLM"
+    return parse(fixture.file_path, fixture.schema, projection={claim: [segment_id]})
+
+
+def run_route(fixture: Fixture) -> Any:
+    """Split the file into the transaction sets, without parsing it."""
+
+    return route_file(
+        fixture.file_path,
+        by_transaction,
+        lambda key, append: io.BytesIO(),
+        unique=True,
+    )
+
+
+def run_find_loops(fixture: Fixture) -> Any:
+    """Find all the claim loops and their service loops."""
+
+    _, claim, service, _ = KINDS[fixture.kind]
+    return [
+        loop.find_loops(service, True) for loop in fixture.loop.find_loops(claim, True)
+    ]
+
+
+def run_find_segments(fixture: Fixture) -> Any:
+    """Find the service segments of every claim loop."""
+
+    _, claim, _, service = KINDS[fixture.kind]
+    return [
+        loop.find_segments(service, True)
+        for loop in fixture.loop.find_loops(claim, True)
+    ]
+
+
+def run_to_xml(fixture: Fixture) -> Any:
+    """Serialize the parsed loop into XML."""
+
+    return fixture.loop.to_xml()
+
+
+def run_str(fixture: Fixture) -> Any:
+    """Print the parsed loop."""
+
+    return str(fixture.loop)
+
+
+def run_write(fixture: Fixture) -> Any:
+    """Write the parsed loop, recounting the envelope trailers."""
+
+    return to_bytes(fixture.loop)
+
+
+def run_analyze(fixture: Fixture) -> Any:
+    """Analyze the parsed loop."""
+
+    return analyze(fixture.loop)
+
+
+# Benchmarks by the name: the operation and whether it needs the parsed loop.
+BENCHMARKS: dict[str, tuple[Callable[[Fixture], Any], bool]] = {
+    "parse": (run_parse, False),
+    "project": (run_project, False),
+    "route": (run_route, False),
+    "find_loops": (run_find_loops, True),
+    "find_segments": (run_find_segments, True),
+    "to_xml": (run_to_xml, True),
+    "str": (run_str, True),
+    "write": (run_write, True),
+    "analyze": (run_analyze, True),
+}
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of the current process."""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def measure(name: str, file_path: str, kind: str, repeat: int) -> dict[str, Any]:
+    """
+    Measure the benchmark: the best time of the repeated runs, the peak
+    of the traced allocations of an extra (traced) run and the peak RSS.
+    Meant to be run in a fresh process, so the peak RSS is of the benchmark.
+    """
+
+    operation, needs_loop = BENCHMARKS[name]
+    fixture = Fixture(file_path, kind)
+    if needs_loop:
+        fixture.loop = run_parse(fixture)
+
+    def reset() -> None:
+        # Every run starts without the find index and the collected garbage.
+        if fixture.loop is not None:
+            fixture.loop.invalidate()
+        gc.collect()
+
+    timings = []
+    for _ in range(repeat):
+        reset()
+        start = time.perf_counter()
+        operation(fixture)
+        timings.append(time.perf_counter() - start)
+
+    reset()
+    tracemalloc.start()
+    operation(fixture)
+    _, alloc_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": min(timings),
+        "alloc_peak_mb": alloc_peak / (1 << 20),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run(
+    config: dict[str, Any], names: list[str], repeat: int = 3
+) -> dict[str, dict[str, Any]]:
+    """
+    Run the benchmarks on the file generated by the config (see generate),
+    every benchmark in a fresh process, returns the results by the name.
+    """
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = os.path.join(temp_dir, "benchmark.x12")
+        with open(file_path, "w", encoding="utf-8") as file:
+            segments = write(file, generate(**config))
+        size_mb = os.path.getsize(file_path) / (1 << 20)
+
+        results = {}
+        for name in names:
+            with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+                result = executor.submit(
+                    measure, name, file_path, config["kind"], repeat
+                ).result()
+            result["segments_per_second"] = segments / result["seconds"]
+            result["mb_per_second"] = size_mb / result["seconds"]
+            results[name] = result
+        return results
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float = 0.1,
+) -> list[tuple[str, str, float, float, bool]]:
+    """
+    Compare the results against the baseline results, returns the (name,
+    metric, baseline value, value, regressed) records of the compared metrics.
+    The metric regressed if it's more than the threshold ratio worse.
+    """
+
+    res = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in COMPARED:
+            before, after = baseline[name][metric], result[metric]
+            res.append((name, metric, before, after, after > before * (1 + threshold)))
+    return res
+
+
+def report(results: dict[str, dict[str, Any]]) -> str:
+    """Results table."""
+
+    lines = [
+        f"{'benchmark':<14}{'seconds':>10}{'segments/s':>14}{'MB/s':>10}"
+        f"{'peak RSS MB':>14}{'alloc MB':>10}"
+    ]
+    for name, result in results.items():
+        rss = result["peak_rss_mb"]
+        lines.append(
+            f"{name:<14}{result['seconds']:>10.4f}"
+            f"{result['segments_per_second']:>14,.0f}"
+            f"{result['mb_per_second']:>10.2f}"
+            f"{'-' if rss is None else format(rss, '.1f'):>14}"
+            f"{result['alloc_peak_mb']:>10.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    """Command line entry point, returns the exit status."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--kind", choices=sorted(KINDS), default="835")
+    parser.add_argument("--transactions", type=int, default=100)
+    parser.add_argument("--claims", type=int, default=20)
+    parser.add_argument("--services", type=int, default=5)
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS))
+    parser.add_argument("--save", help="store the results as the baseline")
+    parser.add_argument("--compare", help="compare the results against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    config = {
+        "kind": args.kind,
+        "transactions": args.transactions,
+        "claims": args.claims,
+        "services": args.services,
+        "width": args.width,
+    }
+    results = run(config, args.only or list(BENCHMARKS), args.repeat)
+    print(report(results))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({"config": config, "results": results}, file, indent=2)
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare, encoding="utf-8") as file:
+        baseline = json.load(file)
+    if baseline["config"] != config:
+        print(f"warning: baseline config differs: {baseline['config']}")
+
+    regressed = False
+    print(
+        f"\n{'benchmark':<14}{'metric':<15}{'baseline':>10}{'current':>10}{'ratio':>8}"
+    )
+    for name, metric, before, after, worse in compare(
+        results, baseline["results"], args.threshold
+    ):
+        regressed |= worse
+        ratio = after / before if before else float("inf")
+        print(
+            f"{name:<14}{metric:<15}{before:>10.4f}{after:>10.4f}{ratio:>8.2f}"
+            + (" REGRESSED" if worse else "")
+        )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from x12.parser.aio import aiter_parse, parse_async
+from x12.parser.context import Context
+from x12.parser.parse import parse_buffer
+from x12.parser.validate import Validator
+from x12.schema.schema import Schema, Usage, by_segment
+
+DATA = (
+    "ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+    "*230101*1200*^*00501*000000001*0*P*:~\n"
+    "GS*HP~ST*1~NM1*1~SE*1~ST*2~NM1*2~SE*2~GE*1~IEA*1~"
+)
+
+
+def schema() -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    isa = x12.add_child("ISA", Usage.REQUIRED, by_segment("ISA"))
+    gs = isa.add_child("GS", Usage.REQUIRED, by_segment("GS"))
+    gs.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    gs.add_child("SE", Usage.REQUIRED, by_segment("SE"))
+    isa.add_child("GE", Usage.REQUIRED, by_segment("GE"))
+    x12.add_child("IEA", Usage.REQUIRED, by_segment("IEA"))
+    return x12
+
+
+def reader(data: bytes, size: int) -> asyncio.StreamReader:
+    stream = asyncio.StreamReader()
+    for offset in range(0, len(data), size):
+        end = offset + size
+        stream.feed_data(data[offset:end])
+    stream.feed_eof()
+    return stream
+
+
+async def chunks(data: bytes, size: int):
+    for offset in range(0, len(data), size):
+        end = offset + size
+        await asyncio.sleep(0)
+        yield data[offset:end]
+
+
+def test_parse_async():
+    expected = str(parse_buffer(DATA.encode(), schema()))
+
+    async def run():
+        loop = await parse_async(reader(DATA.encode(), 7), schema(), chunk_size=5)
+        assert str(loop) == expected
+        assert loop.context.segment_separator == "~"
+
+        with ThreadPoolExecutor(1) as executor:
+            loop = await parse_async(
+                chunks(DATA.encode(), 16),
+                schema(),
+                executor=executor,
+                offload_segments=1,
+            )
+        assert str(loop) == expected
+
+        loop = await parse_async(chunks(b"", 16), schema(), Context("~", "*", ":"))
+        assert loop.loops == []
+
+    asyncio.run(run())
+
+
+def test_aiter_parse():
+    async def run(offload_segments: int, **kwargs) -> list[str]:
+        return [
+            str(loop)
+            async for loop in aiter_parse(
+                chunks(DATA.encode(), 3),
+                schema(),
+                "ST",
+                offload_segments=offload_segments,
+                **kwargs,
+            )
+        ]
+
+    expected = ["ST*1~\nNM1*1~", "ST*2~\nNM1*2~"]
+    assert asyncio.run(run(1000)) == expected
+    assert asyncio.run(run(1)) == expected
+    assert asyncio.run(run(1, validator=Validator(), reject_invalid=True)) == []
+
+
+def test_process_pool_executor():
+    # The chunks built in another process would be lost.
+    async def run():
+        with ProcessPoolExecutor(1) as executor:
+            with pytest.raises(TypeError):
+                await parse_async(
+                    chunks(DATA.encode(), 16), schema(), executor=executor
+                )
+            with pytest.raises(TypeError):
+                async for _ in aiter_parse(
+                    chunks(DATA.encode(), 16), schema(), "ST", executor=executor
+                ):
+                    pass
+
+    asyncio.run(run())
@@ -210,3 +210,53 @@ def test_analyze():
 
     for loop, expected in tests:
         assert analyze(loop) == expected.strip()
+
+
+def test_analyze_repeating():
+    # A matched required repeating segment is not reported missing,
+    # neither while repeating nor at the end of the loop.
+    ctx = Context("~", "*", ":")
+    root = Schema("X12", Usage.REQUIRED).with_segments(
+        SegmentSchema("SG1", Usage.REQUIRED, lambda tokens: tokens[0] == "SG1", False),
+        SegmentSchema("SG2", Usage.REQUIRED, lambda tokens: tokens[0] == "SG2", False),
+    )
+
+    loop = Loop(root, ctx).add_segment("SG1*0").add_segment("SG1*1")
+    loop.add_segment("SG2*0")
+    assert analyze(loop) == (
+        "<\x1b[96mX12\x1b[0m>\n"
+        "  \x1b[92mSG1\x1b[0m*0\n"
+        "  \x1b[92mSG1\x1b[0m*1\n"
+        "  \x1b[92mSG2\x1b[0m*0"
+    )
+    assert analyze(Loop(root, ctx).add_segment("SG1*0").add_segment("SG1*1")) == (
+        "<\x1b[96mX12\x1b[0m>\n"
+        "  \x1b[92mSG1\x1b[0m*0\n"
+        "  \x1b[92mSG1\x1b[0m*1\n"
+        "  \x1b[91mSG2\x1b[0m"
+    )
+
+
+def test_analyze_alternative_loops():
+    # The child loop schemas of the same name are alternatives, their loops
+    # are listed once and the name is not missing if any of them is found.
+    ctx = Context("~", "*", ":")
+    root = Schema("X12", Usage.REQUIRED)
+    root.add_child("GS", Usage.REQUIRED, lambda tokens: tokens[1:2] == ["A"])
+    root.add_child("GS", Usage.REQUIRED, lambda tokens: tokens[0] == "GS")
+    root.add_child("GE", Usage.REQUIRED, lambda tokens: tokens[0] == "GE")
+
+    loop = Loop(root, ctx)
+    loop.add_loop(root.children[0]).add_segment("GS*A")
+    loop.add_loop(root.children[1]).add_segment("GS*B")
+    assert analyze(loop) == (
+        "<\x1b[96mX12\x1b[0m>\n"
+        "  <\x1b[96mGS\x1b[0m>\n"
+        "    \x1b[93mGS\x1b[0m*A\n"
+        "  <\x1b[96mGS\x1b[0m>\n"
+        "    \x1b[93mGS\x1b[0m*B\n"
+        "  <\x1b[91mGE\x1b[0m>"
+    )
+    assert analyze(Loop(root, ctx)) == (
+        "<\x1b[96mX12\x1b[0m>\n  <\x1b[91mGS\x1b[0m>\n  <\x1b[91mGE\x1b[0m>"
+    )
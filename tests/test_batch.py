@@ -0,0 +1,178 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import threading
+
+from x12.parser.batch import pack, parse_many, parse_parallel, unpack
+from x12.parser.context import Context
+from x12.parser.loop import Loop
+from x12.parser.parse import parse
+from x12.schema.schema import Schema, Usage, by_segment, by_segment_element
+
+
+def schema() -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    st = x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    st.add_child("NM1", Usage.REQUIRED, lambda tokens: tokens[0] == "NM1")
+    return x12
+
+
+def envelope_schema() -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    isa = x12.add_child("ISA", Usage.REQUIRED, by_segment("ISA"))
+    gs = isa.add_child("GS", Usage.REQUIRED, by_segment("GS"))
+    st = gs.add_child("ST", Usage.REQUIRED, by_segment_element("ST", 1, ["835"]))
+    st.add_child("1000A", Usage.REQUIRED, by_segment_element("N1", 1, ["PR"]))
+    lx = st.add_child("2000", Usage.REQUIRED, by_segment("LX"))
+    lx.add_child("2100", Usage.REQUIRED, by_segment("CLP"))
+    gs.add_child("SE", Usage.REQUIRED, by_segment("SE"))
+    isa.add_child("GE", Usage.REQUIRED, by_segment("GE"))
+    x12.add_child("IEA", Usage.REQUIRED, by_segment("IEA"))
+    return x12
+
+
+def trailerless_schema() -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    isa = x12.add_child("ISA", Usage.REQUIRED, by_segment("ISA"))
+    gs = isa.add_child("GS", Usage.REQUIRED, by_segment("GS"))
+    st = gs.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    lx = st.add_child("2000", Usage.REQUIRED, by_segment("LX"))
+    lx.add_child("2100", Usage.REQUIRED, by_segment("CLP"))
+    return x12
+
+
+def segment_count(loop: Loop) -> int:
+    return len(loop.find_segments("NM1", True))
+
+
+def unpicklable(loop: Loop) -> threading.Lock:
+    return threading.Lock()
+
+
+def test_parse_many(tmp_path):
+    file_paths = []
+    for index in range(3):
+        file_path = tmp_path / f"{index}.x12"
+        file_path.write_text(f"ST*{index}~" + "NM1*1~" * index)
+        file_paths.append(str(file_path))
+    file_paths.append(str(tmp_path / "bogus.x12"))
+
+    results = {result.file_path: result for result in parse_many(file_paths, schema, 2)}
+
+    assert len(results) == 4
+    for index, file_path in enumerate(file_paths[:3]):
+        loop = results[file_path].value
+        assert results[file_path].error is None
+        assert str(loop) == f"ST*{index}~" + "\nNM1*1~" * index
+        assert loop.schema.loop_name == "X12"
+        assert loop.loops[0].schema.loop_name == "ST"
+    assert isinstance(results[file_paths[3]].error, FileNotFoundError)
+
+    results = {
+        result.file_path: result.value
+        for result in parse_many(file_paths[:3], schema, 2, transform=segment_count)
+    }
+    assert results == {file_paths[0]: 0, file_paths[1]: 1, file_paths[2]: 2}
+
+    # The unpicklable transform values fail each file, not the batch.
+    results = list(parse_many(file_paths, schema, 2, transform=unpicklable))
+    assert sorted(result.file_path for result in results) == sorted(file_paths)
+    for result in results:
+        assert result.value is None
+        expected = FileNotFoundError if result.file_path == file_paths[3] else TypeError
+        assert isinstance(result.error, expected)
+
+
+def test_pack():
+    x12 = schema()
+    loop = Loop(x12, Context("~", "*", ":"))
+    loop.add_segment(b"BGN*1").add_loop(x12.children[0]).add_segment("ST*1").add_loop(
+        x12.children[0].children[0]
+    ).add_segment("NM1*1")
+    loop.add_loop(x12.children[0])
+
+    packed = pack(loop, x12)
+    assert packed[1:] == (
+        0,
+        [
+            ((), -1, [b"BGN*1"]),
+            ((0,), 0, ["ST*1"]),
+            ((0, 0), 1, ["NM1*1"]),
+            ((0,), 0, []),
+        ],
+    )
+
+    unpacked = unpack(packed, x12)
+    assert unpacked.schema is x12
+    assert unpacked.loops[0].loops[0].schema is x12.children[0].children[0]
+    assert unpacked.loops[0].loops[0].depth == 2
+    assert str(unpacked) == str(loop)
+
+    loop.loops[1].depth = 3
+    assert unpack(pack(loop.loops[1], x12), x12).depth == 3
+
+
+def test_parse_parallel(tmp_path):
+    def transaction(index: int) -> str:
+        return (
+            f"ST*835*{index}~BPR*1~N1*PR*P~LX*1~CLP*{index}~CAS*1~"
+            f"LX*2~CLP*{index}~SE*6*{index}~"
+        )
+
+    content = (
+        "ISA*00~GS*1~"
+        + "".join(transaction(index) for index in range(5))
+        + "GE*5~GS*2~"
+        + transaction(5)
+        + "GE*1~IEA*2~"
+    )
+    file_path = tmp_path / "file.x12"
+    file_path.write_text(content.replace("~", "~\n"))
+
+    expected = parse(file_path, envelope_schema())
+    parsed = parse_parallel(file_path, envelope_schema, 2, transactions=2)
+
+    assert parsed.to_xml() == expected.to_xml()
+
+    stack = [parsed]
+    while stack:
+        loop = stack.pop()
+        for child in loop.loops:
+            assert child.parent is loop
+            assert child.depth == loop.depth + 1
+        stack += loop.loops
+
+    file_path.write_text("")
+    assert parse_parallel(file_path, envelope_schema, 2).to_xml() == (
+        '<LOOP NAME="X12">\n</LOOP>\n'
+    )
+
+
+def test_parse_parallel_trailers(tmp_path):
+    # The trailers are not loops, so they are added to the last loop
+    # of the preceding transaction set.
+    def transaction(index: int) -> str:
+        return f"ST*835*{index}~LX*1~CLP*{index}~CAS*1~SE*4*{index}~"
+
+    content = (
+        "ISA*00~GS*1~"
+        + "".join(transaction(index) for index in range(5))
+        + "GE*5~GS*2~"
+        + transaction(5)
+        + "GE*1~IEA*2~"
+    )
+    file_path = tmp_path / "file.x12"
+    file_path.write_text(content)
+
+    expected = parse(file_path, trailerless_schema())
+    for transactions in (1, 2, 64):
+        parsed = parse_parallel(
+            file_path, trailerless_schema, 2, transactions=transactions
+        )
+        assert str(parsed) == str(expected)
+        assert parsed.to_xml() == expected.to_xml()
+
+    groups = parsed.find_loops("GS", True)
+    assert [str(segment) for segment in groups[0].segments] == ["GS*1~"]
+    assert [
+        str(segment) for segment in groups[0].loops[-1].loops[-1].loops[-1].segments
+    ] == ["CLP*4~", "CAS*1~", "SE*4*4~", "GE*5~"]
@@ -0,0 +1,49 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import io
+
+import pytest
+
+from benchmarks.generate import generate, write
+from benchmarks.run import KINDS, compare
+from x12 import schemas
+from x12.parser.context import Context
+from x12.parser.parse import parse_buffer
+from x12.parser.validate import validate
+
+
+@pytest.mark.parametrize("kind", ["835", "837"])
+def test_generate(kind):
+    file = io.StringIO()
+    count = write(file, generate(kind, transactions=3, claims=2, services=2, width=4))
+    assert count == len(file.getvalue().splitlines())
+
+    loop = parse_buffer(
+        file.getvalue().encode(), schemas.load([KINDS[kind][0]]), Context("~", "*", ":")
+    )
+    transactions = loop.find_loops("ST", True)
+    assert len(transactions) == 3
+    assert len(transactions[0].find_loops(KINDS[kind][1], True)) == 2
+    assert len(transactions[0].find_segments(KINDS[kind][3], True)) == 4
+    assert validate(loop).valid
+
+
+def test_generate_reproducible():
+    assert list(generate(seed=1, transactions=2)) == list(
+        generate(seed=1, transactions=2)
+    )
+    with pytest.raises(ValueError):
+        list(generate("999"))
+
+
+def test_compare():
+    baseline = {"parse": {"seconds": 1.0, "alloc_peak_mb": 10.0}}
+    results = {
+        "parse": {"seconds": 1.2, "alloc_peak_mb": 10.5},
+        "str": {"seconds": 1.0, "alloc_peak_mb": 1.0},
+    }
+
+    assert compare(results, baseline, 0.1) == [
+        ("parse", "seconds", 1.0, 1.2, True),
+        ("parse", "alloc_peak_mb", 10.0, 10.5, False),
+    ]
@@ -0,0 +1,38 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import pytest
+
+from x12.parser.context import detect_context
+
+ISA = (
+    "ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+    "*230101*1200*^*00501*000000001*0*P*:~"
+)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("", None),
+        ("ISA", None),
+        ("GS*HP~", None),
+        ("ISA*00*00~", None),
+        (ISA, ("~", "*", ":", "^")),
+        (ISA.replace("*", "|").replace(":", ">"), ("~", "|", ">", "^")),
+        (ISA.replace("~", "\n"), ("\n", "*", ":", "^")),
+        (ISA.replace("^", "U").replace("00501", "00401"), ("~", "*", ":", None)),
+        ("ISA*00*0*00*0*ZZ*S*ZZ*R*230101*1200*^*00501*1*0*P*:~", ("~", "*", ":", "^")),
+    ],
+)
+def test_detect_context(header, expected):
+    context = detect_context(header)
+
+    if expected is None:
+        assert context is None
+    else:
+        assert (
+            context.segment_separator,
+            context.element_separator,
+            context.composite_element_separator,
+            context.repetition_separator,
+        ) == expected
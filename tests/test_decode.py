@@ -0,0 +1,87 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+
+from x12.parser.context import Context
+from x12.parser.decode import convert, decode, to_date, to_time
+from x12.parser.loop import Loop
+from x12.schema.schema import DataType, Element, Schema
+from x12.schema.schema import Segment as SegmentSchema
+from x12.schema.schema import Usage, by_segment
+
+
+@pytest.mark.parametrize(
+    "data_type, values, expected",
+    [
+        (DataType.R, ["1.5", "-2"], [Decimal("1.5"), Decimal("-2")]),
+        (DataType.R, ["1.5", "", "bogus"], [Decimal("1.5"), None, None]),
+        (DataType.N0, ["12", "1.5"], [12, None]),
+        (DataType.N2, ["12345"], [Decimal("123.45")]),
+        (DataType.DT, ["20230115", "230116"], [date(2023, 1, 15), date(2023, 1, 16)]),
+        (DataType.DT, ["20231301", "2023"], [None, None]),
+        (
+            DataType.TM,
+            ["1230", "123045", "12304512"],
+            [
+                time(12, 30),
+                time(12, 30, 45),
+                time(12, 30, 45, 120000),
+            ],
+        ),
+        (DataType.TM, ["12"], [None]),
+    ],
+)
+def test_convert(data_type, values, expected):
+    assert convert(data_type, values) == expected
+
+
+def test_to_date():
+    assert to_date("20230115") == date(2023, 1, 15)
+    assert to_date("230115") == date(2023, 1, 15)
+    assert to_date("991231") == date(1999, 12, 31)
+    with pytest.raises(ValueError):
+        to_date("2023011")
+
+
+def test_to_time():
+    assert to_time("0930") == time(9, 30)
+    with pytest.raises(ValueError):
+        to_time("093")
+
+
+def test_decode():
+    schema = Schema("X12", Usage.REQUIRED)
+    claim = schema.add_child("2100", Usage.REQUIRED, by_segment("CLP")).with_segments(
+        SegmentSchema("CLP", Usage.REQUIRED, by_segment("CLP")).with_elements(
+            Element("CLP01", DataType.AN),
+            Element("CLP02", DataType.ID),
+            Element("CLP03", DataType.R),
+        ),
+        SegmentSchema("DTM", Usage.REQUIRED, by_segment("DTM"), False).with_elements(
+            Element("DTM01", DataType.ID),
+            Element("DTM02", DataType.DT),
+        ),
+    )
+
+    loop = Loop(schema, Context("~", "*", ":"))
+    loop.add_segment("BGN*1")
+    loop.add_loop(claim).add_segment("CLP*C1*1*100.5").add_segment(
+        "DTM*232*20230115"
+    ).add_segment(b"DTM*233")
+    loop.add_loop(claim).add_segment("CLP*C2*1*").add_segment("NM1*QC")
+
+    assert decode(loop.loops[0], False) == 3
+    assert decode(loop) == 1
+
+    first, second = loop.loops
+    assert first.segments[0].values == ["CLP", "C1", "1", Decimal("100.5")]
+    assert first.segments[0].value(3) == Decimal("100.5")
+    assert first.segments[1].value(2) == date(2023, 1, 15)
+    assert first.segments[2].value(2) is None
+    assert second.segments[0].value(3) is None
+    assert second.segments[1].values is None
+    assert second.segments[1].value(1) == "QC"
+    assert loop.segments[0].values is None
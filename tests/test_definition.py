@@ -0,0 +1,124 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import os
+import pickle
+
+import pytest
+
+from x12.schema.definition import (
+    definition_hash,
+    from_definition,
+    load_schema,
+    to_definition,
+)
+from x12.schema.schema import DataType, Schema, SegmentPredicate, Usage
+
+DEFINITION = {
+    "name": "X12",
+    "children": [
+        {
+            "name": "ST",
+            "predicate": {"segment": "ST", "element": 1, "values": ["835"]},
+            "segments": [
+                {"name": "ST", "elements": [{"name": "ST01", "type": "ID"}]},
+                {
+                    "name": "DTM",
+                    "usage": "OPTIONAL",
+                    "unique": False,
+                    "elements": [
+                        {"name": "DTM01", "codes": ["232"]},
+                        {"name": "DTM02", "type": "DT", "usage": "REQUIRED"},
+                    ],
+                },
+            ],
+            "children": [
+                {"name": "2000", "predicate": {"segment": "LX"}},
+                {"name": "2100", "usage": "OPTIONAL", "predicate": {"segment": "CLP"}},
+            ],
+        },
+    ],
+}
+
+
+def test_from_definition():
+    schema = from_definition(DEFINITION)
+
+    assert str(schema) == "+--X12\n|  +--ST (ST, DTM)\n|  |  +--2000\n|  |  +--2100\n"
+    assert schema.predicate is None
+    st = schema.children[0]
+    assert st.matches(["ST", "835"]) and not st.matches(["ST", "837"])
+    assert st.segments[0].usage == Usage.REQUIRED
+    assert st.segments[0].matches(["ST"])
+    assert st.segments[0].elements[0].data_type == DataType.ID
+    assert st.segments[1].unique is False
+    assert st.segments[1].elements[0].codes == frozenset(["232"])
+    assert st.segments[1].elements[1].usage == Usage.REQUIRED
+    assert st.children[1].usage == Usage.OPTIONAL
+    assert isinstance(st.children[1].predicate, SegmentPredicate)
+
+
+def test_to_definition():
+    definition = to_definition(from_definition(DEFINITION))
+
+    assert to_definition(from_definition(definition)) == definition
+    assert definition["children"][0]["segments"][1]["elements"][1] == {
+        "name": "DTM02",
+        "type": "DT",
+        "usage": "REQUIRED",
+        "min_length": 0,
+        "max_length": None,
+        "codes": None,
+    }
+
+    schema = Schema("X12")
+    schema.add_child("ST", Usage.REQUIRED, lambda tokens: tokens[0] == "ST")
+    with pytest.raises(ValueError, match="custom predicate of ST"):
+        to_definition(schema)
+
+
+def test_load_schema(tmp_path):
+    assert load_schema(DEFINITION).compiled
+
+    schema = load_schema(DEFINITION, str(tmp_path))
+    file_path = tmp_path / f"x12-schema-{definition_hash(DEFINITION)}.pickle"
+    assert schema.compiled
+    assert os.listdir(tmp_path) == [file_path.name]
+
+    cached = load_schema(DEFINITION, str(tmp_path))
+    assert cached is not schema
+    assert cached.compiled
+    assert str(cached) == str(schema)
+    assert cached.children[0].children_table.find(["LX"]) == (
+        0,
+        cached.children[0].children[0],
+    )
+
+    file_path.write_bytes(b"bogus")
+    assert str(load_schema(DEFINITION, str(tmp_path))) == str(schema)
+    assert isinstance(pickle.loads(file_path.read_bytes()), Schema)
+
+
+def test_definition_hash():
+    assert definition_hash(DEFINITION) == definition_hash(dict(DEFINITION))
+    assert definition_hash(DEFINITION) != definition_hash({"name": "X12"})
+
+
+def test_load_schema_deep(tmp_path):
+    definition = {"name": "X12"}
+    loop = definition
+    for index in range(1500):
+        loop["children"] = [{"name": f"L{index}", "predicate": {"segment": "LX"}}]
+        loop = loop["children"][0]
+
+    schema = load_schema(definition, str(tmp_path))
+    cached = load_schema(definition, str(tmp_path))
+    assert cached is not schema
+    assert cached.compiled
+    assert str(cached) == str(schema)
+
+    node = cached
+    while node.children:
+        node = node.children[0]
+    assert node.loop_name == "L1499" and node.depth == 1500
+    assert node.ancestors_table.find(["LX"]) == (1, node)
+    assert pickle.loads(pickle.dumps(node)).loop_name == "L1499"
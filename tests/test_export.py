@@ -0,0 +1,150 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import io
+
+import pytest
+
+from x12.parser.context import Context
+from x12.parser.decode import to_date
+from x12.parser.export import Field, FieldType, export, to_arrays, write_csv
+from x12.parser.parse import parse
+from x12.schema.schema import Schema, Usage, by_segment
+
+
+def schema() -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    claim = x12.add_child("2100", Usage.REQUIRED, by_segment("CLP"))
+    claim.add_child("2110", Usage.REQUIRED, by_segment("SVC"))
+    return x12
+
+
+def fields() -> list[Field]:
+    return [
+        Field("claim", "CLP", 1, "2100"),
+        Field("charge", "CLP", 3, "2100", field_type=FieldType.NUMBER),
+        Field("code", "SVC", 1, component_index=1),
+        Field("paid", "SVC", 3, field_type=FieldType.NUMBER),
+        Field("date", "DTM", 2, qualifier_index=1, qualifier_values=["472"]),
+        Field("received", "DTM", 2, "2100", 1, ["050"], field_type=FieldType.DATE),
+    ]
+
+
+def content() -> str:
+    return (
+        "CLP*1*1*100.5~DTM*050*20230115~"
+        "SVC*HC:99213*60*50.25~DTM*150*20230101~DTM*472*20230102~"
+        "SVC*HC*40~"
+        "CLP*2~SVC*HC:99214*10*-5~"
+    )
+
+
+def test_field():
+    field = Field("date", "DTM", 2, qualifier_index=1, qualifier_values=["472"])
+
+    assert field.matches(["DTM", "472", "20230101"])
+    assert not field.matches(["DTM", "150", "20230101"])
+    assert not field.matches(["DTM"])
+    assert field.value(["DTM", "472", "20230101"], ":") == "20230101"
+    assert field.value(["DTM", "472"], ":") is None
+    assert Field("code", "SVC", 1, component_index=1).value(["SVC", "HC"], ":") is None
+
+
+def test_export(tmp_path):
+    file_path = tmp_path / "file.x12"
+    file_path.write_text(content())
+    loop = parse(file_path, schema(), Context("~", "*", ":"))
+
+    assert export(loop, "2110", fields()) == {
+        "claim": ["1", "1", "2"],
+        "charge": ["100.5", "100.5", None],
+        "code": ["99213", None, "99214"],
+        "paid": ["50.25", None, "-5"],
+        "date": ["20230102", None, None],
+        "received": ["20230115", "20230115", None],
+    }
+    assert export(loop, "2100", fields()[:2]) == {
+        "claim": ["1", "2"],
+        "charge": ["100.5", None],
+    }
+    assert export(loop.loops[1], "2100", fields()[:1]) == {"claim": ["2"]}
+    assert export(loop, "bogus", fields()[:1]) == {"claim": []}
+
+
+def test_to_arrays(tmp_path):
+    numpy = pytest.importorskip("numpy")
+
+    file_path = tmp_path / "file.x12"
+    file_path.write_text(content())
+    columns = export(
+        parse(file_path, schema(), Context("~", "*", ":")), "2110", fields()
+    )
+    arrays = to_arrays(columns, fields())
+
+    assert arrays["claim"].tolist() == ["1", "1", "2"]
+    assert arrays["paid"].dtype == numpy.float64
+    assert numpy.array_equal(
+        arrays["paid"], numpy.array([50.25, numpy.nan, -5]), equal_nan=True
+    )
+    assert arrays["received"].dtype == numpy.dtype("datetime64[D]")
+    assert arrays["received"].astype(str).tolist() == [
+        "2023-01-15",
+        "2023-01-15",
+        "NaT",
+    ]
+
+
+def test_to_arrays_invalid():
+    numpy = pytest.importorskip("numpy")
+
+    columns = {
+        "paid": ["12.5", "N/A", None, "12345678901234567890.5"],
+        "date": ["230115", "991231", "20230230", "202301151200"],
+        "received": ["20240229", "2023011", "DATE", "20231301"],
+    }
+    arrays = to_arrays(
+        columns,
+        [
+            Field("paid", "SVC", 3, field_type=FieldType.NUMBER),
+            Field("date", "DTM", 2, field_type=FieldType.DATE),
+            Field("received", "DTM", 2, field_type=FieldType.DATE),
+        ],
+    )
+
+    # An invalid number is NaN, the long values are not truncated.
+    assert numpy.array_equal(
+        arrays["paid"],
+        numpy.array([12.5, numpy.nan, numpy.nan, 12345678901234567890.5]),
+        equal_nan=True,
+    )
+    # The dates by the value length, an invalid date is NaT.
+    assert arrays["date"].astype(str).tolist() == [
+        "2023-01-15",
+        "1999-12-31",
+        "NaT",
+        "NaT",
+    ]
+    assert arrays["received"].astype(str).tolist() == [
+        "2024-02-29",
+        "NaT",
+        "NaT",
+        "NaT",
+    ]
+
+
+def test_to_arrays_year_pivot():
+    numpy = pytest.importorskip("numpy")
+
+    values = ["000101", "491231", "500101", "991231"]
+    arrays = to_arrays(
+        {"date": values}, [Field("date", "DTM", 2, field_type=FieldType.DATE)]
+    )
+    # The YYMMDD dates are of the same century as decoded.
+    assert arrays["date"].tolist() == [to_date(value) for value in values]
+    assert arrays["date"].dtype == numpy.dtype("datetime64[D]")
+
+
+def test_write_csv():
+    fp = io.StringIO()
+    write_csv(fp, {"claim": ["1", "2"], "paid": ["50.25", None]})
+
+    assert fp.getvalue() == "claim,paid\r\n1,50.25\r\n2,\r\n"
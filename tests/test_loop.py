@@ -1,5 +1,7 @@
 # pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
 
+import io
+
 from x12.parser.context import Context
 from x12.parser.loop import Loop
 from x12.schema.schema import Schema, Usage
@@ -21,6 +23,25 @@ def test_add_segment():
     assert len(loop.segments) == 1
     assert str(loop.segments[0]) == "1*2*3~"
 
+    elements = ["4", "5"]
+    loop.add_segment("4*5", elements)
+    assert loop.segments[1].elements is elements
+
+    loop.add_segment(b"6*7")
+    assert loop.segments[2].raw == b"6*7"
+    assert loop.segments[2].elements == ["6", "7"]
+
+
+def test_detach():
+    loop = Loop(Schema("root", Usage.REQUIRED), Context("~", "*", ":"))
+    child_1 = loop.add_loop(Schema("child_1", Usage.REQUIRED))
+    child_2 = loop.add_loop(Schema("child_2", Usage.REQUIRED))
+
+    assert child_1.detach() is child_1
+    assert loop.loops == [child_2]
+    assert child_1.parent is loop
+    assert loop.detach() is loop
+
 
 def test_find_loops():
     loop = Loop(Schema("root", Usage.REQUIRED), Context("~", "*", ":"))
@@ -115,6 +136,28 @@ def test_to_xml():
         assert loop.to_xml() == expect.lstrip()
 
 
+def test_write_xml():
+    loop = Loop(Schema("root", Usage.REQUIRED), Context("~", "*", ":"))
+    loop.add_segment("PR*1").add_loop(Schema("child", Usage.REQUIRED)).add_segment(
+        "NM*]]>"
+    )
+    loop.add_loop(Schema("child", Usage.REQUIRED))
+
+    assert list(loop.iter_xml())[0] == '<LOOP NAME="root">\n'
+
+    fp = io.StringIO()
+    loop.write_xml(fp)
+    assert fp.getvalue() == loop.to_xml()
+
+    fp = io.StringIO()
+    loop.write_xml(fp, False)
+    assert fp.getvalue() == (
+        '<LOOP NAME="root"><PR><PR01><![CDATA[1]]></PR01></PR>'
+        '<LOOP NAME="child"><NM><NM01><![CDATA[]]]]><![CDATA[>]]></NM01></NM></LOOP>'
+        '<LOOP NAME="child"></LOOP></LOOP>'
+    )
+
+
 def test___str__():
     def root():
         return Loop(Schema("root", Usage.REQUIRED), Context("~", "*", ":"))
@@ -169,3 +212,65 @@ def test_to_debug():
 
     for loop, expect in tests:
         assert loop.to_debug() == expect
+
+
+def test_index():
+    loop = Loop(Schema("root", Usage.REQUIRED), Context("~", "*", ":"))
+    loop_1 = loop.add_loop(Schema("loop_1", Usage.REQUIRED)).add_segment("SEG*1")
+    loop_2 = loop_1.add_loop(Schema("loop_2", Usage.REQUIRED)).add_segment(b"SEG*2")
+    loop_3 = loop.add_loop(Schema("loop_2", Usage.REQUIRED)).add_segment("SEG*3")
+
+    assert loop.find_loops("loop_2", True) == [loop_2, loop_3]
+    assert loop_1.find_loops("loop_2", True) == [loop_2]
+    assert loop_2.find_loops("loop_2", True) == []
+    assert loop.find_segments("SEG", True) == [
+        loop_1.segments[0],
+        loop_2.segments[0],
+        loop_3.segments[0],
+    ]
+    assert loop_1.find_segments("SEG", True) == loop_1.segments + loop_2.segments
+    assert list(loop.iter_loops("loop_2", True)) == [loop_2, loop_3]
+    assert list(loop.iter_loops("loop_1")) == [loop_1]
+    assert list(loop_1.iter_segments("SEG", True)) == [
+        loop_1.segments[0],
+        loop_2.segments[0],
+    ]
+    assert list(loop_1.iter_segments("SEG")) == loop_1.segments
+    assert list(loop.iter_segments("bogus", True)) == []
+    assert loop_2.segments[0].raw == b"SEG*2"
+
+    loop_4 = loop_3.add_loop(Schema("loop_2", Usage.REQUIRED)).add_segment("SEG*4")
+    assert loop.find_loops("loop_2", True) == [loop_2, loop_3, loop_4]
+
+    loop_1.detach()
+    assert loop.find_loops("loop_2", True) == [loop_3, loop_4]
+    assert loop_1.find_loops("loop_2", True) == [loop_2]
+    assert loop_2.find_segments("SEG", True) == loop_2.segments
+
+    loop.insert_loops(0, [loop_1])
+    assert loop.find_loops("loop_2", True) == [loop_2, loop_3, loop_4]
+    assert loop_2.index is loop.index
+
+    loop.loops.pop(0)
+    assert loop.invalidate().find_loops("loop_2", True) == [loop_3, loop_4]
+    assert loop_2.find_segments("SEG", True) == loop_2.segments
+
+
+def test_index_lazy():
+    loop = Loop(Schema("root", Usage.REQUIRED), Context("~", "*", ":"))
+    loop_1 = loop.add_loop(Schema("loop_1", Usage.REQUIRED))
+    loop_2 = loop_1.add_loop(Schema("loop_2", Usage.REQUIRED)).add_segment("SEG*2")
+    assert [node.index for node, _ in loop.walk()] == [None, None, None]
+
+    # Created for the whole tree on the first recursive query of any loop.
+    assert loop_2.find_segments("SEG", True) == loop_2.segments
+    assert loop.index is not None
+    assert all(node.index is loop.index for node, _ in loop.walk())
+    assert loop.find_loops("loop_2", True) == [loop_2]
+
+    other = Loop(Schema("loop_1", Usage.REQUIRED), loop.context)
+    loop_3 = other.add_loop(Schema("loop_2", Usage.REQUIRED))
+    assert loop_3.index is None
+    loop.insert_loops(0, [other])
+    assert loop_3.index is loop.index
+    assert loop.find_loops("loop_2", True) == [loop_3, loop_2]
@@ -1,13 +1,38 @@
 # pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
 
+import gzip
+import io
+import tempfile
+import zipfile
 from unittest.mock import mock_open, patch
 
 import pytest
 
 from x12.parser.context import Context
 from x12.parser.loop import Loop
-from x12.parser.parse import find_child_schema, find_parent_loop_schema, parse
-from x12.schema.schema import Schema, Usage, by_segment
+from x12.parser.parse import (
+    Builder,
+    HierarchyBuilder,
+    ProjectedBuilder,
+    find_child_schema,
+    find_parent_loop_schema,
+    iter_parse,
+    iter_parse_stream,
+    parse,
+    parse_buffer,
+    parse_content,
+    parse_mmap,
+    parse_stream,
+    resolve_buffer_context,
+    resolve_context,
+    split_raw_segments,
+    split_segments,
+)
+from x12.parser.validate import Occurrence, Validator, validate
+from x12.schema.schema import Schema
+from x12.schema.schema import Segment as SegmentSchema
+from x12.schema.schema import Usage, by_segment
+from x12.schemas import load
 
 
 @patch("builtins.print")
@@ -95,6 +120,404 @@ def test_evaluate(data, expected):
         assert parse("mocked_file", x12, ctx).to_xml() == expected.lstrip()
 
 
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        ([], []),
+        (["ISA*00~"], ["ISA*00"]),
+        (["ISA*0", "0~ST*", "1~\r", "\nSE*1"], ["ISA*00", "ST*1", "SE*1"]),
+        (["ISA*00", "~", "IEA*00~\n"], ["ISA*00", "IEA*00"]),
+    ],
+)
+def test_split_segments(chunks, expected):
+    assert list(split_segments(chunks, Context("~", "*", ":"))) == expected
+
+
+def test_split_segments_line_break_separator():
+    assert list(split_segments(["A*1\r\nB*", "2\r\n"], Context("\n", "*", ":"))) == [
+        "A*1",
+        "B*2",
+    ]
+    assert list(split_raw_segments(b"A*1\r\nB*2\r\n", Context("\n", "*", ":"), 3)) == [
+        b"A*1",
+        b"B*2",
+    ]
+
+
+ISA = (
+    "ISA|00|          |00|          |ZZ|SENDER         |ZZ|RECEIVER       "
+    "|230101|1200|^|00501|000000001|0|P|>\n"
+)
+
+
+def test_resolve_context():
+    context = Context("~", "*", ":")
+    assert resolve_context([], context)[0] is context
+    assert list(resolve_context(["A", "B"], context)[1]) == ["A", "B"]
+
+    context, chunks = resolve_context([ISA[:50], ISA[50:100], ISA[100:], "GS"], None)
+    assert (context.segment_separator, context.element_separator) == ("\n", "|")
+    assert "".join(chunks) == ISA + "GS"
+
+    context, chunks = resolve_context(["GS*1~"], None)
+    assert (context.segment_separator, context.element_separator) == ("~", "*")
+    assert list(chunks) == ["GS*1~"]
+
+    context, chunks = resolve_context([ISA[:50].encode(), ISA[50:].encode()], None)
+    assert (context.segment_separator, context.element_separator) == ("\n", "|")
+    assert b"".join(chunks) == ISA.encode()
+
+
+def test_resolve_buffer_context():
+    context = Context("~", "*", ":")
+    assert resolve_buffer_context(b"", context) is context
+    assert resolve_buffer_context(ISA.encode(), None).element_separator == "|"
+    assert resolve_buffer_context(b"", None).element_separator == "*"
+
+
+def test_parse_detected_context(tmp_path):
+    x12 = Schema("X12", Usage.REQUIRED)
+    x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    file_path = tmp_path / "file.x12"
+    file_path.write_text(ISA + "ST|1\nNM1|1>2\n")
+
+    for loop in (parse(file_path, x12), parse_mmap(file_path, x12)):
+        assert loop.loops[0].segments[1].elements == ["NM1", "1>2"]
+        assert loop.context.composite_element_separator == ">"
+        assert loop.context.repetition_separator == "^"
+
+
+@pytest.mark.parametrize(
+    "buffer, chunk_size, expected",
+    [
+        (b"", 4, []),
+        (b"ISA*00~", 4, [b"ISA*00"]),
+        (b"ISA*00~\r\nST*1~\nSE*1", 3, [b"ISA*00", b"ST*1", b"SE*1"]),
+        (memoryview(b"ISA*00~IEA*00~\n"), 5, [b"ISA*00", b"IEA*00"]),
+    ],
+)
+def test_split_raw_segments(buffer, chunk_size, expected):
+    assert (
+        list(split_raw_segments(buffer, Context("~", "*", ":"), chunk_size)) == expected
+    )
+
+
+def test_parse_buffer():
+    x12 = Schema("X12", Usage.REQUIRED)
+    x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    loop = parse_buffer(b"ISA*00~\nST*1~NM1*\xc3\xa9~", x12, Context("~", "*", ":"))
+
+    segment = loop.loops[0].segments[1]
+    assert segment.raw == b"NM1*\xc3\xa9"
+    assert str(loop) == "ISA*00~\nST*1~\nNM1*\u00e9~"
+    assert segment.elements == ["NM1", "\u00e9"]
+
+
+def test_parse_mmap(tmp_path):
+    x12 = Schema("X12", Usage.REQUIRED)
+    x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+
+    file_path = tmp_path / "file.x12"
+    file_path.write_bytes(b"ISA*00~\nST*1~NM1*1~")
+    assert str(parse_mmap(file_path, x12)) == "ISA*00~\nST*1~\nNM1*1~"
+
+    file_path.write_bytes(b"")
+    assert str(parse_mmap(file_path, x12)) == ""
+
+
+@patch("builtins.print")
+def test_parse_mmap_file_exception(mock_print, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        parse_mmap(tmp_path / "bogus", Schema("root", Usage.REQUIRED))
+    assert mock_print.call_args[0][0] == f"unable to find {tmp_path / 'bogus'}"
+
+    with pytest.raises(OSError):
+        parse_mmap(tmp_path, Schema("root", Usage.REQUIRED))
+    assert mock_print.call_args[0][0] == f"failed to read {tmp_path}"
+
+
+def test_parse_content():
+    x12 = Schema("X12", Usage.REQUIRED)
+    x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    content = ISA + "ST|1\nNM1|\u00e9\n"
+
+    for data in (content, content.encode(), memoryview(content.encode())):
+        loop = parse_content(data, x12)
+        assert loop.loops[0].segments[1].elements == ["NM1", "\u00e9"]
+        assert loop.context.element_separator == "|"
+
+    assert str(parse_content("", x12)) == ""
+
+
+def test_parse_stream():
+    x12 = Schema("X12", Usage.REQUIRED)
+    x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    content = (ISA + "ST|1\nNM1|\u00e9\n").encode()
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as file:
+        file.writestr("file.x12", content)
+
+    streams = [
+        io.StringIO(content.decode()),
+        io.BytesIO(content),
+        io.BufferedReader(io.BytesIO(content)),
+        io.BytesIO(gzip.compress(content)),
+        io.BytesIO(archive.getvalue()),
+    ]
+    for stream in streams:
+        loop = parse_stream(stream, x12, chunk_size=7)
+        assert loop.loops[0].segments[1].elements == ["NM1", "\u00e9"]
+        assert loop.context.element_separator == "|"
+
+    with zipfile.ZipFile(archive, "a") as file:
+        file.writestr("other.x12", content)
+    archive.seek(0)
+    with pytest.raises(ValueError):
+        parse_stream(archive, x12)
+
+
+class TextReader:
+    """Text file-like object, not derived from io.TextIOBase."""
+
+    def __init__(self, content: str):
+        self.stream = io.StringIO(content)
+
+    def read(self, size: int = -1) -> str:
+        return self.stream.read(size)
+
+
+def test_parse_stream_text():
+    x12 = Schema("X12", Usage.REQUIRED)
+    x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    content = ISA + "ST|1\nNM1|\u00e9\n"
+
+    with tempfile.SpooledTemporaryFile(mode="w+", encoding="utf-8") as spooled:
+        spooled.write(content)
+        spooled.seek(0)
+        for stream in (spooled, TextReader(content)):
+            loop = parse_stream(stream, x12, chunk_size=7)
+            assert loop.loops[0].segments[1].elements == ["NM1", "\u00e9"]
+
+
+PROJECTED = "ISA*00~GS*1~ST*1~NM1*1~LX*1~CLP*1~DTM*1~SVC*1~LX*2~CLP*2~SE*1~GE*1~"
+
+
+def projected_schema(predicate=by_segment("LX")) -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    gs = x12.add_child("GS", Usage.REQUIRED, by_segment("GS"))
+    st = gs.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    claim = st.add_child("2000", Usage.OPTIONAL, predicate)
+    claim.add_child("2100", Usage.OPTIONAL, by_segment("SVC"))
+    gs.add_child("SE", Usage.REQUIRED, by_segment("SE"))
+    x12.add_child("GE", Usage.REQUIRED, by_segment("GE"))
+    return x12
+
+
+def test_parse_projection():
+    context = Context("~", "*", ":")
+    loop = parse_content(PROJECTED, projected_schema(), context, projection=["2000"])
+    assert str(loop) == "LX*1~\nCLP*1~\nDTM*1~\nLX*2~\nCLP*2~"
+    assert [child.schema.loop_name for child in loop.find_loops("ST", True)] == ["ST"]
+    assert loop.find_loops("2100", True) == []
+    assert loop.find_loops("SE", True) == []
+
+    for data in (PROJECTED, PROJECTED.encode()):
+        loop = parse_content(
+            data, projected_schema(), context, projection={"2000": ["CLP"], "SE": []}
+        )
+        assert [str(segment) for segment in loop.find_segments("CLP", True)] == [
+            "CLP*1~",
+            "CLP*2~",
+        ]
+        assert len(loop.find_loops("SE", True)) == 1
+        assert loop.find_loops("SE", True)[0].segments == []
+
+    def predicate(tokens):
+        return tokens[0] == "LX"
+
+    loop = parse_content(
+        PROJECTED, projected_schema(predicate), context, projection={"2000": ["LX"]}
+    )
+    assert str(loop) == "LX*1~\nLX*2~"
+
+    with pytest.raises(ValueError):
+        parse_content(PROJECTED, projected_schema(), context, Validator(), None, [])
+
+
+def test_projected_builder_skips():
+    builder = ProjectedBuilder(projected_schema(), Context("~", "*", ":"), ["2100"])
+    for line in PROJECTED.split("~"):
+        builder.add(line)
+
+    # The loops are kept on the path to the projected loops only.
+    assert builder.plan(builder.root.schema)[1] == frozenset()
+    assert builder.plan(builder.root.schema.children[0])[2] is True
+    loop = builder.close()
+    assert [str(segment) for segment in loop.find_segments("SVC", True)] == ["SVC*1~"]
+    assert len(loop.find_loops("2000", True)) == 2
+
+
+def test_iter_parse_stream():
+    x12 = Schema("X12", Usage.REQUIRED)
+    x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    data = gzip.compress(b"ST*1~NM1*1~ST*2~NM1*2~")
+
+    loops = list(iter_parse_stream(io.BytesIO(data), x12, "ST", chunk_size=4))
+    assert loops[0].segments[1].raw == b"NM1*1"
+    assert [str(loop) for loop in loops] == ["ST*1~\nNM1*1~", "ST*2~\nNM1*2~"]
+
+
+def test_iter_parse():
+    data = "ISA*00~GS*00~ST*1~NM1*1~SE*1~ST*2~NM1*2~SE*2~GE*00~IEA*00~"
+    x12 = Schema("X12", Usage.REQUIRED)
+    isa = x12.add_child("ISA", Usage.REQUIRED, by_segment("ISA"))
+    gs = isa.add_child("GS", Usage.REQUIRED, by_segment("GS"))
+    gs.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    gs.add_child("SE", Usage.REQUIRED, by_segment("SE"))
+    isa.add_child("GE", Usage.REQUIRED, by_segment("GE"))
+    x12.add_child("IEA", Usage.REQUIRED, by_segment("IEA"))
+
+    with patch("builtins.open", mock_open(read_data=data)):
+        loops = list(iter_parse("mocked_file", x12, "ST", Context("~", "*", ":"), 4))
+
+    assert [str(loop) for loop in loops] == ["ST*1~\nNM1*1~", "ST*2~\nNM1*2~"]
+    assert loops[0].parent is loops[1].parent
+    assert [loop.schema.loop_name for loop in loops[0].parent.loops] == ["SE", "SE"]
+
+    with patch("builtins.open", mock_open(read_data="ISA*00~GS*00~ST*1~NM1*1")):
+        loops = list(iter_parse("mocked_file", x12, "ST", Context("~", "*", ":")))
+
+    assert [str(loop) for loop in loops] == ["ST*1~\nNM1*1~"]
+
+
+def validated_schema() -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    gs = x12.add_child("GS", Usage.REQUIRED, by_segment("GS")).with_segments(
+        SegmentSchema("GS", Usage.REQUIRED, by_segment("GS"))
+    )
+    st = gs.add_child("ST", Usage.REQUIRED, by_segment("ST")).with_segments(
+        SegmentSchema("ST", Usage.REQUIRED, by_segment("ST")),
+        SegmentSchema("NM1", Usage.REQUIRED, by_segment("NM1")),
+    )
+    st.add_child("2000", Usage.OPTIONAL, by_segment("LX")).with_segments(
+        SegmentSchema("LX", Usage.REQUIRED, by_segment("LX")),
+        SegmentSchema("CLP", Usage.REQUIRED, by_segment("CLP")),
+    )
+    gs.add_child("SE", Usage.REQUIRED, by_segment("SE")).with_segments(
+        SegmentSchema("SE", Usage.REQUIRED, by_segment("SE"))
+    )
+    return x12
+
+
+VALIDATED = (
+    "GS*1~"
+    "ST*1~NM1*1~LX*1~CLP*1~SE*1~"
+    "ST*2~BOGUS*2~LX*1~CLP*1~SE*2~"
+    "ST*3~NM1*3~LX*1~SE*3~"
+    "ST*4~NM1*4~LX*1~LX*2~CLP*2~SE*4~"
+    "ST*5~NM1*5~"
+)
+
+
+def test_parse_validated():
+    validator = Validator()
+    with patch("builtins.open", mock_open(read_data=VALIDATED)):
+        loop = parse(
+            "mocked_file", validated_schema(), Context("~", "*", ":"), validator
+        )
+
+    expected = validate(loop).issues
+    assert len(validator.result.issues) == len(expected)
+    assert set(validator.result.issues) == set(expected)
+
+    validator = Validator()
+    loop = parse_buffer(VALIDATED.encode(), validated_schema(), None, validator)
+    assert set(validator.result.issues) == set(validate(loop).issues)
+
+
+def test_iter_parse_validated():
+    def transactions(validator: Validator, reject_invalid: bool) -> list[str]:
+        with patch("builtins.open", mock_open(read_data=VALIDATED)):
+            return [
+                loop.segments[0].elements[1]
+                for loop in iter_parse(
+                    "mocked_file",
+                    validated_schema(),
+                    "ST",
+                    Context("~", "*", ":"),
+                    validator=validator,
+                    reject_invalid=reject_invalid,
+                )
+            ]
+
+    validator = Validator()
+    assert transactions(validator, False) == ["1", "2", "3", "4", "5"]
+    issues = validator.result.issues
+    assert [(issue.kind, issue.path[-1], issue.name) for issue in issues] == [
+        (Occurrence.UNEXPECTED, "ST", "BOGUS"),
+        (Occurrence.MISSING, "ST", "NM1"),
+        (Occurrence.MISSING, "2000", "CLP"),
+        (Occurrence.MISSING, "2000", "CLP"),
+    ]
+
+    validator = Validator()
+    assert transactions(validator, True) == ["1", "5"]
+    issues = validator.result.issues
+    # The rest of the transaction 4 is skipped, once its first LX loop is closed.
+    assert [(issue.kind, issue.path[-1], issue.name) for issue in issues] == [
+        (Occurrence.UNEXPECTED, "ST", "BOGUS"),
+        (Occurrence.MISSING, "ST", "NM1"),
+        (Occurrence.MISSING, "2000", "CLP"),
+        (Occurrence.MISSING, "2000", "CLP"),
+    ]
+
+    # Nothing is validated (nor rejected) once the validation is stopped.
+    validator = Validator(fail_fast=True)
+    assert transactions(validator, True) == ["1", "3", "4", "5"]
+    assert validator.result.truncated
+
+
+def test_builder_discard():
+    x12 = validated_schema()
+    builder = Builder(x12, Context("~", "*", ":"), Validator())
+    builder.add("GS*1")
+    st = builder.add("ST*1")
+    builder.add("NM1*1")
+    builder.add("LX*1")
+
+    builder.discard(st)
+    assert builder.discarding is st
+    assert st.loops == [] and st.segments == []
+    assert st not in builder.root.loops[0].loops
+
+    lx = builder.add("LX*2")
+    assert lx.parent is st and lx not in st.loops
+    assert builder.add("CLP*1") is lx and lx.segments == []
+
+    se = builder.add("SE*1")
+    assert builder.discarding is None
+    assert se.parent is builder.root.loops[0]
+    assert str(se) == "SE*1~"
+    # The discarded loops are not validated.
+    assert builder.invalid == []
+    assert builder.close() is builder.root
+
+
+def test_builder():
+    x12 = Schema("X12", Usage.REQUIRED)
+    x12.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    builder = Builder(x12, Context("~", "*", ":"))
+
+    assert builder.add("") is builder.root
+    assert builder.add_raw(b"  ") is builder.root
+    assert builder.add("BGN*1") is builder.root
+    head = builder.add("ST*1")
+    assert head.parent is builder.root
+    assert builder.add("NM1*1") is head
+    assert str(builder.root) == "BGN*1~\nST*1~\nNM1*1~"
+
+
 def test_find_child_schema():
     root = Schema("root", Usage.REQUIRED)
     needle_1 = root.add_child(
@@ -130,7 +553,102 @@ def test_find_parent_loop_schema():
         (schema_child_1, loop_child_1, ["bogus"], None),
         (schema_child_1, loop_child_1, ["FIND_ME"], (loop_root, schema_child_2)),
         (schema_child_3, loop_child_3, ["FIND_ME"], (loop_root, schema_child_2)),
+        # Schema deeper than the loop tree.
+        (schema_child_3, loop_child_1, ["FIND_ME"], None),
     ]
 
     for schema, loop, tokens, expected in tests:
         assert find_parent_loop_schema(schema, tokens, loop) == expected
+
+
+HIERARCHY = "~".join(
+    [
+        "ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+        "*230101*1200*^*00501*000000001*0*P*:",
+        "GS*HC*SENDER*RECEIVER*20230101*1200*1*X*005010X222A1",
+        "ST*837*0001*005010X222A1",
+        "BHT*0019*00*1*20230101*1200*CH",
+        "NM1*41*2*SUBMITTER*****46*1",
+        "NM1*40*2*RECEIVER*****46*2",
+        "HL*1**20*1",
+        "NM1*85*2*FIRST*****XX*1",
+        "HL*2**20*1",
+        "NM1*85*2*SECOND*****XX*2",
+        "HL*3*1*22*1",
+        "SBR*P*18*******CI",
+        "NM1*IL*1*DOE*JOHN****MI*1",
+        "HL*4*3*23*0",
+        "PAT*19",
+        "NM1*QC*1*DOE*JANE",
+        "CLM*C1*150***11:B:1*Y*A*Y*Y",
+        "HL*5*2*22*0",
+        "SBR*P*18*******CI",
+        "NM1*IL*1*ROE*RICH****MI*2",
+        "CLM*C2*90***11:B:1*Y*A*Y*Y",
+        "SE*19*0001",
+        "GE*1*1",
+        "IEA*1*000000001",
+    ]
+)
+
+
+def test_parse_hierarchy():
+    context = Context("~", "*", ":")
+    schema = load(["837P"])
+
+    # By the position, the subscriber of the first billing provider
+    # follows the second billing provider.
+    loop = parse_content(HIERARCHY, schema, context)
+    providers = loop.find_loops("2000A", True)
+    assert [len(provider.find_loops("2000B")) for provider in providers] == [0, 2]
+    assert providers[0].hierarchy is None
+
+    for data in (HIERARCHY, HIERARCHY.encode()):
+        loop = parse_content(data, schema, context, hierarchy=True)
+        first, second = loop.find_loops("2000A", True)
+        assert [str(child.segments[0]) for child in first.find_loops("2000B")] == [
+            "HL*3*1*22*1~"
+        ]
+        assert [str(child.segments[0]) for child in second.find_loops("2000B")] == [
+            "HL*5*2*22*0~"
+        ]
+
+        hierarchy = loop.find_loops("ST", True)[0].hierarchy
+        assert first.hierarchy is hierarchy
+        assert hierarchy.find("3") is first.loops[1]
+        assert hierarchy.find("9") is None
+        assert hierarchy.find_level("20") == [first, second]
+        assert hierarchy.find_level("21") == []
+        assert hierarchy.parent(hierarchy.find("4")) is hierarchy.find("3")
+        assert hierarchy.parent(first) is None
+        assert hierarchy.find_children(first) == [hierarchy.find("3")]
+
+        claims = loop.find_loops("2300", True)
+        assert hierarchy.level(claims[0]) is hierarchy.find("4")
+        assert [hierarchy.ancestor(claim, "20") for claim in claims] == [
+            first,
+            second,
+        ]
+        assert hierarchy.ancestor(claims[0], "22") is hierarchy.find("3")
+        assert hierarchy.ancestor(claims[0], "21") is None
+        assert hierarchy.level(loop) is None
+
+    with pytest.raises(ValueError):
+        parse_content(HIERARCHY, schema, context, Validator(), hierarchy=True)
+    with pytest.raises(ValueError):
+        parse_content(HIERARCHY, schema, context, projection=[], hierarchy=True)
+
+
+def test_hierarchy_builder_keeps_unmatched():
+    # The patient (23) declares the billing provider (20) as the HL parent,
+    # which has no patient child loop schema, so it is kept where matched.
+    builder = HierarchyBuilder(load(["837P"]), Context("~", "*", ":"))
+    for line in HIERARCHY.replace("HL*4*3*23", "HL*4*1*23").split("~"):
+        builder.add(line)
+    loop = builder.close()
+
+    hierarchy = loop.find_loops("ST", True)[0].hierarchy
+    patient = hierarchy.find("4")
+    assert patient.parent is hierarchy.find("3")
+    assert hierarchy.parent(patient) is hierarchy.find("1")
+    assert hierarchy.find_children(hierarchy.find("3")) == []
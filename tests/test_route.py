@@ -0,0 +1,224 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import io
+import os
+from contextlib import contextmanager
+
+import pytest
+
+from x12.parser.context import Context
+from x12.parser.route import (
+    Router,
+    by_interchange_sender,
+    by_sender,
+    by_transaction,
+    iter_transactions,
+    route,
+    route_file,
+    scan_envelope,
+)
+
+ISA = (
+    b"ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+    b"*230101*1200*^*00501*000000009*0*P*:~\n"
+)
+
+DATA = (
+    ISA + b""
+    b"GS*HP*S1*R*1*1*11~\n"
+    b"ST*835*0001~\nBPR*1~\nSE*3*0001~\n"
+    b"ST*835*0002~\nBPR*2~\nSE*3*0002~\n"
+    b"GE*2*11~\n"
+    b"GS*HP*S2*R*1*1*12~\n"
+    b"ST*835*0003~\nBPR*ST*3~\nSE*3*0003~\n"
+    b"GE*1*12~\n"
+    b"IEA*2*000000009~\n"
+)
+
+
+class Output(io.BytesIO):
+    def close(self):
+        self.value = self.getvalue()
+        super().close()
+
+
+def test_scan_envelope():
+    assert [
+        segment_id for segment_id, _, _ in scan_envelope(DATA, Context("~", "*", ":"))
+    ] == ["ISA", "GS", "ST", "SE", "ST", "SE", "GE", "GS", "ST", "SE", "GE", "IEA"]
+
+    found = list(scan_envelope(b"ISA*1~ST*1~SE*1~", Context("~", "*", ":")))
+    assert found == [("ISA", 0, 6), ("ST", 6, 11), ("SE", 11, 16)]
+
+
+def test_iter_transactions():
+    context = Context("~", "*", ":")
+    transactions = list(iter_transactions(DATA, context))
+
+    assert [transaction.header for transaction in transactions] == [
+        ["ST", "835", "0001"],
+        ["ST", "835", "0002"],
+        ["ST", "835", "0003"],
+    ]
+    assert transactions[0].content == b"ST*835*0001~\nBPR*1~\nSE*3*0001~\n"
+    assert transactions[0].group is transactions[1].group
+    assert transactions[0].interchange is transactions[2].interchange
+    assert transactions[2].to_bytes() == (
+        ISA + b"GS*HP*S2*R*1*1*12~\n"
+        b"ST*835*0003~\nBPR*ST*3~\nSE*3*0003~\n"
+        b"GE*1*12~\nIEA*1*000000009~\n"
+    )
+
+    transactions = list(iter_transactions(b"ST*1~A~SE*2~ST*2~", context))
+    assert len(transactions) == 1
+    assert transactions[0].to_bytes() == b"ST*1~A~SE*2~"
+
+
+def test_route():
+    outputs: dict[str, Output] = {}
+
+    def open_output(key, append):
+        assert not append
+        outputs[key] = Output()
+        return outputs[key]
+
+    context = Context("~", "*", ":")
+    assert route(DATA, by_sender, open_output, context) == {"S1": 2, "S2": 1}
+    assert outputs["S1"].value == (
+        ISA + b"GS*HP*S1*R*1*1*11~\n"
+        b"ST*835*0001~\nBPR*1~\nSE*3*0001~\n"
+        b"ST*835*0002~\nBPR*2~\nSE*3*0002~\n"
+        b"GE*2*11~\nIEA*1*000000009~\n"
+    )
+    assert outputs["S2"].value.endswith(b"SE*3*0003~\nGE*1*12~\nIEA*1*000000009~\n")
+
+    outputs.clear()
+    route(DATA, by_interchange_sender, open_output, context)
+    assert outputs["SENDER"].value == DATA
+
+    outputs.clear()
+    assert list(route(DATA, by_transaction, open_output, context)) == [
+        "000000009-11-0001",
+        "000000009-11-0002",
+        "000000009-12-0003",
+    ]
+
+
+def test_router():
+    outputs: dict[str, Output] = {}
+
+    def open_output(key, append):
+        assert not append
+        outputs[key] = Output()
+        return outputs[key]
+
+    context = Context("~", "*", ":")
+    first, second = (
+        list(iter_transactions(DATA, context)),
+        list(iter_transactions(DATA, context)),
+    )
+    with Router(lambda transaction: "all", open_output) as router:
+        router.route(first[0])
+        router.route(second[0])
+
+    assert outputs["all"].value.count(b"ISA") == 2
+    assert outputs["all"].value.count(b"GE*1*11~\nIEA*1*000000009~\n") == 2
+
+
+def test_route_file(tmp_path):
+    file_path = tmp_path / "file.x12"
+    file_path.write_bytes(DATA)
+
+    outputs: dict[str, Output] = {}
+
+    def open_output(key, append):
+        assert not append
+        outputs[key] = Output()
+        return outputs[key]
+
+    assert route_file(file_path, by_sender, open_output) == {"S1": 2, "S2": 1}
+
+
+def many_transactions(groups: int, senders: int) -> bytes:
+    res = [ISA]
+    for group in range(groups):
+        res.append(f"GS*HP*S{group % senders}*R*1*1*{group}~\n".encode())
+        for number in range(3):
+            control = f"{group}{number}"
+            res.append(f"ST*835*{control}~\nBPR*{control}~\nSE*3*{control}~\n".encode())
+        res.append(f"GE*3*{group}~\n".encode())
+    res.append(f"IEA*{groups}*000000009~\n".encode())
+    return b"".join(res)
+
+
+class Opener:
+    # pylint: disable=too-few-public-methods
+    """Output files factory, tracking the number of the open files."""
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.files: list = []
+        self.most = 0
+
+    def __call__(self, key, append):
+        self.files = [fp for fp in self.files if not fp.closed]
+        fp = open(self.path / f"{key}.x12", "ab" if append else "wb")
+        self.files.append(fp)
+        self.most = max(self.most, len(self.files))
+        return fp
+
+
+@contextmanager
+def limited_files(extra: int):
+    """Limit the number of the open files of the process to the open ones + extra."""
+
+    resource = pytest.importorskip("resource")
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("the open files are not listed")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(
+        resource.RLIMIT_NOFILE, (len(os.listdir("/proc/self/fd")) + extra, hard)
+    )
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_route_max_open(tmp_path):
+    data = many_transactions(20, 5)
+    expected: dict[str, Output] = {}
+
+    def open_output(key, append):
+        assert not append
+        expected[key] = Output()
+        return expected[key]
+
+    context = Context("~", "*", ":")
+    counts = route(data, by_sender, open_output, context)
+    assert counts == {f"S{sender}": 12 for sender in range(5)}
+
+    opener = Opener(tmp_path)
+    assert route(data, by_sender, opener, context, max_open=2) == counts
+    assert opener.most == 2
+    for key, output in expected.items():
+        assert (tmp_path / f"{key}.x12").read_bytes() == output.value
+        assert output.value.count(b"GS*") == 4
+        assert output.value.endswith(b"~\nIEA*4*000000009~\n")
+
+
+def test_route_unique(tmp_path):
+    data = many_transactions(30, 1)
+    context = Context("~", "*", ":")
+
+    opener = Opener(tmp_path)
+    with limited_files(8):
+        counts = route(data, by_transaction, opener, context, unique=True)
+        assert len(counts) == 90
+        assert opener.most == 1
+        assert len(route(data, by_transaction, opener, context, max_open=4)) == 90
+        assert opener.most == 4
+    for transaction in iter_transactions(data, context):
+        assert (
+            tmp_path / f"{by_transaction(transaction)}.x12"
+        ).read_bytes() == transaction.to_bytes()
@@ -1,8 +1,22 @@
 # pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
 
+import pickle
+
 import pytest
 
-from x12.schema.schema import Schema, Segment, Usage, by_segment, by_segment_element
+from x12.schema.schema import (
+    ANCESTORS_LEVELS,
+    DataType,
+    DispatchTable,
+    Element,
+    Schema,
+    Segment,
+    SegmentPredicate,
+    SegmentTable,
+    Usage,
+    by_segment,
+    by_segment_element,
+)
 
 
 @pytest.mark.parametrize(
@@ -31,21 +45,174 @@ def test_by_segment_element(tokens, expected):
     assert by_segment_element("needle", 1, ["val"])(tokens) == expected
 
 
+def test_segment_predicate():
+    predicate = by_segment_element("needle", 1, ["val"])
+
+    assert isinstance(predicate, SegmentPredicate)
+    assert predicate.segment_id == "needle"
+    assert predicate.element_index == 1
+    assert predicate.element_values == frozenset(["val"])
+    assert by_segment("needle").element_index is None
+
+
+@pytest.mark.parametrize(
+    "tokens, expected",
+    [
+        ([], None),
+        (["bogus"], None),
+        (["N1"], 3),
+        (["N1", "PR"], 0),
+        (["N1", "PE"], 1),
+        (["N1", "QE"], 3),
+        (["LX", "1"], 2),
+        (["CUSTOM"], 4),
+        (["ST"], 5),
+    ],
+)
+def test_dispatch_table(tokens, expected):
+    candidates = [
+        (0, Schema("0", Usage.REQUIRED, by_segment_element("N1", 1, ["PR"]))),
+        (0, Schema("1", Usage.REQUIRED, by_segment_element("N1", 1, ["PE", "PR"]))),
+        (1, Schema("2", Usage.REQUIRED, by_segment("LX"))),
+        (1, Schema("3", Usage.REQUIRED, by_segment("N1"))),
+        (1, Schema("4", Usage.REQUIRED, lambda tokens: tokens == ["CUSTOM"])),
+        (2, Schema("5", Usage.REQUIRED, by_segment("ST"))),
+        (2, Schema("6", Usage.REQUIRED, by_segment_element("N1", 1, ["QE"]))),
+    ]
+    table = DispatchTable(candidates)
+
+    assert table.find(tokens) == (
+        candidates[expected] if expected is not None else None
+    )
+
+
+def test_compile():
+    root = Schema("root", Usage.REQUIRED)
+    child_1 = root.add_child("child_1", Usage.REQUIRED, by_segment("C1"))
+    child_2 = child_1.add_child("child_2", Usage.REQUIRED, by_segment("C2"))
+
+    assert root.compile() is root
+    assert root.compiled is True
+    assert root.children_table.find(["C1"]) == (0, child_1)
+    assert child_2.ancestors_table.find(["C1"]) == (2, child_1)
+    assert child_2.ancestors_table.find(["C2"]) == (1, child_2)
+
+    child_3 = root.add_child("child_3", Usage.REQUIRED, by_segment("C3"))
+    assert root.compiled is False
+    assert child_2.compile() is child_2
+    assert root.compiled is True
+    assert child_2.ancestors_table.find(["C3"]) == (2, child_3)
+
+
+def test_compile_deep():
+    root = Schema("root", Usage.REQUIRED)
+    nodes = [root]
+    for depth in range(3 * ANCESTORS_LEVELS + 2):
+        node = nodes[-1].add_child(f"L{depth}", Usage.REQUIRED, by_segment(f"S{depth}"))
+        node.add_child(
+            f"N{depth}", Usage.REQUIRED, by_segment_element("NM1", 1, [f"{depth}"])
+        )
+        nodes.append(node)
+    nodes[1].add_child("custom", Usage.REQUIRED, lambda tokens: tokens == ["CUSTOM"])
+    root.compile()
+
+    deepest = nodes[-1]
+    table = deepest.ancestors_table
+    assert len(list(table.tables())) == 4
+    for depth, node in enumerate(nodes[1:-1]):
+        levels = deepest.depth - node.depth + 1
+        assert table.find([f"S{depth}"]) == (levels, node)
+        # The qualified candidates of the nearer levels do not match.
+        assert table.find(["NM1", f"{depth}"]) == (levels - 1, node.children[0])
+    assert deepest.children_table.find(["NM1", f"{len(nodes) - 2}"]) == (
+        0,
+        deepest.children[0],
+    )
+    assert table.find(["CUSTOM"]) == (deepest.depth - 1, nodes[1].children[-1])
+    assert table.find(["NM1", "bogus"]) is None
+    assert table.find(["bogus"]) is None
+
+
+def test_pickle():
+    root = Schema("root", Usage.REQUIRED)
+    child = root.add_child("L1", Usage.OPTIONAL, by_segment("S1"))
+    child.with_segments(Segment("S1", Usage.REQUIRED, by_segment("S1")))
+    grandchild = child.add_child(
+        "L2", Usage.REQUIRED, by_segment_element("S2", 1, ["A"])
+    )
+    root.add_child("L3", Usage.REQUIRED, by_segment("S3"))
+
+    loaded = pickle.loads(pickle.dumps(root))
+    assert str(loaded) == str(root)
+    assert not loaded.compiled
+    assert loaded.children[0].usage == Usage.OPTIONAL
+
+    root.compile()
+    loaded, node = pickle.loads(pickle.dumps((root, grandchild)))
+    assert loaded.compiled
+    assert node is loaded.children[0].children[0]
+    assert node.ancestors_table.find(["S3"]) == (2, loaded.children[1])
+    assert node.matches(["S2", "A"]) and not node.matches(["S2", "B"])
+
+
+def test_segment_table():
+    schemas = [
+        Segment("S1", Usage.REQUIRED, by_segment("S1")),
+        Segment("S2", Usage.REQUIRED, lambda tokens: tokens[:1] == ["S2"]),
+        Segment("S1_A", Usage.REQUIRED, by_segment_element("S1", 1, ["A"])),
+        Segment("S3", Usage.REQUIRED, by_segment("S3")),
+    ]
+    table = SegmentTable(schemas)
+
+    assert table.find(["S1"]) == (0, schemas[0])
+    assert table.find(["S1", "A"], 1) == (2, schemas[2])
+    assert table.find(["S1", "B"], 1) is None
+    assert table.find(["S2"], 0, "S2") == (1, schemas[1])
+    assert table.find(["S2"], 2) is None
+    assert table.find(["S3"], 1) == (3, schemas[3])
+    assert table.find([]) is None
+
+
 def test_add_child():
     root = Schema("root", Usage.REQUIRED)
     child = root.add_child("child", Usage.REQUIRED, lambda: True)
 
     assert child.depth == 1
     assert child.parent is root
+    assert child.root is root
     assert root.children == [child]
 
 
 def test_with_segments():
     root = Schema("root", Usage.REQUIRED)
     segment = Segment("SEGMENT", Usage.REQUIRED, lambda: True)
+    root.compile()
     root.with_segments(segment)
 
     assert root.segments == [segment]
+    assert root.compiled is False
+    assert root.compile().segments_table.schemas == [segment]
+
+
+def test_element():
+    element = Element("CLP02", DataType.ID, Usage.REQUIRED, 1, 2, ["1", "22"])
+
+    assert str(element) == "CLP02"
+    assert element.is_valid("1")
+    assert element.is_valid("22")
+    assert not element.is_valid("")
+    assert not element.is_valid("3")
+    assert not element.is_valid("333")
+    assert Element("CLP03").is_valid("")
+    assert not Element("CLP03", max_length=2).is_valid("333")
+    assert not Element("CLP03", min_length=2).is_valid("3")
+
+
+def test_with_elements():
+    element = Element("SEG01")
+    segment = Segment("SEG", Usage.REQUIRED, by_segment("SEG")).with_elements(element)
+
+    assert segment.elements == [element]
 
 
 def test_matches():
@@ -0,0 +1,155 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import os
+
+from x12.parser.context import Context
+from x12.parser.parse import parse_buffer
+from x12.parser.validate import validate
+from x12.schemas import (
+    TRANSACTIONS,
+    envelope_definition,
+    find_transaction,
+    load,
+    register,
+)
+from x12.schemas.common import Transaction, loop, segment
+
+MIXED = "~".join(
+    [
+        "ISA*00*          *00*          *ZZ*SENDER         *ZZ*RECEIVER       "
+        "*230101*1200*^*00501*000000001*0*P*:",
+        "GS*HP*SENDER*RECEIVER*20230101*1200*1*X*005010X221A1",
+        "ST*835*0001",
+        "BPR*I*100*C*ACH",
+        "TRN*1*12345*1512345678",
+        "DTM*405*20230101",
+        "N1*PR*PAYER",
+        "N3*1 MAIN ST",
+        "N4*CITY*ST*12345",
+        "N1*PE*PAYEE*XX*1234567893",
+        "LX*1",
+        "CLP*C1*1*150*100**12*ICN",
+        "CAS*CO*45*50",
+        "NM1*QC*1*DOE*JOHN",
+        "DTM*232*20230101",
+        "SVC*HC:99213*150*100",
+        "DTM*472*20230101",
+        "CAS*CO*45*50",
+        "PLB*1234567893*20231231*WO:1*10",
+        "SE*17*0001",
+        "GE*1*1",
+        "GS*HC*SENDER*RECEIVER*20230101*1200*2*X*005010X222A1",
+        "ST*837*0002*005010X222A1",
+        "BHT*0019*00*1*20230101*1200*CH",
+        "NM1*41*2*SUBMITTER*****46*1",
+        "PER*IC*CONTACT*TE*5555555555",
+        "NM1*40*2*RECEIVER*****46*2",
+        "HL*1**20*1",
+        "NM1*85*2*BILLING*****XX*1234567893",
+        "N3*1 MAIN ST",
+        "N4*CITY*ST*12345",
+        "REF*EI*123456789",
+        "HL*2*1*22*0",
+        "SBR*P*18*******CI",
+        "NM1*IL*1*DOE*JOHN****MI*1",
+        "NM1*PR*2*PAYER*****PI*1",
+        "CLM*C1*150***11:B:1*Y*A*Y*Y",
+        "HI*ABK:R69",
+        "LX*1",
+        "SV1*HC:99213*150*UN*1***1",
+        "DTP*472*D8*20230101",
+        "SE*18*0002",
+        "GE*1*2",
+        "GS*FA*SENDER*RECEIVER*20230101*1200*3*X*005010X231A1",
+        "ST*999*0003*005010X231A1",
+        "AK1*HC*2*005010X222A1",
+        "AK2*837*0002*005010X222A1",
+        "IK5*A",
+        "AK9*A*1*1*1",
+        "SE*6*0003",
+        "GE*1*3",
+        "IEA*3*000000001",
+        "",
+    ]
+)
+
+
+def test_load():
+    schema = load()
+
+    isa = schema.children[0]
+    assert [child.loop_name for child in isa.children] == ["GS"] * 8 + ["GE"]
+    assert isa.children[0].matches(["GS"] + [""] * 7 + ["005010X221A1"])
+    assert isa.children[-2].matches(["GS", "HP"])
+    assert [child.loop_name for child in isa.children[4].children] == [
+        "ST",
+        "ST",
+        "ST",
+        "SE",
+    ]
+    assert schema.compiled
+
+
+def test_load_cached(tmp_path):
+    schema = load(["835"], str(tmp_path))
+
+    assert len(os.listdir(tmp_path)) == 1
+    assert str(load(["835"], str(tmp_path))) == str(schema)
+
+
+def test_find_transaction():
+    assert find_transaction("005010X222A1", "837") is TRANSACTIONS["837P"]
+    assert find_transaction("005010X279A1", "271") is TRANSACTIONS["271"]
+    assert find_transaction("004010", "837") is None
+
+
+def test_register():
+    transaction = Transaction(
+        "850",
+        "005010",
+        "850",
+        loop("ST", "ST", ["850"], segments=[segment("ST"), segment("BEG")]),
+    )
+    try:
+        register(transaction)
+        assert find_transaction("005010", "850") is transaction
+        definition = envelope_definition(["850"])
+        group = definition["children"][0]["children"][0]
+        assert group["predicate"] == {
+            "segment": "GS",
+            "element": 8,
+            "values": ["005010"],
+        }
+        assert group["children"][0] is transaction.definition
+    finally:
+        del TRANSACTIONS["850"]
+
+
+def test_parse_mixed():
+    loop = parse_buffer(MIXED.encode(), load(), Context("~", "*", ":"))
+
+    transactions = loop.find_loops("ST", recursive=True)
+    assert [st.segments[0].elements[1] for st in transactions] == [
+        "835",
+        "837",
+        "999",
+    ]
+    assert [
+        child.schema.loop_name for child in transactions[0].find_loops("2000")[0].loops
+    ] == ["2100"]
+    assert len(transactions[1].find_loops("2400", recursive=True)) == 1
+    assert len(transactions[2].find_loops("IK5", recursive=True)) == 1
+
+    result = validate(loop)
+    assert result.valid, result.issues
+
+
+def test_parse_unknown():
+    data = MIXED.replace("005010X221A1", "004010X091A1").replace("ST*999", "ST*998")
+    loop = parse_buffer(data.encode(), load(), Context("~", "*", ":"))
+
+    transactions = loop.find_loops("ST", recursive=True)
+    assert len(transactions) == 3
+    assert transactions[0].schema.segments == []
+    assert transactions[2].schema.segments == []
+    assert len(transactions[1].find_loops("2400", recursive=True)) == 1
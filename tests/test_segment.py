@@ -1,11 +1,13 @@
 # pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
 
+import io
 import re
+from sys import intern
 
 import pytest
 
 from x12.parser.context import Context
-from x12.parser.segment import Segment
+from x12.parser.segment import RawElements, Segment
 
 
 def test_add_elements():
@@ -13,6 +15,93 @@ def test_add_elements():
     segment.add_elements("1*2*3")
 
     assert segment.elements == ["1", "2", "3"]
+    assert segment.add_elements("").elements == []
+
+
+def test_add_raw():
+    segment = Segment(Context("~", "*", ":")).add_raw(b"1*2*\xc3\xa9")
+
+    assert segment.raw == b"1*2*\xc3\xa9"
+    assert segment.elements == ["1", "2", "\u00e9"]
+    assert segment.raw is None
+
+
+def test_raw_elements():
+    tokens = RawElements([b"1", b"2", b"\xc3\xa9"])
+
+    assert len(tokens) == 3
+    assert tokens[0] == "1"
+    assert tokens[1:] == ["2", "\u00e9"]
+    assert "2" in tokens
+
+
+def test_add_elements_lazy():
+    segment = Segment(Context("~", "*", ":")).add_elements("1*2")
+
+    assert segment.raw == "1*2"
+    assert segment.elements == ["1", "2"]
+    assert segment.raw is None
+
+    elements = ["1", "2", "3"]
+    segment.add_elements("1*2*3", elements)
+    assert segment.raw is None
+    assert segment.elements is elements
+
+    segment.elements = ["4"]
+    assert str(segment) == "4~"
+
+
+def test_segment_id():
+    context = Context("~", "*", ":")
+
+    assert Segment(context).segment_id == ""
+    assert Segment(context).add_elements("").segment_id == ""
+    assert Segment(context).add_elements("NM1*1").segment_id == "NM1"
+    assert Segment(context).add_elements("NM1*1").raw == "NM1*1"
+    assert Segment(context).add_raw(b"NM1*1").segment_id == "NM1"
+    assert Segment(context).add_elements("", ["N1", "1"]).segment_id == "N1"
+
+
+def test_value():
+    segment = Segment(Context("~", "*", ":")).add_elements("CLP*1**3")
+
+    assert segment.value(1) == "1"
+    assert segment.value(2) is None
+    assert segment.value(9) is None
+
+    segment.values = ["CLP", 1, None, 3]
+    assert segment.value(3) == 3
+    segment.elements = ["CLP", "4"]
+    assert segment.values is None
+    assert segment.value(1) == "4"
+
+
+def test_composite():
+    segment = Segment(Context("~", "*", ":")).add_elements("SVC*HC:99213:25*50**")
+
+    assert segment.composite(1) == ["HC", "99213", "25"]
+    assert segment.composite(1) is segment.composite(1)
+    assert segment.composite(2) == ["50"]
+    assert segment.composite(3) == []
+    assert segment.composite(9) == []
+
+    segment.elements = ["SVC", "HC:1"]
+    assert segment.composite(1) == ["HC", "1"]
+
+
+def test_repetitions():
+    segment = Segment(Context("~", "*", ":", "^")).add_elements("HI*A^B^C")
+    assert segment.repetitions(1) == ["A", "B", "C"]
+    assert segment.repetitions(1) is segment.repetitions(1)
+
+    segment = Segment(Context("~", "*", ":")).add_elements("HI*A^B^C")
+    assert segment.repetitions(1) == ["A^B^C"]
+
+
+def test_add_elements_interns_segment_id():
+    segment = Segment(Context("~", "*", ":")).add_elements("", ["".join(["SE", "G"])])
+
+    assert segment.elements[0] is intern("SEG")
 
 
 @pytest.mark.parametrize(
@@ -52,6 +141,27 @@ def test_to_xml(segment_line, depth, expected):
     assert segment.to_xml(depth) == re.sub(r"^\n", "", expected)
 
 
+def test_write_xml():
+    segment = Segment(Context("~", "*", ":")).add_elements("PR*a]]>b*")
+
+    fp = io.StringIO()
+    segment.write_xml(fp, 1)
+    assert fp.getvalue() == segment.to_xml(1)
+    assert fp.getvalue() == (
+        "  <PR>\n"
+        "    <PR01><![CDATA[a]]]]><![CDATA[>b]]></PR01>\n"
+        "    <PR02><![CDATA[]]></PR02>\n"
+        "  </PR>\n"
+    )
+
+    fp = io.StringIO()
+    segment.write_xml(fp, 1, False)
+    assert fp.getvalue() == (
+        "<PR><PR01><![CDATA[a]]]]><![CDATA[>b]]></PR01><PR02><![CDATA[]]></PR02></PR>"
+    )
+    assert list(Segment(Context("~", "*", ":")).iter_xml()) == []
+
+
 def test___str__():
     segment = Segment(Context("~", "*", ":"))
     segment.add_elements("1*2*3")
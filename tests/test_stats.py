@@ -0,0 +1,103 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+from unittest.mock import mock_open, patch
+
+from x12.parser.analyze import analyze
+from x12.parser.context import Context
+from x12.parser.parse import parse, parse_buffer
+from x12.parser.stats import Stats
+from x12.schema.schema import Schema, Usage, by_segment, by_segment_element
+
+DATA = "ISA*00~ST*1~NM1*1~LX*1~CLP*1~CLP*2~LX*2~CLP*3~SE*1~IEA*00~"
+
+
+def schema() -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    isa = x12.add_child("ISA", Usage.REQUIRED, by_segment("ISA"))
+    st = isa.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    lx = st.add_child("2000", Usage.REQUIRED, by_segment("LX"))
+    lx.add_child("2100", Usage.REQUIRED, lambda tokens: tokens[:1] == ["CLP"])
+    isa.add_child("SE", Usage.REQUIRED, by_segment_element("SE", 1, ["1"]))
+    x12.add_child("IEA", Usage.REQUIRED, by_segment("IEA"))
+    return x12
+
+
+def test_parse_stats():
+    loops = []
+    segments = []
+    finished = []
+    stats = Stats(
+        2,
+        lambda loop, levels: loops.append((loop.schema.loop_name, levels)),
+        lambda loop, line: segments.append(line),
+        finished.append,
+    )
+    with patch("builtins.open", mock_open(read_data=DATA)):
+        loop = parse("mocked_file", schema(), Context("~", "*", ":"), None, stats)
+
+    assert stats.counters == {"segments": 10, "loops": 9}
+    assert set(stats.timings) == {"io", "tokenize", "build"}
+    assert stats.climbs == {0: 5, 1: 1, 2: 2, 3: 1}
+    assert loops == [
+        ("ISA", 0),
+        ("ST", 0),
+        ("2000", 0),
+        ("2100", 0),
+        ("2100", 1),
+        ("2000", 2),
+        ("2100", 0),
+        ("SE", 3),
+        ("IEA", 2),
+    ]
+    assert segments == DATA.split("~")[:-1]
+    assert finished == [stats]
+    # The loops of the same size are in the document order.
+    assert stats.largest == [(2, ("X12", "ISA", "ST")), (1, ("X12", "ISA"))]
+
+    evaluations = stats.to_dict()["evaluations"]
+    # The custom predicate is evaluated for every segment dispatched under 2000.
+    assert evaluations["X12/ISA/ST/2000/2100"] == 5
+    assert evaluations["X12/ISA/SE"] == 1
+    assert str(loop) == DATA.replace("~", "~\n").strip()
+
+
+def test_parse_buffer_stats():
+    stats = Stats()
+    parse_buffer(DATA.encode(), schema(), Context("~", "*", ":"), None, stats)
+
+    assert stats.counters == {"segments": 10, "loops": 9}
+    assert set(stats.timings) == {"tokenize", "build"}
+    assert "climbs 3: 1" in str(stats)
+
+
+def test_analyze_stats():
+    with patch("builtins.open", mock_open(read_data=DATA)):
+        loop = parse("mocked_file", schema(), Context("~", "*", ":"))
+
+    stats = Stats()
+    assert analyze(loop, stats) == analyze(loop)
+    assert stats.counters == {"expected": 10, "unexpected": 10}
+    assert set(stats.timings) == {"analyze"}
+
+
+def test_batches():
+    stats = Stats()
+    inner = stats.timed("inner", range(5))
+    assert list(stats.batches("outer", inner, "inner", 2)) == [[0, 1], [2, 3], [4]]
+    assert set(stats.timings) == {"inner", "outer"}
+
+
+def test_parse_stats_deep():
+    # The top loops are beyond the nearest levels of the ancestors table.
+    x12 = Schema("X12", Usage.REQUIRED)
+    node = x12
+    for depth in range(40):
+        node = node.add_child(f"L{depth}", Usage.REQUIRED, by_segment(f"S{depth}"))
+    data = "".join(f"S{depth}*1~" for depth in range(40)) + "S0*2~S1*2~"
+
+    stats = Stats()
+    loop = parse_buffer(data.encode(), x12, Context("~", "*", ":"), None, stats)
+    assert str(loop) == str(parse_buffer(data.encode(), x12, Context("~", "*", ":")))
+    assert [len(child.loops) for child in loop.loops] == [1, 1]
+    assert stats.climbs == {0: 41, 40: 1}
+    assert stats.to_dict()["evaluations"]["X12/L0"] == 2
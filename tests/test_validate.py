@@ -0,0 +1,124 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+from x12.parser.context import Context
+from x12.parser.loop import Loop
+from x12.parser.validate import Issue, Occurrence, validate, walk
+from x12.schema.schema import Schema
+from x12.schema.schema import Segment as SegmentSchema
+from x12.schema.schema import Usage, by_segment
+
+
+def schema() -> Schema:
+    root = Schema("X12", Usage.REQUIRED)
+    root.add_child("LOOP_1", Usage.REQUIRED, by_segment("SG1")).with_segments(
+        SegmentSchema("SG1", Usage.REQUIRED, by_segment("SG1")),
+        SegmentSchema("SG2", Usage.OPTIONAL, by_segment("SG2")),
+        SegmentSchema("SG3", Usage.REQUIRED, lambda tokens: tokens[0] == "SG3"),
+    )
+    root.add_child("LOOP_2", Usage.REQUIRED, by_segment("SG4"))
+    root.add_child("LOOP_3", Usage.OPTIONAL, by_segment("SG5"))
+    return root
+
+
+def loop() -> Loop:
+    root = schema()
+    res = Loop(root, Context("~", "*", ":"))
+    res.add_loop(root.children[0]).add_segment("BOGUS*0").add_segment("SG2*0")
+    res.add_loop(root.children[0]).add_segment("SG1*0").add_segment("SG3*0")
+    return res
+
+
+def test_walk():
+    parsed = loop()
+    first, second = parsed.loops
+    root = parsed.schema
+
+    assert list(walk(parsed)) == [
+        (Occurrence.EXPECTED, parsed, -1, parsed),
+        (Occurrence.EXPECTED, first, -1, first),
+        (Occurrence.UNEXPECTED, first, 0, first.segments[0]),
+        (Occurrence.MISSING, first, 1, root.children[0].segments[0]),
+        (Occurrence.EXPECTED, first, 1, first.segments[1]),
+        (Occurrence.MISSING, first, 2, root.children[0].segments[2]),
+        (Occurrence.EXPECTED, second, -1, second),
+        (Occurrence.EXPECTED, second, 0, second.segments[0]),
+        (Occurrence.EXPECTED, second, 1, second.segments[1]),
+        (Occurrence.MISSING, parsed, 2, root.children[1]),
+    ]
+    assert [probe[0] for probe in walk(parsed, False)] == [
+        Occurrence.UNEXPECTED,
+        Occurrence.MISSING,
+        Occurrence.MISSING,
+        Occurrence.MISSING,
+    ]
+
+
+def test_validate():
+    issues = [
+        Issue(Occurrence.UNEXPECTED, ("X12", "LOOP_1"), 0, "BOGUS"),
+        Issue(Occurrence.MISSING, ("X12", "LOOP_1"), 1, "SG1"),
+        Issue(Occurrence.MISSING, ("X12", "LOOP_1"), 2, "SG3"),
+        Issue(Occurrence.MISSING, ("X12",), 2, "LOOP_2", True),
+    ]
+
+    result = validate(loop())
+    assert result.issues == issues
+    assert result.counts == {Occurrence.MISSING: 3, Occurrence.UNEXPECTED: 1}
+    assert not result.valid
+    assert not result.truncated
+
+    result = validate(loop().loops[0])
+    assert result.issues == [
+        Issue(issue.kind, issue.path[1:], issue.position, issue.name)
+        for issue in issues[:3]
+    ]
+
+    result = validate(loop(), max_issues=2)
+    assert result.issues == issues[:2]
+    assert result.truncated
+
+    result = validate(loop(), max_issues=4)
+    assert result.issues == issues
+    assert not result.truncated
+
+    result = validate(loop(), fail_fast=True)
+    assert result.issues == issues[:1]
+    assert result.truncated
+
+    result = validate(loop(), counts_only=True)
+    assert result.issues == []
+    assert result.counts == {Occurrence.MISSING: 3, Occurrence.UNEXPECTED: 1}
+
+    assert validate(loop().loops[1]).valid
+    assert repr(issues[3]) == "Issue(MISSING, X12, 2, LOOP_2, loop)"
+
+
+def test_validate_repeating():
+    root = Schema("X12", Usage.REQUIRED).with_segments(
+        SegmentSchema("SG1", Usage.REQUIRED, by_segment("SG1"), False),
+        SegmentSchema("SG2", Usage.REQUIRED, by_segment("SG2"), False),
+    )
+    parsed = Loop(root, Context("~", "*", ":"))
+    parsed.add_segment("SG1*0").add_segment("SG1*1").add_segment("SG2*0")
+
+    assert validate(parsed).valid
+    assert validate(Loop(root, Context("~", "*", ":")).add_segment("SG2*0")).issues == [
+        Issue(Occurrence.MISSING, ("X12",), 0, "SG1")
+    ]
+
+
+def test_walk_alternative_loops():
+    root = Schema("X12", Usage.REQUIRED)
+    root.add_child("GS", Usage.REQUIRED, lambda tokens: tokens[1:2] == ["A"])
+    root.add_child("GS", Usage.REQUIRED, by_segment("GS"))
+    root.add_child("GE", Usage.REQUIRED, by_segment("GE"))
+    parsed = Loop(root, Context("~", "*", ":"))
+    parsed.add_loop(root.children[1]).add_segment("GS*B")
+
+    assert [probe[3] for probe in walk(parsed) if isinstance(probe[3], Loop)] == [
+        parsed,
+        parsed.loops[0],
+    ]
+    assert [issue for issue in validate(parsed).issues if issue.is_loop] == [
+        Issue(Occurrence.MISSING, ("X12",), 1, "GE", True)
+    ]
@@ -0,0 +1,59 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import sys
+
+from x12.common.walk import postorder, preorder
+from x12.parser.context import Context
+from x12.parser.loop import Loop
+from x12.schema.definition import from_definition, to_definition
+from x12.schema.schema import Schema, Usage, by_segment
+
+TREE = ("A", [("B", [("D", [])]), ("C", [])])
+
+
+def children(node):
+    return node[1]
+
+
+def test_preorder():
+    assert [(node[0], depth) for node, depth in preorder(TREE, children)] == [
+        ("A", 0),
+        ("B", 1),
+        ("D", 2),
+        ("C", 1),
+    ]
+    assert [node[0] for node, _ in preorder(("A", []), children)] == ["A"]
+
+
+def test_postorder():
+    assert [(node[0], depth) for node, depth in postorder(TREE, children)] == [
+        ("D", 2),
+        ("B", 1),
+        ("C", 1),
+        ("A", 0),
+    ]
+
+
+def deep_schema(depth: int) -> Schema:
+    schema = node = Schema("0", Usage.REQUIRED, by_segment("HL"))
+    for level in range(1, depth):
+        node = node.add_child(str(level), Usage.REQUIRED, by_segment("HL"))
+    return schema
+
+
+def test_deep_tree():
+    depth = sys.getrecursionlimit() * 2
+    schema = deep_schema(depth)
+    loop = node = Loop(schema, Context("~", "*", ":"))
+    for child_schema, level in schema.walk():
+        if level:
+            node = node.add_loop(child_schema)
+        node.add_segment(f"HL*{level}")
+
+    assert str(loop).count("\n") == depth - 1
+    assert loop.to_debug().count("\n") == depth * 2 - 1
+    assert len(loop.find_segments("HL", True)) == depth
+    assert [level for _, level in loop.walk(True)][:2] == [depth - 1, depth - 2]
+
+    assert str(schema).count("+--") == depth
+    assert str(from_definition(to_definition(schema))) == str(schema)
@@ -0,0 +1,74 @@
+# pylint: disable=locally-disabled, missing-module-docstring, missing-function-docstring
+
+import io
+
+from x12.parser.context import Context
+from x12.parser.parse import parse_buffer, parse_content
+from x12.parser.write import Writer, encode_segment, to_bytes, write
+from x12.schema.schema import Schema, Usage, by_segment
+
+DATA = (
+    "ISA*00~GS*HP*1~"
+    "ST*835*0001~BPR*é~SE*9*0001~"
+    "ST*835*0002~BPR*1~CLP*1~SE*4*0002~"
+    "GE*7*1~IEA*3*1~"
+)
+
+
+def schema() -> Schema:
+    x12 = Schema("X12", Usage.REQUIRED)
+    gs = x12.add_child("GS", Usage.REQUIRED, by_segment("GS"))
+    gs.add_child("ST", Usage.REQUIRED, by_segment("ST"))
+    return x12
+
+
+def test_write():
+    loop = parse_buffer(DATA.encode(), schema(), Context("~", "*", ":"))
+    fp = io.BytesIO()
+    assert write(fp, loop, False) == 11
+    assert fp.getvalue() == DATA.encode()
+
+    assert to_bytes(loop, line_break="\n").decode().split("\n") == [
+        "ISA*00~",
+        "GS*HP*1~",
+        "ST*835*0001~",
+        "BPR*é~",
+        "SE*3*0001~",
+        "ST*835*0002~",
+        "BPR*1~",
+        "CLP*1~",
+        "SE*4*0002~",
+        "GE*2*1~",
+        "IEA*1*1~",
+        "",
+    ]
+
+
+def test_write_raw():
+    loop = parse_buffer(DATA.encode(), schema(), Context("~", "*", ":"))
+    segments = loop.loops[0].loops[1].segments
+    segments[1].elements = ["BPR", "2"]
+
+    assert segments[2].raw == b"CLP*1"
+    assert to_bytes(segments[:4]) == b"ST*835*0002~BPR*2~CLP*1~SE*4*0002~"
+    assert segments[2].raw == b"CLP*1"
+
+
+def test_writer_buffer():
+    loop = parse_content(DATA, schema(), Context("~", "*", ":"))
+    fp = io.BytesIO()
+    writer = Writer(fp, buffer_size=16)
+    writer.write_loop(loop)
+    assert 0 < len(fp.getvalue()) < len(DATA)
+    writer.flush()
+    assert writer.written == 11
+    assert len(fp.getvalue()) == len(DATA.encode())
+
+
+def test_encode_segment():
+    loop = parse_content("SE~SE*1*2~", schema(), Context("~", "*", ":"))
+    assert [encode_segment(segment, 1) for segment in loop.segments] == [
+        b"SE*1",
+        b"SE*1*2",
+    ]
+    assert encode_segment(loop.segments[1], 3) == b"SE*3*2"
@@ -0,0 +1,47 @@
+"""
+Tree walkers with an explicit stack (i.e. without recursion), so the deep
+trees (e.g. a deep HL hierarchy) are walked regardless of the recursion limit
+and with the stack bounded by the tree depth.
+"""
+
+from typing import Callable, Iterable, Iterator, TypeVar
+
+Node = TypeVar("Node")
+
+
+def preorder(
+    root: Node, children: Callable[[Node], Iterable[Node]]
+) -> Iterator[tuple[Node, int]]:
+    """
+    Walk the tree in the pre-order (i.e. the document order), yielding
+    the node and its depth relative to the root. The children are listed
+    by the children function once the node is entered.
+    """
+
+    yield (root, 0)
+    stack = [iter(children(root))]
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            continue
+        yield (node, len(stack))
+        stack.append(iter(children(node)))
+
+
+def postorder(
+    root: Node, children: Callable[[Node], Iterable[Node]]
+) -> Iterator[tuple[Node, int]]:
+    """
+    Walk the tree in the post-order (i.e. the children before their parent),
+    yielding the node and its depth relative to the root.
+    """
+
+    stack = [(root, iter(children(root)))]
+    while stack:
+        child = next(stack[-1][1], None)
+        if child is None:
+            node, _ = stack.pop()
+            yield (node, len(stack))
+            continue
+        stack.append((child, iter(children(child))))
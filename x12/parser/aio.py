@@ -0,0 +1,197 @@
+"""
+Asyncio X12 parser, parsing an async byte stream (e.g. an asyncio.StreamReader
+or an async iterable of bytes chunks) incrementally, as the chunks arrive.
+"""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Protocol
+
+from x12.parser.context import ENCODING, ISA_LENGTH, Context, detect_context
+from x12.parser.loop import Loop
+from x12.parser.parse import CHUNK_SIZE, Builder, LoopEmitter, SegmentSplitter
+from x12.parser.validate import Validator
+from x12.schema.schema import Schema
+
+# Number of the segments of a chunk, from which the chunk is built in the executor.
+OFFLOAD_SEGMENTS = 256
+
+
+class AsyncReader(Protocol):
+    # pylint: disable=too-few-public-methods
+    """Async byte stream reader, e.g. asyncio.StreamReader."""
+
+    async def read(self, n: int = -1) -> bytes:
+        """Read up to n bytes, an empty bytes at the end of the stream."""
+
+
+async def parse_async(
+    stream: AsyncReader | AsyncIterable[bytes],
+    x12: Schema,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    executor: Executor | None = None,
+    offload_segments: int = OFFLOAD_SEGMENTS,
+    chunk_size: int = CHUNK_SIZE,
+) -> Loop:
+    """
+    Parse x12 content of the async byte stream with given schema, as the chunks
+    arrive. A chunk of at least the offload number of segments is built
+    in the executor (the default loop executor if not given), meanwhile
+    the next chunk is read, otherwise it is built in the event loop.
+    At most one chunk per parsing is built at once, so the concurrency
+    is bounded by the executor workers. The executor has to be a thread pool,
+    as the tree is built in place (see check_executor).
+    """
+
+    check_executor(executor)
+    chunks = read_stream(stream, chunk_size)
+    context, head = await resolve_stream_context(chunks, context)
+    builder = Builder(x12, context, validator)
+    async for _ in process_chunks(
+        chunks, head, context, partial(build, builder), executor, offload_segments
+    ):
+        pass
+    return builder.close()
+
+
+async def aiter_parse(
+    stream: AsyncReader | AsyncIterable[bytes],
+    x12: Schema,
+    loop_name: str,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    reject_invalid: bool = False,
+    executor: Executor | None = None,
+    offload_segments: int = OFFLOAD_SEGMENTS,
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[Loop]:
+    """
+    Parse x12 content of the async byte stream with given schema, yielding
+    each loop of given loop schema name (e.g. ST transaction) as soon as
+    it is closed, see parse_async and iter_parse.
+    """
+
+    check_executor(executor)
+    chunks = read_stream(stream, chunk_size)
+    context, head = await resolve_stream_context(chunks, context)
+    emitter = LoopEmitter(Builder(x12, context, validator), loop_name, reject_invalid)
+    async for loops in process_chunks(
+        chunks, head, context, partial(emit, emitter), executor, offload_segments
+    ):
+        for loop in loops:
+            yield loop
+    for loop in emitter.close():
+        yield loop
+
+
+async def read_stream(
+    stream: AsyncReader | AsyncIterable[bytes], chunk_size: int = CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Read the async byte stream in chunks."""
+
+    if hasattr(stream, "read"):
+        while True:
+            chunk = await stream.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        async for chunk in stream:
+            if chunk:
+                yield bytes(chunk)
+
+
+async def resolve_stream_context(
+    chunks: AsyncIterator[bytes], context: Context | None
+) -> tuple[Context, bytes]:
+    """
+    Resolve the context of the x12 content chunks. If not given, it is detected
+    from the ISA header at the beginning of the content, falling back to
+    the standard separators. Returns the context and the content read meanwhile.
+    """
+
+    if context:
+        return (context, b"")
+
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= ISA_LENGTH:
+            break
+
+    header = head[:ISA_LENGTH].decode(ENCODING, errors="ignore")
+    return (detect_context(header) or Context("~", "*", ":"), head)
+
+
+async def process_chunks(
+    chunks: AsyncIterator[bytes],
+    head: bytes,
+    context: Context,
+    handle: Callable[[list[bytes]], Any],
+    executor: Executor | None = None,
+    offload_segments: int = OFFLOAD_SEGMENTS,
+) -> AsyncIterator[Any]:
+    """
+    Split the content chunks (preceded by the head) into the raw segment lines,
+    handle the lines of each chunk in order, yielding the handle results.
+    The lines are handled in the executor, if at least the offload number,
+    while the next chunk is read. The executor has to be a thread pool,
+    see check_executor.
+    """
+
+    check_executor(executor)
+    loop = asyncio.get_running_loop()
+    splitter = SegmentSplitter(context, True)
+
+    async def batches() -> AsyncIterator[list[bytes]]:
+        if head:
+            yield splitter.split(head)
+        async for chunk in chunks:
+            yield splitter.split(chunk)
+        yield splitter.close()
+
+    pending: asyncio.Future | None = None
+    async for lines in batches():
+        if pending is not None:
+            yield await pending
+            pending = None
+        if len(lines) >= offload_segments:
+            pending = loop.run_in_executor(executor, handle, lines)
+        elif lines:
+            yield handle(lines)
+
+    if pending is not None:
+        yield await pending
+
+
+def check_executor(executor: Executor | None) -> None:
+    """
+    Check the executor is a thread pool (or the default loop executor),
+    as the handled chunks mutate the builder, the changes made in another
+    process (e.g. by a process pool) would be lost.
+    """
+
+    if executor is not None and not isinstance(executor, ThreadPoolExecutor):
+        raise TypeError(
+            f"executor has to be a ThreadPoolExecutor, not {type(executor).__name__}"
+        )
+
+
+def build(builder: Builder, lines: list[bytes]) -> None:
+    """Add the raw segment lines into the tree."""
+
+    for line in lines:
+        builder.add_raw(line)
+
+
+def emit(emitter: LoopEmitter, lines: list[bytes]) -> list[Loop]:
+    """Add the raw segment lines into the tree, returns the closed loops."""
+
+    res = []
+    for line in lines:
+        loop = emitter.add(line)
+        if loop is not None:
+            res.append(loop)
+    return res
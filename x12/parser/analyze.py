@@ -1,14 +1,15 @@
 """Helper module to analyze the parsed x12."""
 
-from enum import Enum
-from typing import Callable, Tuple
+from time import perf_counter
+from typing import Callable, Iterable, Iterator, Tuple
 
 from x12.common.colors import color_cyan, color_green, color_red, color_yellow
 from x12.parser.loop import Loop
 from x12.parser.segment import Segment
+from x12.parser.stats import Stats
+from x12.parser.validate import Occurrence, Probe, walk
 from x12.schema.schema import Schema
 from x12.schema.schema import Segment as SegmentSchema
-from x12.schema.schema import Usage
 
 
 def find_matching_segment_schema(
@@ -16,19 +17,16 @@ def find_matching_segment_schema(
 ) -> Tuple[int, Segment] | None:
     """Find position and matching segment schema."""
 
-    for index, segment_schema in enumerate(schema.segments[offset:], offset):
-        if segment_schema.matches(segment.elements):
-            return (index, segment_schema)
+    schema.compile()
+    return schema.segments_table.find(segment.elements, offset)
 
-    return None
 
+def print_segment(segment: Segment, highlight: Callable[[str], str]) -> str:
+    """Print the segment line with highlighted segment id."""
 
-class Occurrence(Enum):
-    """Loop/segment occurrence in the parsed x12 loop."""
-
-    EXPECTED = 0
-    UNEXPECTED = 1
-    MISSING = 2
+    separator = segment.context.element_separator
+    elements = segment.elements
+    return f"{highlight(elements[0])}{separator}" + separator.join(elements[1:])
 
 
 class SegmentProbe:
@@ -43,14 +41,6 @@ class SegmentProbe:
         self.schema = subject if isinstance(subject, SegmentSchema) else None
 
     def __str__(self) -> str:
-        def print_segment(
-            segment: Segment, highlight: Callable[[str], str] = lambda x: x
-        ) -> str:
-            separator = segment.context.element_separator
-            return f"{highlight(segment.elements[0])}{separator}" + separator.join(
-                element for element in segment.elements[1:]
-            )
-
         if self.occurrence == Occurrence.EXPECTED:
             return print_segment(self.segment, color_green)
         if self.occurrence == Occurrence.MISSING:
@@ -59,51 +49,43 @@ class SegmentProbe:
         return print_segment(self.segment, color_yellow)
 
 
-def analyze(loop: Loop) -> str:
+def analyze(loop: Loop, stats: Stats | None = None) -> str:
     """
     Analyze the parsed loop to determine expected,
     missing and unexpected segments/loops.
+    If the stats are given, the analysis is instrumented (see x12.parser.stats),
+    i.e. the occurrences are counted and the analysis is timed.
     """
 
-    def traverse(loop: Loop, expected: bool = True):
-        """Traverse recursively the loop."""
-
-        highlight = color_cyan if expected else color_red
-        res = f"{'  '*loop.depth}<{highlight(loop.schema.loop_name)}>"
-
-        index = 0
-        segment_res: list(SegmentProbe) = []
-        for segment in loop.segments:
-            found = find_matching_segment_schema(segment, loop.schema, index)
-            if found:
-                at_index, segment_schema = found
-                for missing_schema in loop.schema.segments[index:at_index]:
-                    if missing_schema.usage == Usage.REQUIRED:
-                        segment_res.append(
-                            SegmentProbe(Occurrence.MISSING, missing_schema)
-                        )
-
-                segment_res.append(SegmentProbe(Occurrence.EXPECTED, segment))
-                index = at_index + (1 if segment_schema.unique else 0)
-            else:
-                segment_res.append(SegmentProbe(Occurrence.UNEXPECTED, segment))
-
-        segment_res += [
-            SegmentProbe(Occurrence.MISSING, segment_schema)
-            for segment_schema in loop.schema.segments[index:]
-            if segment_schema.usage == Usage.REQUIRED
-        ]
-
-        for probe in segment_res:
-            res += "\n" + "  " * (loop.depth + 1) + str(probe)
-
-        for schema in loop.schema.children:
-            loops = loop.find_loops(schema.loop_name)
-            for child in loops:
-                res += "\n" + traverse(child, True)
-            if len(loops) == 0 and schema.usage == Usage.REQUIRED:
-                res += "\n" + f"{'  '*(loop.depth+1)}<{color_red(schema.loop_name)}>"
-
-        return res
-
-    return traverse(loop)
+    if stats is None:
+        return render(walk(loop))
+
+    start = perf_counter()
+    res = render(count_occurrences(walk(loop), stats))
+    stats.time("analyze", perf_counter() - start)
+    stats.finish()
+    return res
+
+
+def render(probes: Iterable[Probe]) -> str:
+    """Render the loop/segment occurrences."""
+
+    res = []
+    for occurrence, parent, _, subject in probes:
+        if isinstance(subject, Loop):
+            res.append(f"{'  '*subject.depth}<{color_cyan(subject.schema.loop_name)}>")
+        elif isinstance(subject, Schema):
+            res.append(f"{'  '*(parent.depth+1)}<{color_red(subject.loop_name)}>")
+        else:
+            res.append(
+                "  " * (parent.depth + 1) + str(SegmentProbe(occurrence, subject))
+            )
+    return "\n".join(res)
+
+
+def count_occurrences(probes: Iterable[Probe], stats: Stats) -> Iterator[Probe]:
+    """Count the occurrences by the kind (e.g. expected), passing them through."""
+
+    for probe in probes:
+        stats.count(probe[0].name.lower())
+        yield probe
@@ -0,0 +1,330 @@
+"""X12 batch parser, parsing multiple files in parallel."""
+
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Iterator
+
+from x12.parser.context import ENCODING, Context
+from x12.parser.loop import Loop
+from x12.parser.parse import (
+    Builder,
+    map_file,
+    parse_mmap,
+    resolve_buffer_context,
+    split_raw_segments,
+)
+from x12.parser.segment import RawElements
+from x12.schema.schema import Schema
+
+# Loop schema built in the worker process by the schema factory.
+WORKER_SCHEMA: Schema | None = None
+
+
+class Result:
+    # pylint: disable=too-few-public-methods
+    """Parse result of a single file of the batch."""
+
+    __slots__ = ("file_path", "value", "error")
+
+    def __init__(
+        self, file_path: str, value: Any = None, error: Exception | None = None
+    ) -> None:
+        self.file_path = file_path
+        self.value = value
+        self.error = error
+
+
+def parse_many(
+    file_paths: Iterable[str],
+    schema_factory: Callable[[], Schema],
+    workers: int | None = None,
+    context: Context | None = None,
+    transform: Callable[[Loop], Any] | None = None,
+) -> Iterator[Result]:
+    """
+    Parse x12 files in parallel in a pool of worker processes, yielding
+    the results in the completion order. A file failed to parse is reported
+    by the result error, without interrupting the batch, as well as a file
+    whose result failed to be sent back from the worker process (e.g.
+    an unpicklable transform value) or a broken worker process pool.
+
+    The schema is built once per worker process by the schema factory,
+    so the schema factory (and the transform) must be picklable, i.e. module
+    level functions. When the transform is given, it is applied to the parsed
+    loop in the worker process and its return value is the result value,
+    otherwise the result value is the parsed loop, linked to the schema
+    built by the schema factory in this process.
+    """
+
+    schema = None if transform else schema_factory()
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(schema_factory,)
+    ) as executor:
+        futures = {
+            executor.submit(parse_file, file_path, context, transform): file_path
+            for file_path in file_paths
+        }
+        for future in as_completed(futures):
+            # The result could fail to be sent back (e.g. an unpicklable
+            # transform value) or rebuilt, or the worker process could die.
+            try:
+                result = future.result()
+                if schema and result.value:
+                    result.value = unpack(result.value, schema)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                result = Result(futures[future], error=error)
+            yield result
+
+
+def parse_parallel(
+    file_path: str,
+    schema_factory: Callable[[], Schema],
+    workers: int | None = None,
+    context: Context | None = None,
+    transactions: int = 64,
+) -> Loop:
+    """
+    Parse a x12 file, splitting it by the ST..SE transaction set boundaries
+    and parsing the transaction sets in parallel in a pool of worker processes.
+    The envelope segments are parsed in this process and the transaction set
+    loops are stitched back under the envelope loops, at the same position
+    as by the serial parse.
+
+    The transaction sets are expected to be self-contained, i.e. no segment
+    within a transaction set matches a loop outside of the loop the transaction
+    set loop is added to, nor an envelope segment matches a loop within
+    a transaction set. The envelope segments following a transaction set,
+    not starting a loop (e.g. the trailers not modeled as loops), are added
+    to the last loop of the parsed transaction set, same as by the serial parse.
+    Consecutive transaction sets are parsed in tasks
+    of up to given number of transaction sets. The schema factory has
+    to be picklable, i.e. a module level function.
+    """
+
+    schema = schema_factory()
+    paths = schema_paths(schema)
+    tasks: list[Task] = []
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(schema_factory,)
+    ) as executor, map_file(file_path) as buffer:
+        context = resolve_buffer_context(buffer, context)
+        builder = Builder(schema, context)
+        separator = context.element_separator.encode(ENCODING)
+        start, end = b"ST" + separator, b"SE" + separator
+
+        def submit(task: Task | None):
+            if task and not task.future:
+                task.future = executor.submit(
+                    parse_transactions,
+                    paths[task.loop.schema],
+                    task.loop.depth,
+                    context,
+                    task.lines,
+                )
+
+        lines = split_raw_segments(buffer, context)
+        for line in lines:
+            task = tasks[-1] if tasks else None
+
+            if not line.startswith(start):
+                submit(task)
+                if task and task.resumed is False:
+                    # The head is the last loop of the parsed transaction sets,
+                    # unless the segment starts a loop outside of them.
+                    tokens = line.split(separator)
+                    if not builder.locate(
+                        RawElements(tokens), tokens[0].decode(ENCODING)
+                    ):
+                        task.trailing.append(line)
+                        continue
+                    task.resumed = True
+                builder.add_raw(line)
+                continue
+
+            # Move the head to the loop, the transaction set loop is added to.
+            tokens = line.split(separator)
+            found = builder.locate(RawElements(tokens), tokens[0].decode(ENCODING))
+            builder.head = found[0] if found else builder.head
+
+            if (
+                not task
+                or task.future
+                or task.trailing
+                or task.loop is not builder.head
+                or task.count >= transactions
+            ):
+                submit(task)
+                task = Task(builder.head)
+                tasks.append(task)
+
+            task.count += 1
+            task.resumed = False
+            task.lines.append(line)
+            for line in lines:
+                task.lines.append(line)
+                if line.startswith(end):
+                    break
+
+        submit(tasks[-1] if tasks else None)
+
+        # Stitch backwards, so the positions of the preceding tasks are kept.
+        for task in reversed(tasks):
+            parsed = unpack(task.future.result(), schema)
+            segments = task.segments
+            task.loop.insert_loops(task.loops, parsed.loops)
+            task.loop.segments[segments:segments] = parsed.segments
+            if task.trailing:
+                head = parsed.loops[-1] if parsed.loops else task.loop
+                while head.loops:
+                    head = head.loops[-1]
+                for line in task.trailing:
+                    head.add_segment(line)
+
+    return builder.root
+
+
+class Task:
+    # pylint: disable=too-few-public-methods
+    """
+    Transaction sets to be parsed in a worker process, added to the loop,
+    along with the following segments added to the last parsed loop (trailing),
+    until a segment starts a loop (resumed).
+    """
+
+    __slots__ = (
+        "loop",
+        "loops",
+        "segments",
+        "count",
+        "lines",
+        "future",
+        "trailing",
+        "resumed",
+    )
+
+    def __init__(self, loop: Loop) -> None:
+        self.loop = loop
+        self.loops = len(loop.loops)
+        self.segments = len(loop.segments)
+        self.count = 0
+        self.lines: list[bytes] = []
+        self.future: Future | None = None
+        self.trailing: list[bytes] = []
+        self.resumed = True
+
+
+def parse_transactions(
+    path: tuple[int, ...], depth: int, context: Context, lines: list[bytes]
+) -> tuple:
+    """
+    Parse transaction sets in the worker process, starting at the loop
+    of the schema of given path, returns the packed loop.
+    """
+
+    schema = WORKER_SCHEMA
+    for index in path:
+        schema = schema.children[index]
+
+    builder = Builder(schema, context)
+    builder.root.depth = depth
+    for line in lines:
+        builder.add_raw(line)
+
+    return pack(builder.root, WORKER_SCHEMA)
+
+
+def init_worker(schema_factory: Callable[[], Schema]):
+    """Build the loop schema of the worker process."""
+
+    global WORKER_SCHEMA  # pylint: disable=global-statement
+    WORKER_SCHEMA = schema_factory()
+
+
+def parse_file(
+    file_path: str, context: Context | None, transform: Callable[[Loop], Any] | None
+) -> Result:
+    """Parse a single file of the batch in the worker process."""
+
+    try:
+        loop = parse_mmap(file_path, WORKER_SCHEMA, context)
+        if transform:
+            return Result(file_path, transform(loop))
+        return Result(file_path, pack(loop, WORKER_SCHEMA))
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        return Result(file_path, error=error)
+
+
+def pack(loop: Loop, schema: Schema) -> tuple:
+    """
+    Pack the loop tree into a compact picklable form: the context, the depth
+    and the loops in the pre-order, each as the path of its schema in the schema
+    tree (i.e. the child indexes from the schema root), the index of its parent
+    loop and its segment lines. So the loop tree could be sent regardless
+    of the schema predicates and without pickling every single object.
+    """
+
+    paths = schema_paths(schema)
+    separator = loop.context.element_separator
+    loops = []
+    numbers: dict[Loop, int] = {}
+    for number, (node, depth) in enumerate(loop.walk()):
+        numbers[node] = number
+        loops.append(
+            (
+                paths[node.schema],
+                numbers[node.parent] if depth else -1,
+                [
+                    (
+                        segment.raw
+                        if segment.raw is not None
+                        else separator.join(segment.elements)
+                    )
+                    for segment in node.segments
+                ],
+            )
+        )
+
+    return (loop.context, loop.depth, loops)
+
+
+def unpack(packed: tuple, schema: Schema) -> Loop:
+    """Rebuild the packed loop tree, linked to the given schema."""
+
+    def resolve(path: tuple[int, ...]) -> Schema:
+        node = schema
+        for index in path:
+            node = node.children[index]
+        return node
+
+    context, depth, packed_loops = packed
+    schemas: dict[tuple[int, ...], Schema] = {}
+    loops: list[Loop] = []
+
+    for path, parent, segments in packed_loops:
+        if path not in schemas:
+            schemas[path] = resolve(path)
+        loop = (
+            loops[parent].add_loop(schemas[path])
+            if parent >= 0
+            else Loop(schemas[path], context)
+        )
+        loop.depth = depth if parent < 0 else loop.depth
+        for segment in segments:
+            loop.add_segment(segment)
+        loops.append(loop)
+
+    return loops[0]
+
+
+def schema_paths(schema: Schema) -> dict[Schema, tuple[int, ...]]:
+    """
+    Collect the paths of the loop schemas in the schema tree,
+    i.e. the child indexes from the schema root.
+    """
+
+    paths = {schema: ()}
+    for node, _ in schema.walk():
+        for index, child in enumerate(node.children):
+            paths[child] = paths[node] + (index,)
+    return paths
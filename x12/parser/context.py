@@ -2,16 +2,55 @@
 
 """X12 context."""
 
+# Encoding of the x12 content.
+ENCODING = "utf-8"
+
+# Length of the fixed-width ISA interchange control header segment.
+ISA_LENGTH = 106
+
 
 class Context:
     """X12 context object."""
 
+    __slots__ = (
+        "segment_separator",
+        "element_separator",
+        "composite_element_separator",
+        "repetition_separator",
+    )
+
     def __init__(
         self,
         segment_separator: str,
         element_separator: str,
         composite_element_separator: str,
+        repetition_separator: str | None = None,
     ) -> None:
         self.segment_separator = segment_separator
         self.element_separator = element_separator
         self.composite_element_separator = composite_element_separator
+        self.repetition_separator = repetition_separator
+
+
+def detect_context(header: str) -> Context | None:
+    """
+    Detect the x12 context from the ISA interchange control header segment
+    at the beginning of the x12 content, i.e. the element separator following
+    the ISA segment ID, the repetition separator (ISA11), the composite element
+    separator (ISA16) and the segment separator following it.
+    Returns None if the content does not start with the ISA segment.
+    """
+
+    if not header.startswith("ISA") or len(header) < 4:
+        return None
+
+    elements = header.split(header[3], 16)
+    if len(elements) < 17 or len(elements[16]) < 2:
+        return None
+
+    # Before version 00402 the ISA11 is the standards identifier, e.g. "U".
+    repetition = elements[11]
+    if len(repetition) != 1 or repetition.isalnum():
+        repetition = None
+
+    return Context(elements[16][1], header[3], elements[16][0], repetition)
@@ -0,0 +1,134 @@
+"""
+Decoding of the segment elements into typed values by the element schemas.
+The elements are decoded in batches by the data type, i.e. all the elements
+of a data type within a loop tree are converted at once.
+"""
+
+from datetime import date, time
+from decimal import Decimal
+from typing import Any, Callable, Iterable
+
+from x12.parser.loop import Loop
+from x12.parser.segment import Segment
+from x12.parser.validate import match_segments
+from x12.schema.schema import DataType
+from x12.schema.schema import Segment as SegmentSchema
+
+# Data types kept as the element strings.
+TEXT_TYPES = frozenset((DataType.AN, DataType.ID))
+
+# Two-digit years (YYMMDD dates) below the pivot are of the 2000s,
+# the others of the 1900s.
+YEAR_PIVOT = 50
+
+
+def full_year(year: int) -> int:
+    """Four-digit year of the two-digit year, by YEAR_PIVOT."""
+
+    return year + (2000 if year < YEAR_PIVOT else 1900)
+
+
+def to_date(value: str) -> date:
+    """Convert CCYYMMDD (or YYMMDD, the century by YEAR_PIVOT) date element."""
+
+    if len(value) == 6:
+        return date(full_year(int(value[:2])), int(value[2:4]), int(value[4:]))
+    if len(value) != 8:
+        raise ValueError(f"invalid date {value}")
+    return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+
+
+def to_time(value: str) -> time:
+    """Convert HHMM[SS[d..]] time element."""
+
+    if len(value) < 4:
+        raise ValueError(f"invalid time {value}")
+    seconds = int(value[4:6]) if len(value) >= 6 else 0
+    micros = int(value[6:12].ljust(6, "0")) if len(value) > 6 else 0
+    return time(int(value[:2]), int(value[2:4]), seconds, micros)
+
+
+def implied_decimal(decimals: int) -> Callable[[str], Decimal]:
+    """Convert numeric element with given number of implied decimals."""
+
+    def convert(value: str) -> Decimal:
+        return Decimal(value).scaleb(-decimals)
+
+    return convert
+
+
+CONVERTERS: dict[DataType, Callable[[str], Any]] = {
+    DataType.R: Decimal,
+    DataType.N0: int,
+    **{
+        DataType[f"N{decimals}"]: implied_decimal(decimals) for decimals in range(1, 10)
+    },
+    DataType.DT: to_date,
+    DataType.TM: to_time,
+}
+
+
+def convert(data_type: DataType, values: list[str]) -> list:
+    """
+    Convert the element values of given data type at once. An empty
+    or invalid value is converted to None.
+    """
+
+    converter = CONVERTERS[data_type]
+    if "" not in values:
+        try:
+            return list(map(converter, values))
+        except (ValueError, ArithmeticError):
+            pass
+
+    # Fall back to converting the values one by one.
+    res = []
+    for value in values:
+        try:
+            res.append(converter(value) if value != "" else None)
+        except (ValueError, ArithmeticError):
+            res.append(None)
+    return res
+
+
+def decode(loop: Loop, recursive: bool = True) -> int:
+    """
+    Decode the elements of the loop segments (and of the child loops
+    if recursive) matching the segment schemas with the element schemas.
+    The typed values are cached on the segments (see Segment.value),
+    the segments decoded already are skipped. Returns the number of
+    the decoded segments.
+    """
+
+    matched: list[tuple[Segment, SegmentSchema]] = []
+    for node, _ in loop.walk() if recursive else [(loop, 0)]:
+        for _, segment, found in match_segments(node):
+            if found and found[1].elements and segment.values is None:
+                matched.append((segment, found[1]))
+
+    decode_segments(matched)
+    return len(matched)
+
+
+def decode_segments(matched: Iterable[tuple[Segment, SegmentSchema]]) -> None:
+    """Decode the segments by the given (matching) segment schemas in batches."""
+
+    # Element positions and values by the data type.
+    batches: dict[DataType, tuple[list[tuple[list, int]], list[str]]] = {}
+    for segment, schema in matched:
+        values = list(segment.elements)
+        segment.values = values
+        for index, element in enumerate(schema.elements[: len(values) - 1], 1):
+            if element.data_type in TEXT_TYPES:
+                continue
+            batch = batches.get(element.data_type)
+            if batch is None:
+                batch = batches[element.data_type] = ([], [])
+            batch[0].append((values, index))
+            batch[1].append(values[index])
+
+    for data_type, (positions, values) in batches.items():
+        for (segment_values, index), value in zip(
+            positions, convert(data_type, values)
+        ):
+            segment_values[index] = value
@@ -0,0 +1,257 @@
+"""
+Columnar export of the parsed x12 loops, e.g. to load the parsed data
+into a data warehouse. Each row is a loop of given loop schema name and
+each column is an element of a segment within the row loop, or within
+one of its parent loops.
+"""
+
+import csv
+from enum import Enum
+from typing import Any, Iterable, TextIO
+
+from x12.parser.decode import YEAR_PIVOT
+from x12.parser.loop import Loop
+
+# Values considered as the missing numeric values in the numeric columns.
+MISSING = ("", None)
+
+
+class FieldType(Enum):
+    """Type of the exported column values."""
+
+    TEXT = "TEXT"
+    # Decimal number, e.g. a monetary amount.
+    NUMBER = "NUMBER"
+    # CCYYMMDD (or YYMMDD) date.
+    DATE = "DATE"
+
+
+class Field:
+    # pylint: disable=too-few-public-methods, too-many-arguments
+    """
+    Exported column, the element at given element index (and optionally
+    the component element at given component index) of the first segment
+    of given segment ID within the loop of given loop schema name.
+    The loop is the row loop or its closest parent loop of the loop name,
+    the row loop if the loop name is not given. The segment could be further
+    filtered by the qualifier values of the element at given qualifier index,
+    e.g. the DTM segment by the date qualifier.
+    """
+
+    __slots__ = (
+        "name",
+        "segment_id",
+        "element_index",
+        "loop_name",
+        "qualifier_index",
+        "qualifier_values",
+        "component_index",
+        "field_type",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        segment_id: str,
+        element_index: int,
+        loop_name: str | None = None,
+        qualifier_index: int | None = None,
+        qualifier_values: Iterable[str] | None = None,
+        component_index: int | None = None,
+        field_type: FieldType = FieldType.TEXT,
+    ) -> None:
+        self.name = name
+        self.segment_id = segment_id
+        self.element_index = element_index
+        self.loop_name = loop_name
+        self.qualifier_index = qualifier_index
+        self.qualifier_values = frozenset(qualifier_values or ())
+        self.component_index = component_index
+        self.field_type = field_type
+
+    def matches(self, elements: list[str]) -> bool:
+        """Check if the segment elements match the field qualifier."""
+
+        if self.qualifier_index is None:
+            return True
+        return (
+            self.qualifier_index < len(elements)
+            and elements[self.qualifier_index] in self.qualifier_values
+        )
+
+    def value(self, elements: list[str], separator: str) -> str | None:
+        """Field value from the segment elements, None if missing."""
+
+        if self.element_index >= len(elements):
+            return None
+        value = elements[self.element_index]
+        if self.component_index is None:
+            return value
+        components = value.split(separator)
+        if self.component_index >= len(components):
+            return None
+        return components[self.component_index]
+
+
+def export(loop: Loop, row_loop: str, fields: list[Field]) -> dict[str, list]:
+    """
+    Export the loops of given loop schema name found within the loop
+    (including the loop itself) into columns, i.e. dict of the field name
+    to the list of the field values, None for a missing value.
+
+    The values are collected in bulk: the segments of each loop are scanned
+    once for all the fields of the loop, and the values of a parent loop are
+    collected only once for all its row loops.
+    """
+
+    # Fields by the loop name and the segment ID, along with the column index.
+    by_loop: dict[str | None, dict[str, list[tuple[int, Field]]]] = {}
+    for index, field in enumerate(fields):
+        by_segment = by_loop.setdefault(field.loop_name, {})
+        by_segment.setdefault(field.segment_id, []).append((index, field))
+
+    columns: list[list] = [[] for _ in fields]
+    cache: dict[Loop, list] = {}
+
+    rows = loop.iter_loops(row_loop, True)
+    if loop.schema.loop_name == row_loop:
+        rows = [loop, *rows]
+
+    for row in rows:
+        values = [None] * len(fields)
+        for loop_name, by_segment in by_loop.items():
+            source = row if loop_name is None else closest_loop(row, loop_name)
+            if source is None:
+                continue
+            if source is row:
+                collect(source, by_segment, values)
+                continue
+            if source not in cache:
+                cache[source] = collect(source, by_segment, [None] * len(fields))
+            for index, value in enumerate(cache[source]):
+                if value is not None:
+                    values[index] = value
+
+        for column, value in zip(columns, values):
+            column.append(value)
+
+    return {field.name: column for field, column in zip(fields, columns)}
+
+
+def closest_loop(loop: Loop, loop_name: str) -> Loop | None:
+    """The loop itself or its closest parent loop of given loop schema name."""
+
+    while loop and loop.schema.loop_name != loop_name:
+        loop = loop.parent
+    return loop
+
+
+def collect(
+    loop: Loop, by_segment: dict[str, list[tuple[int, Field]]], values: list
+) -> list:
+    """Collect the values of the fields from the loop segments."""
+
+    separator = loop.context.composite_element_separator
+    for segment in loop.segments:
+        fields = by_segment.get(segment.segment_id)
+        if not fields:
+            continue
+        elements = segment.elements
+        for index, field in fields:
+            if values[index] is None and field.matches(elements):
+                values[index] = field.value(elements, separator)
+    return values
+
+
+def to_arrays(columns: dict[str, list], fields: list[Field]) -> dict[str, Any]:
+    """
+    Convert the exported columns into NumPy arrays (requires numpy).
+    The number columns are converted into float arrays, the date columns
+    into datetime64[D] arrays, both vectorized, i.e. without converting
+    the values one by one. A missing or invalid value is NaN or NaT,
+    see to_numbers and to_dates. The text columns are converted into object
+    arrays.
+    """
+
+    try:
+        import numpy  # pylint: disable=import-outside-toplevel
+    except ImportError as error:
+        raise ImportError(
+            "numpy is required to export into arrays: pip install numpy"
+        ) from error
+
+    arrays = {}
+    for field in fields:
+        values = columns[field.name]
+        if field.field_type == FieldType.NUMBER:
+            arrays[field.name] = to_numbers(numpy, values)
+        elif field.field_type == FieldType.DATE:
+            arrays[field.name] = to_dates(numpy, values)
+        else:
+            arrays[field.name] = numpy.array(values, dtype=object)
+    return arrays
+
+
+def to_numbers(numpy, values: list) -> Any:
+    """
+    Float array of the number values, NaN for a missing or invalid value.
+    The values are converted one by one only if any is invalid.
+    """
+
+    # The string dtype is sized by the longest value.
+    text = numpy.array(
+        ["nan" if value in MISSING else value for value in values], dtype=str
+    )
+    try:
+        return text.astype(numpy.float64)
+    except ValueError:
+        return numpy.array([to_number(value) for value in text], dtype=numpy.float64)
+
+
+def to_number(value: str) -> float:
+    """Float of the number value, NaN if invalid."""
+
+    try:
+        return float(value)
+    except ValueError:
+        return float("nan")
+
+
+def to_dates(numpy, values: list) -> Any:
+    """
+    Datetime64[D] array of the date values, by the value length: CCYYMMDD
+    or YYMMDD (the century by YEAR_PIVOT). NaT for a missing or invalid
+    value, e.g. of another length, not a number or not a calendar date.
+    """
+
+    # The string dtype is sized by the longest value, so none is truncated.
+    text = numpy.array(["" if value is None else value for value in values], dtype=str)
+    lengths = numpy.char.str_len(text)
+    short = lengths == 6
+    valid = numpy.char.isdigit(text) & (short | (lengths == 8))
+
+    number = numpy.where(valid, text, "19700101").astype(numpy.int64)
+    year = number // 10000
+    year[short] += numpy.where(year[short] < YEAR_PIVOT, 2000, 1900)
+    month = number // 100 % 100
+    day = number % 100
+    valid &= (month >= 1) & (month <= 12) & (day >= 1)
+    month = numpy.where(valid, month, 1)
+    day = numpy.where(valid, day, 1)
+
+    months = (year - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (
+        month - 1
+    ).astype("timedelta64[M]")
+    dates = months.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    # The day overflowing the month (e.g. 20230230) lands in the next month.
+    valid &= dates.astype("datetime64[M]") == months
+    dates[~valid] = numpy.datetime64("NaT")
+    return dates
+
+
+def write_csv(fp: TextIO, columns: dict[str, list]) -> None:
+    """Write the exported columns into a CSV file object, with the header."""
+
+    writer = csv.writer(fp)
+    writer.writerow(columns.keys())
+    writer.writerows(zip(*columns.values()))
@@ -1,6 +1,11 @@
 """X12 Loop."""
 
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+from typing import Iterator, TextIO
+
 from x12.common.colors import color_green
+from x12.common.walk import postorder, preorder
 from x12.parser.context import Context
 from x12.parser.segment import Segment
 from x12.schema.schema import Schema
@@ -9,6 +14,17 @@ from x12.schema.schema import Schema
 class Loop:
     """X12 Loop object."""
 
+    __slots__ = (
+        "schema",
+        "context",
+        "depth",
+        "loops",
+        "segments",
+        "parent",
+        "index",
+        "hierarchy",
+    )
+
     def __init__(self, schema: Schema, context: Context) -> None:
         self.schema = schema
         self.context = context
@@ -16,6 +32,11 @@ class Loop:
         self.loops: list[Loop] = []
         self.segments: list[Segment] = []
         self.parent: Loop = None
+        # Query index shared by all the loops of the tree, created
+        # on the first recursive query (see query_index).
+        self.index: LoopIndex | None = None
+        # HL hierarchy of the transaction set, if linked (see Hierarchy).
+        self.hierarchy: Hierarchy | None = None
 
     def add_loop(self, schema: Schema):
         """Add a child loop of a given x12 loop schema."""
@@ -23,63 +44,342 @@ class Loop:
         child = Loop(schema, self.context)
         child.depth = self.depth + 1
         child.parent = self
+        child.index = index = self.index
+        if index is not None:
+            index.entries = None
         self.loops.append(child)
         return child
 
-    def add_segment(self, segment: str):
-        """Add a segment of a given x12 segment schema."""
+    def insert_loops(self, position: int, loops: list["Loop"]):
+        """Insert child loops (with their subtrees) at given position."""
+
+        for loop in loops:
+            loop.parent = self
+            loop.share_index(self.index)
+        self.loops[position:position] = loops
+        self.invalidate()
+        return self
+
+    def add_segment(self, segment: str | bytes, elements: list[str] | None = None):
+        """
+        Add a segment of a given x12 segment schema, from a segment line
+        (optionally already split into the elements) or a raw (encoded) segment line.
+        """
 
         child = Segment(self.context)
-        child.add_elements(segment)
+        if isinstance(segment, bytes):
+            child.add_raw(segment)
+        else:
+            child.add_elements(segment, elements)
+        if self.index is not None:
+            self.index.entries = None
         self.segments.append(child)
         return self
 
-    def find_loops(self, name: str, recursive: bool = False):
+    def detach(self):
+        """Remove the loop from its parent's loops, the parent link is kept."""
+
+        if self.parent:
+            siblings = self.parent.loops
+            # The detached loop is usually among the last ones, search backwards.
+            for index in range(len(siblings) - 1, -1, -1):
+                if siblings[index] is self:
+                    del siblings[index]
+                    break
+            self.invalidate()
+            self.share_index(LoopIndex())
+        return self
+
+    def invalidate(self):
+        """
+        Invalidate the query index of the loop tree. Needed only when
+        the loops or segments are modified directly, not by the loop methods.
+        """
+
+        if self.index is not None:
+            self.index.entries = None
+        return self
+
+    def share_index(self, index: "LoopIndex | None"):
+        """Link the loop subtree to given query index (None if not created yet)."""
+
+        if index is not None:
+            index.entries = None
+        for loop, _ in self.walk():
+            loop.index = index
+        return self
+
+    def query_index(self) -> "LoopIndex":
+        """Query index of the loop tree, created on the first recursive query."""
+
+        index = self.index
+        if index is None:
+            root = self
+            while root.parent and root.parent.index is None:
+                root = root.parent
+            index = LoopIndex()
+            root.share_index(index)
+        return index
+
+    def walk(self, post: bool = False) -> Iterator[tuple["Loop", int]]:
+        """
+        Walk the loop subtree without recursion, in the pre-order (document
+        order) or the post-order, yielding the loop and its depth relative
+        to this loop.
+        """
+
+        return (postorder if post else preorder)(self, LOOPS)
+
+    def find_loops(self, name: str, recursive: bool = False) -> list["Loop"]:
         """Find child loops by loop schema name."""
 
-        res = []
-        for loop in self.loops:
-            if loop.schema.loop_name == name:
-                res.append(loop)
-            if recursive:
-                res += loop.find_loops(name, recursive)
-        return res
+        if not recursive:
+            return [loop for loop in self.loops if loop.schema.loop_name == name]
+        start, end, loops = self.query_index().find_loops(self, name)
+        return loops[start:end]
 
     def find_segments(self, name: str, recursive: bool = False) -> list[Segment]:
         """Find segments by segment id (name)."""
 
-        res = []
-        for segment in self.segments:
-            if segment.elements[0] == name:
-                res.append(segment)
-        if recursive:
-            for loop in self.loops:
-                res += loop.find_segments(name, recursive)
-        return res
+        if not recursive:
+            return [segment for segment in self.segments if segment.segment_id == name]
+        start, end, segments = self.query_index().find_segments(self, name)
+        return segments[start:end]
+
+    def iter_loops(self, name: str, recursive: bool = False) -> Iterator["Loop"]:
+        """Iterate child loops by loop schema name, without building a list."""
+
+        if not recursive:
+            return (loop for loop in self.loops if loop.schema.loop_name == name)
+        start, end, loops = self.query_index().find_loops(self, name)
+        return (loops[index] for index in range(start, end))
+
+    def iter_segments(self, name: str, recursive: bool = False) -> Iterator[Segment]:
+        """Iterate segments by segment id (name), without building a list."""
+
+        if not recursive:
+            return (segment for segment in self.segments if segment.segment_id == name)
+        start, end, segments = self.query_index().find_segments(self, name)
+        return (segments[index] for index in range(start, end))
 
     def to_xml(self) -> str:
         """Serialize loop into XML."""
 
-        res = f'{"  "*self.depth}<LOOP NAME="{self.schema.loop_name}">\n'
-        res += "".join(segment.to_xml(self.depth + 1) for segment in self.segments)
-        res += "".join(loop.to_xml() for loop in self.loops)
-        res += f"{'  '*self.depth}</LOOP>\n"
-        return res
+        return "".join(self.iter_xml())
+
+    def iter_xml(self, indent: bool = True) -> Iterator[str]:
+        """
+        Serialize loop into XML chunks, so the XML does not have to be held
+        in memory at once. Without the indentation, the XML is compact,
+        i.e. without the indentation and the line breaks.
+        """
+
+        line_break = "\n" if indent else ""
+        stack: list[tuple[Loop, bool]] = [(self, False)]
+        while stack:
+            loop, closing = stack.pop()
+            prefix = "  " * loop.depth if indent else ""
+            if closing:
+                yield f"{prefix}</LOOP>{line_break}"
+                continue
+
+            yield f'{prefix}<LOOP NAME="{loop.schema.loop_name}">{line_break}'
+            for segment in loop.segments:
+                yield from segment.iter_xml(loop.depth + 1, indent)
+            stack.append((loop, True))
+            stack += ((child, False) for child in reversed(loop.loops))
+
+    def write_xml(self, fp: TextIO, indent: bool = True) -> None:
+        """Serialize loop into XML, written to a text file object chunk by chunk."""
+
+        fp.writelines(self.iter_xml(indent))
 
     def __str__(self) -> str:
-        return "\n".join(
-            [str(segment) for segment in self.segments]
-            + [str(loop) for loop in self.loops]
-        )
+        # The segments and the child loops of a loop are separated by a line-break,
+        # i.e. a child loop is preceded by one, unless the first item of its parent.
+        res = []
+        for loop, depth in self.walk():
+            parent = loop.parent
+            if depth and (parent.segments or parent.loops[0] is not loop):
+                res.append("\n")
+            res.append("\n".join([str(segment) for segment in loop.segments]))
+        return "".join(res)
 
     def to_debug(self) -> str:
         """
         A helper tool to serialize loop with segment lines with highlighted segment id.
         """
 
-        prefix = "  " * self.depth
-        return "\n".join(
-            [f"<{color_green(self.schema.loop_name)}>:"]
-            + [prefix + segment.to_debug() for segment in self.segments]
-            + [loop.to_debug() for loop in self.loops]
-        )
+        res = []
+        for loop, _ in self.walk():
+            prefix = "  " * loop.depth
+            res.append(f"<{color_green(loop.schema.loop_name)}>:")
+            res += [prefix + segment.to_debug() for segment in loop.segments]
+        return "\n".join(res)
+
+
+# Child loops of a loop, see Loop.walk.
+LOOPS = attrgetter("loops")
+
+
+class LoopIndex:
+    """
+    Query index of a loop tree, built on the first recursive query and
+    dropped once the tree is modified. The loops are numbered in the pre-order,
+    so the subtree of a loop is a range of the numbers, and the loops by loop
+    schema name and the segments by segment ID are kept in the document order
+    along with the loop numbers, so a recursive query is a binary search.
+    """
+
+    __slots__ = ("entries",)
+
+    def __init__(self) -> None:
+        # Loop subtree ranges, loops by name and segments by ID.
+        self.entries: tuple[dict, dict, dict] | None = None
+
+    def build(self, loop: Loop) -> tuple[dict, dict, dict]:
+        """Build the index of the loop tree, the loop is part of."""
+
+        root = loop
+        while root.parent and root.parent.index is self:
+            root = root.parent
+
+        ranges: dict[Loop, list[int]] = {}
+        loops: dict[str, tuple[list[int], list[Loop]]] = {}
+        segments: dict[str, tuple[list[int], list[Segment]]] = {}
+
+        for number, (node, _) in enumerate(root.walk()):
+            ranges[node] = [number, number + 1]
+            index_entry(loops, node.schema.loop_name, number, node)
+            for segment in node.segments:
+                index_entry(segments, segment.segment_id, number, segment)
+
+        # The subtree of a loop ends after the subtree of its last descendant,
+        # the descendants are visited first in the reversed pre-order.
+        for node in reversed(ranges):
+            if node is not root:
+                parent = ranges[node.parent]
+                parent[1] = max(parent[1], ranges[node][1])
+
+        self.entries = (ranges, loops, segments)
+        return self.entries
+
+    def lookup(self, loop: Loop) -> tuple[dict, dict, dict]:
+        """Index entries of the loop tree, the loop is part of."""
+
+        entries = self.entries
+        if entries is None:
+            entries = self.build(loop)
+        if loop not in entries[0]:
+            # The loop was removed from the tree directly, index it on its own.
+            loop.share_index(LoopIndex())
+            return loop.index.lookup(loop)
+        return entries
+
+    def find_loops(self, loop: Loop, name: str) -> tuple[int, int, list[Loop]]:
+        """Range of the descendant loops of given name in the found loops."""
+
+        ranges, loops, _ = self.lookup(loop)
+        if name not in loops:
+            return 0, 0, []
+        start, end = ranges[loop]
+        numbers, found = loops[name]
+        return bisect_right(numbers, start), bisect_left(numbers, end), found
+
+    def find_segments(self, loop: Loop, name: str) -> tuple[int, int, list[Segment]]:
+        """Range of the subtree segments of given ID in the found segments."""
+
+        ranges, _, segments = self.lookup(loop)
+        if name not in segments:
+            return 0, 0, []
+        start, end = ranges[loop]
+        numbers, found = segments[name]
+        return bisect_left(numbers, start), bisect_left(numbers, end), found
+
+
+class Hierarchy:
+    """
+    HL hierarchy of a transaction set, linked while parsing (see
+    x12.parser.parse.HierarchyBuilder): the HL loops by the HL ID (HL01)
+    and by the level code (HL03), and the HL parent ID (HL02) of each HL loop,
+    so the HL parent, the HL children and the HL ancestor of a level
+    (e.g. the billing provider of a claim) are dict lookups.
+    The hierarchy is shared by its HL loops and the loop holding
+    the top level HL loops (e.g. the ST transaction), see Loop.hierarchy.
+    """
+
+    __slots__ = ("loops", "levels", "entries", "children")
+
+    def __init__(self) -> None:
+        self.loops: dict[str, Loop] = {}
+        self.levels: dict[str, list[Loop]] = {}
+        # Level code and HL parent loop by the HL loop.
+        self.entries: dict[Loop, tuple[str, Loop | None]] = {}
+        # HL loops by the HL parent loop.
+        self.children: dict[Loop, list[Loop]] = {}
+
+    def add(self, loop: Loop, hl_id: str, parent_id: str, level_code: str) -> None:
+        """
+        Add the HL loop of given HL ID, HL parent ID and level code.
+        The HL parent is resolved by the HL parent ID at once, i.e. it has
+        to precede its HL children (as required by the standard).
+        """
+
+        parent = self.loops.get(parent_id) if parent_id else None
+        loop.hierarchy = self
+        self.loops[hl_id] = loop
+        self.levels.setdefault(level_code, []).append(loop)
+        self.entries[loop] = (level_code, parent)
+        if parent is not None:
+            self.children.setdefault(parent, []).append(loop)
+
+    def find(self, hl_id: str) -> Loop | None:
+        """HL loop of given HL ID (HL01)."""
+
+        return self.loops.get(hl_id)
+
+    def find_level(self, level_code: str) -> list[Loop]:
+        """HL loops of given level code (HL03), in the document order."""
+
+        return self.levels.get(level_code, [])
+
+    def parent(self, loop: Loop) -> Loop | None:
+        """Declared HL parent loop (by HL02) of the HL loop."""
+
+        entry = self.entries.get(loop)
+        return entry[1] if entry else None
+
+    def find_children(self, loop: Loop) -> list[Loop]:
+        """HL loops declaring the HL loop as their HL parent, in the document order."""
+
+        return self.children.get(loop, [])
+
+    def level(self, loop: Loop) -> Loop | None:
+        """HL loop of the loop, i.e. the loop itself or its closest HL ancestor."""
+
+        while loop is not None and loop not in self.entries:
+            loop = loop.parent
+        return loop
+
+    def ancestor(self, loop: Loop, level_code: str) -> Loop | None:
+        """
+        HL loop of given level code (HL03) the loop belongs to, climbing
+        the declared HL parents from the HL loop of the loop, e.g. the billing
+        provider (20) of a claim.
+        """
+
+        node = self.level(loop)
+        while node is not None and self.entries[node][0] != level_code:
+            node = self.parent(node)
+        return node
+
+
+def index_entry(entries: dict[str, tuple[list, list]], key: str, number: int, value):
+    """Add a loop or a segment to the index entries of given key."""
+
+    entry = entries.get(key)
+    if entry is None:
+        entries[key] = ([number], [value])
+    else:
+        entry[0].append(number)
+        entry[1].append(value)
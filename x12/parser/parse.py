@@ -1,19 +1,367 @@
 """X12 file parser."""
 
-from typing import Tuple
+import gzip
+import io
+import mmap
+import os
+import zipfile
+from contextlib import contextmanager
+from itertools import chain
+from time import perf_counter
+from typing import IO, Callable, Iterable, Iterator, Sequence, Tuple
 
-from x12.parser.context import Context
-from x12.parser.loop import Loop
+from x12.parser.context import ENCODING, ISA_LENGTH, Context, detect_context
+from x12.parser.loop import Hierarchy, Loop
+from x12.parser.segment import RawElements
+from x12.parser.stats import Stats, find_counted
+from x12.parser.validate import Validator
 from x12.schema.schema import Schema
 
+# Number of characters read from the source file at once.
+CHUNK_SIZE = 64 * 1024
 
-def parse(file_path: str, x12: Schema, context: Context = Context("~", "*", ":")):
-    """Parse source x12 file with given schema."""
+# Loop names (all the segments kept) or segment IDs to keep by the loop name.
+Projection = Iterable[str] | dict[str, Iterable[str]]
+
+# Leading bytes of the gzip and the zip (local file header) content.
+GZIP_MAGIC = b"\x1f\x8b"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+def parse(
+    file_path: str,
+    x12: Schema,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    stats: Stats | None = None,
+    projection: Projection | None = None,
+    hierarchy: bool = False,
+):
+    """
+    Parse source x12 file with given schema. If the context is not given,
+    it is detected from the ISA header, falling back to the standard separators.
+    If the validator is given, each loop is validated as soon as it is closed,
+    the issues are collected in the validator result.
+    If the stats are given, the parsing is instrumented (see x12.parser.stats).
+    If the projection is given, only the projected segments are kept
+    (see ProjectedBuilder). If linking the hierarchy, the HL loops are
+    attached under their HL parent IDs and indexed (see HierarchyBuilder).
+    """
+
+    return parse_chunks(
+        read_chunks(file_path),
+        x12,
+        context,
+        validator,
+        stats,
+        projection,
+        hierarchy,
+    )
+
+
+def parse_content(
+    content,
+    x12: Schema,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    stats: Stats | None = None,
+    projection: Projection | None = None,
+    hierarchy: bool = False,
+):
+    """
+    Parse in-memory x12 content (str, or a bytes-like buffer, see parse_buffer)
+    with given schema. The content is split in chunks, so it is never copied
+    at once.
+    """
+
+    if isinstance(content, str):
+        return parse_chunks(
+            slice_chunks(content),
+            x12,
+            context,
+            validator,
+            stats,
+            projection,
+            hierarchy,
+        )
+    return parse_buffer(content, x12, context, validator, stats, projection, hierarchy)
+
+
+def parse_stream(
+    stream: IO,
+    x12: Schema,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    stats: Stats | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    projection: Projection | None = None,
+    hierarchy: bool = False,
+):
+    """
+    Parse x12 content of the file object (text or binary, e.g. a socket
+    or an HTTP response body) with given schema, read in chunks.
+    The binary content is parsed as raw segments decoded lazily,
+    decompressed on the fly if gzip or zip (see open_stream).
+    """
+
+    with open_stream(stream) as source:
+        return parse_chunks(
+            read_stream_chunks(source, chunk_size),
+            x12,
+            context,
+            validator,
+            stats,
+            projection,
+            hierarchy,
+        )
+
+
+def parse_chunks(
+    chunks: Iterable[str | bytes],
+    x12: Schema,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    stats: Stats | None = None,
+    projection: Projection | None = None,
+    hierarchy: bool = False,
+):
+    """
+    Parse x12 content chunks with given schema, see parse. The text (str)
+    chunks are parsed as segment lines, the bytes chunks as raw segment lines
+    (see parse_buffer), the chunks source (file, stream, memory) is up to
+    the caller. When instrumented, producing the chunks is the io stage.
+    """
+
+    if stats is not None:
+        chunks = stats.timed("io", chunks)
+    context, chunks = resolve_context(chunks, context)
+    lines = split_segments(chunks, context)
+    builder = create_builder(x12, context, validator, stats, projection, hierarchy)
+
+    first = next(lines, None)
+    if first is not None:
+        add = builder.add_raw if isinstance(first, bytes) else builder.add
+        if stats is None:
+            add(first)
+            for line in lines:
+                add(line)
+        else:
+            builder.feed(chain([first], lines), add, "io")
+    builder.close()
+
+    return builder.root
+
+
+def parse_mmap(
+    file_path: str,
+    x12: Schema,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    stats: Stats | None = None,
+    projection: Projection | None = None,
+    hierarchy: bool = False,
+):
+    """
+    Parse source x12 file with given schema, over the memory-mapped file.
+    The segments are sliced out of the mapped file and decoded lazily.
+    """
+
+    try:
+        with map_file(file_path) as buffer:
+            return parse_buffer(
+                buffer, x12, context, validator, stats, projection, hierarchy
+            )
+    except FileNotFoundError:
+        print(f"unable to find {file_path}")
+        raise
+    except OSError:
+        print(f"failed to read {file_path}")
+        raise
+
+
+def parse_buffer(
+    buffer,
+    x12: Schema,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    stats: Stats | None = None,
+    projection: Projection | None = None,
+    hierarchy: bool = False,
+):
+    """
+    Parse x12 content of a bytes-like buffer (bytes, memoryview, mmap, etc.)
+    with given schema. The segments are sliced out of the buffer and
+    the segment elements are decoded only once accessed. When instrumented,
+    reading the buffer (e.g. the mapped file) is a part of the tokenizing.
+    """
+
+    context = resolve_buffer_context(buffer, context)
+    builder = create_builder(x12, context, validator, stats, projection, hierarchy)
+    if stats is None:
+        for line in split_raw_segments(buffer, context):
+            builder.add_raw(line)
+    else:
+        builder.feed(split_raw_segments(buffer, context), builder.add_raw)
+    builder.close()
+
+    return builder.root
+
+
+def iter_parse(
+    file_path: str,
+    x12: Schema,
+    loop_name: str,
+    context: Context | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    validator: Validator | None = None,
+    reject_invalid: bool = False,
+) -> Iterator[Loop]:
+    """
+    Parse source x12 file with given schema, yielding each loop of given
+    loop schema name (e.g. ST transaction) as soon as it is closed.
+
+    The yielded loops are detached from their parent loop, so the memory
+    depends on the largest yielded loop rather than on the file size.
+
+    If the validator is given, each loop is validated as soon as it is closed.
+    When rejecting the invalid loops, a loop with an issue (within the loop
+    or its child loops) is not yielded, and once an issue is found before
+    the loop is closed, the rest of the loop is skipped (not built nor validated).
+    """
+
+    yield from iter_parse_chunks(
+        read_chunks(file_path, chunk_size),
+        x12,
+        loop_name,
+        context,
+        validator,
+        reject_invalid,
+    )
+
+
+def iter_parse_stream(
+    stream: IO,
+    x12: Schema,
+    loop_name: str,
+    context: Context | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    validator: Validator | None = None,
+    reject_invalid: bool = False,
+) -> Iterator[Loop]:
+    """
+    Parse x12 content of the file object with given schema, yielding each loop
+    of given loop schema name as soon as it is closed, see parse_stream
+    and iter_parse.
+    """
+
+    with open_stream(stream) as source:
+        yield from iter_parse_chunks(
+            read_stream_chunks(source, chunk_size),
+            x12,
+            loop_name,
+            context,
+            validator,
+            reject_invalid,
+        )
+
+
+def iter_parse_chunks(
+    chunks: Iterable[str | bytes],
+    x12: Schema,
+    loop_name: str,
+    context: Context | None = None,
+    validator: Validator | None = None,
+    reject_invalid: bool = False,
+) -> Iterator[Loop]:
+    """
+    Parse x12 content chunks (str or bytes, see parse_chunks) with given schema,
+    yielding each loop of given loop schema name as soon as it is closed,
+    see iter_parse.
+    """
+
+    context, chunks = resolve_context(chunks, context)
+    emitter = LoopEmitter(Builder(x12, context, validator), loop_name, reject_invalid)
+    for line in split_segments(chunks, context):
+        loop = emitter.add(line)
+        if loop is not None:
+            yield loop
+    yield from emitter.close()
+
+
+def is_within(loop: Loop, ancestor: Loop) -> bool:
+    """Is the loop the ancestor loop or within it."""
+
+    while loop is not None and loop.depth >= ancestor.depth:
+        if loop is ancestor:
+            return True
+        loop = loop.parent
+    return False
+
+
+def resolve_context(
+    chunks: Iterable[str | bytes], context: Context | None
+) -> Tuple[Context, Iterator[str | bytes]]:
+    """
+    Resolve the context of the x12 content chunks (str or bytes). If not given,
+    it is detected from the ISA header at the beginning of the content, falling
+    back to the standard separators. Returns the context and the (untouched)
+    chunks.
+    """
+
+    chunks = iter(chunks)
+    if context:
+        return (context, chunks)
+
+    head = None
+    for chunk in chunks:
+        head = chunk if head is None else head + chunk
+        if len(head) >= ISA_LENGTH:
+            break
+    if head is None:
+        return (Context("~", "*", ":"), chunks)
+
+    header = head[:ISA_LENGTH]
+    if not isinstance(header, str):
+        header = bytes(header).decode(ENCODING, errors="ignore")
+    return (
+        detect_context(header) or Context("~", "*", ":"),
+        chain([head], chunks),
+    )
+
+
+def resolve_buffer_context(buffer, context: Context | None) -> Context:
+    """
+    Resolve the context of the x12 content bytes-like buffer. If not given,
+    it is detected from the ISA header at the beginning of the content,
+    falling back to the standard separators.
+    """
+
+    if context:
+        return context
+
+    with memoryview(buffer) as view:
+        header = view[:ISA_LENGTH].tobytes().decode(ENCODING, errors="ignore")
+    return detect_context(header) or Context("~", "*", ":")
+
+
+@contextmanager
+def map_file(file_path: str) -> Iterator[mmap.mmap | bytes]:
+    """Memory-map the source x12 file, an empty file is mapped to empty bytes."""
+
+    with open(file_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def read_chunks(file_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Read source x12 file in fixed-size chunks."""
 
-    content = ""
     try:
         with open(file_path, "r", encoding="utf-8") as file:
-            content = file.read()
+            yield from read_stream_chunks(file, chunk_size)
     except FileNotFoundError:
         print(f"unable to find {file_path}")
         raise
@@ -21,65 +369,663 @@ def parse(file_path: str, x12: Schema, context: Context = Context("~", "*", ":")
         print(f"failed to read {file_path}")
         raise
 
-    # Remove the line-breaks and than split by segment separator to get the lines.
-    lines = content.replace("\r", "").replace("\n", "").split(context.segment_separator)
 
-    root = Loop(x12, context)
-    head = root
-    schema = x12
+def read_stream_chunks(
+    stream: IO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[str | bytes]:
+    """Read the file object (text or binary) in fixed-size chunks."""
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def slice_chunks(content, chunk_size: int = CHUNK_SIZE) -> Iterator[str | bytes]:
+    """
+    Slice the in-memory content (str, or a bytes-like buffer) into fixed-size
+    chunks, the buffer is sliced over a memoryview, so it is not copied at once.
+    """
+
+    if isinstance(content, str):
+        for offset in range(0, len(content), chunk_size):
+            end = offset + chunk_size
+            yield content[offset:end]
+        return
+
+    with memoryview(content) as view:
+        for offset in range(0, len(view), chunk_size):
+            end = offset + chunk_size
+            yield view[offset:end].tobytes()
+
+
+@contextmanager
+def open_stream(stream: IO) -> Iterator[IO]:
+    """
+    Open the x12 content of the file object: a text stream as it is, a binary
+    stream decompressed on the fly if gzip, or the single file of a zip archive
+    (read into memory first, unless the stream is seekable, as the zip
+    directory is at its end). A zip archive of multiple files could be parsed
+    file by file, e.g. by parse_stream(archive.open(name), ...). The stream
+    is told text from binary by what it reads (str or bytes), not by its class.
+    """
+
+    if isinstance(stream.read(0), str):
+        yield stream
+        return
+
+    stream, magic = peek_magic(stream)
+    if magic.startswith(GZIP_MAGIC):
+        with gzip.GzipFile(fileobj=stream, mode="rb") as source:
+            yield source
+    elif magic.startswith(ZIP_MAGIC):
+        if not stream.seekable():
+            stream = io.BytesIO(stream.read())
+        with zipfile.ZipFile(stream) as archive:
+            files = [info for info in archive.infolist() if not info.is_dir()]
+            if len(files) != 1:
+                raise ValueError(
+                    f"expected a single file in the zip archive, found {len(files)}"
+                )
+            with archive.open(files[0]) as source:
+                yield source
+    else:
+        yield stream
+
+
+def peek_magic(stream: IO, size: int = 4) -> Tuple[IO, bytes]:
+    """
+    Peek the leading bytes of the binary stream, without consuming them.
+    Returns the stream (buffered if it can be neither peeked nor sought)
+    and the bytes.
+    """
+
+    if not hasattr(stream, "peek"):
+        if stream.seekable():
+            position = stream.tell()
+            magic = stream.read(size)
+            stream.seek(position)
+            return (stream, magic)
+        stream = io.BufferedReader(stream)
+    return (stream, stream.peek(size)[:size])
+
+
+def split_segments(
+    chunks: Iterable[str | bytes], context: Context
+) -> Iterator[str | bytes]:
+    """
+    Split the x12 content chunks into segment lines, the bytes chunks into raw
+    (encoded) segment lines. The line-breaks are removed (unless used
+    as the segment separator) and the segment separator falling across
+    the chunk boundary is handled by carrying the unfinished line over.
+    """
+
+    splitter = None
+    for chunk in chunks:
+        if splitter is None:
+            splitter = SegmentSplitter(context, not isinstance(chunk, str))
+        yield from splitter.split(chunk)
+
+    if splitter is not None:
+        yield from splitter.close()
+
+
+def split_raw_segments(
+    buffer, context: Context, chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Split the x12 content bytes-like buffer into raw segment lines.
+    The buffer is processed in chunks, so the whole content is never decoded
+    nor copied at once. The line-breaks are removed (unless used
+    as the segment separator).
+    """
+
+    yield from split_segments(slice_chunks(buffer, chunk_size), context)
+
+
+class SegmentSplitter:
+    """
+    Incremental splitter of the x12 content chunks into segment lines, or
+    of the raw (encoded) chunks into raw segment lines, e.g. as the chunks
+    arrive from a stream. The line-breaks are removed (unless used as
+    the segment separator) and the unfinished line is carried over
+    to the next chunk.
+    """
+
+    __slots__ = ("separator", "line_breaks", "tail")
+
+    def __init__(self, context: Context, raw: bool = False) -> None:
+        separator = context.segment_separator
+        line_breaks = [
+            line_break for line_break in ("\r", "\n") if line_break != separator
+        ]
+        if raw:
+            self.separator = separator.encode(ENCODING)
+            self.line_breaks = [line_break.encode() for line_break in line_breaks]
+            self.tail = b""
+        else:
+            self.separator = separator
+            self.line_breaks = line_breaks
+            self.tail = ""
+
+    def split(self, chunk):
+        """Split the chunk, returns the finished segment lines."""
+
+        for line_break in self.line_breaks:
+            chunk = chunk.replace(line_break, self.tail[:0])
+        lines = (self.tail + chunk).split(self.separator)
+        self.tail = lines.pop()
+        return lines
+
+    def close(self):
+        """Finish the splitting, returns the last (unterminated) line if any."""
+
+        tail, self.tail = self.tail, self.tail[:0]
+        return [tail] if tail else []
+
+
+class Builder:
+    """
+    Incremental x12 loop tree builder, fed by segment lines.
+    If the validator is given, each loop is validated as soon as it is closed,
+    i.e. once a segment starts a loop outside of it, or the builder is closed.
+    """
+
+    def __init__(
+        self, x12: Schema, context: Context, validator: Validator | None = None
+    ) -> None:
+        self.root = Loop(x12, context)
+        self.head = self.root
+        self.raw_element_separator = context.element_separator.encode(ENCODING)
+        self.validator = validator
+        # Closed loops found invalid by the validator.
+        self.invalid: list[Loop] = []
+        # Loop being discarded, i.e. its segments are skipped until closed.
+        self.discarding: Loop | None = None
+
+    def add(self, line: str) -> Loop:
+        """Add a segment line into the tree, returns the loop holding it."""
 
-    for line in lines:
         if line.strip() == "":
-            continue
+            return self.head
+
+        tokens = line.split(self.root.context.element_separator)
+        return self.add_tokens(line, tokens, tokens[0])
+
+    def add_raw(self, line: bytes) -> Loop:
+        """
+        Add a raw (encoded) segment line into the tree, returns the loop holding it.
+        Only the segment elements needed to match the loop schemas are decoded.
+        """
+
+        if line.strip() == b"":
+            return self.head
+
+        tokens = line.split(self.raw_element_separator)
+        return self.add_tokens(line, RawElements(tokens), tokens[0].decode(ENCODING))
+
+    def add_tokens(
+        self, line: str | bytes, tokens: Sequence[str], segment_id: str
+    ) -> Loop:
+        """
+        Add a segment line, split into the segment elements (tokens),
+        into the tree, returns the loop holding it.
+        """
+
+        found = self.locate(tokens, segment_id)
+        if found:
+            parent_loop, schema = found
+            if self.validator:
+                self.close_loops(parent_loop)
+            if self.discarding:
+                self.head = self.discard_loop(parent_loop, schema)
+            else:
+                self.head = parent_loop.add_loop(schema)
+
+        if not self.discarding:
+            # The tokens are reused as the segment elements, unless raw (encoded).
+            self.head.add_segment(line, tokens)
+        return self.head
+
+    def close(self) -> Loop:
+        """Close all the open loops, i.e. validate them, returns the root loop."""
 
-        tokens = line.split(context.element_separator)
-        child_schema = find_child_schema(schema, tokens)
+        if self.validator:
+            self.close_loops(None)
+        return self.root
+
+    def close_loops(self, parent_loop: Loop | None):
+        """Validate the loops closed by moving the head to the given parent loop."""
+
+        loop = self.head
+        while loop is not parent_loop and loop is not None:
+            discarded = self.discarding and loop.depth >= self.discarding.depth
+            if not discarded and self.validator.check(loop):
+                self.invalid.append(loop)
+            loop = loop.parent
+
+    def discard(self, loop: Loop):
+        """
+        Discard the loop being built, e.g. a rejected invalid loop. The loop
+        is detached and emptied, and its following segments are skipped
+        (and not validated) until the loop is closed.
+        """
+
+        loop.detach()
+        loop.loops.clear()
+        loop.segments.clear()
+        loop.invalidate()
+        self.discarding = loop
+
+    def discard_loop(self, parent_loop: Loop, schema: Schema) -> Loop:
+        """
+        New loop while discarding, detached from the parent loop within
+        the discarded loop. The discarding ends, once the discarded loop is closed.
+        """
+
+        if parent_loop.depth < self.discarding.depth:
+            self.discarding = None
+            return parent_loop.add_loop(schema)
+        return detached_loop(parent_loop, schema)
+
+    def locate(
+        self, tokens: Sequence[str], segment_id: str
+    ) -> Tuple[Loop, Schema] | None:
+        """
+        Locate the loop to add a new loop of the matching loop schema to,
+        if the given segment (tokens) starts a new loop.
+        """
+
+        child_schema = find_child_schema(self.head.schema, tokens, segment_id)
         if child_schema:
-            schema = child_schema
-            head = head.add_loop(schema)
-            head.add_segment(line)
-            continue
+            return (self.head, child_schema)
+
+        return find_parent_loop_schema(self.head.schema, tokens, self.head, segment_id)
+
+
+class InstrumentedBuilder(Builder):
+    """
+    Builder collecting the stats (see x12.parser.stats): the segments and loops
+    counts, the tree building time, the loop schema predicate evaluations,
+    the histogram of the climbed levels and the largest loops, calling
+    the stats hooks.
+    """
+
+    def __init__(
+        self,
+        x12: Schema,
+        context: Context,
+        stats: Stats,
+        validator: Validator | None = None,
+    ) -> None:
+        super().__init__(x12, context, validator)
+        self.stats = stats
+        # Levels climbed to the parent loop of the last located loop.
+        self.levels = 0
+
+    def feed(
+        self,
+        lines: Iterable[str | bytes],
+        add: Callable[[str | bytes], Loop],
+        nested: str | None = None,
+    ):
+        """
+        Add the segment lines by the add method (add or add_raw), timing
+        the tokenizing (i.e. producing the lines, except the nested stage)
+        and the tree building in batches.
+        """
+
+        stats = self.stats
+        for batch in stats.batches("tokenize", lines, nested):
+            start = perf_counter()
+            for line in batch:
+                add(line)
+            stats.time("build", perf_counter() - start)
+
+    def add_tokens(
+        self, line: str | bytes, tokens: Sequence[str], segment_id: str
+    ) -> Loop:
+        stats = self.stats
+        previous = self.head
+        res = super().add_tokens(line, tokens, segment_id)
+        stats.count("segments")
+        if res is not previous:
+            stats.count("loops")
+            stats.climbs[self.levels] = stats.climbs.get(self.levels, 0) + 1
+            if stats.on_loop:
+                stats.on_loop(res, self.levels)
+        if stats.on_segment:
+            stats.on_segment(res, line)
+        return res
+
+    def close(self) -> Loop:
+        res = super().close()
+        self.stats.collect_largest(self.root)
+        self.stats.finish()
+        return res
+
+    def locate(
+        self, tokens: Sequence[str], segment_id: str
+    ) -> Tuple[Loop, Schema] | None:
+        schema = self.head.schema.compile()
+        evaluations = self.stats.evaluations
+        found = find_counted(schema.children_table, tokens, segment_id, evaluations)
+        if not found:
+            found = find_counted(
+                schema.ancestors_table, tokens, segment_id, evaluations
+            )
+        if not found:
+            return None
+
+        self.levels, node = found
+        loop = self.head
+        for _ in range(self.levels):
+            loop = loop.parent
+            if not loop:
+                return None
+        return (loop, node)
+
+
+class ProjectedBuilder(Builder):
+    """
+    Builder keeping only the projected segments: all the segments of the loops
+    of the projected loop names, or the projected segment IDs by the loop name.
+    The loops are still matched, so the projected loops are found at the same
+    place of the tree, but only the projected loops and their ancestors
+    are kept. A segment outside of the projection is skipped by its segment
+    ID only, i.e. without splitting it into the elements, unless it could
+    start a loop from the current loop (see DispatchTable). The validation
+    is not supported, as the skipped segments would be reported missing.
+    """
+
+    def __init__(self, x12: Schema, context: Context, projection: Projection) -> None:
+        super().__init__(x12, context)
+        if isinstance(projection, dict):
+            self.projection: dict[str, frozenset[str] | None] = {
+                name: frozenset(segment_ids) for name, segment_ids in projection.items()
+            }
+        else:
+            self.projection = {name: None for name in projection}
+        # Segment IDs possibly starting a loop (None if any could, i.e.
+        # a custom loop predicate), the kept segment IDs (None if all)
+        # and whether the loop is kept, by the loop schema.
+        self.plans: dict[
+            Schema, tuple[frozenset[str] | None, frozenset[str] | None, bool]
+        ] = {}
+
+    def add(self, line: str) -> Loop:
+        separator = self.root.context.element_separator
+        end = line.find(separator)
+        segment_id = line if end == -1 else line[:end]
+        # Skipped by the segment ID, see plan (inlined, as called per segment).
+        starts, kept, _ = self.plans.get(self.head.schema) or self.plan(
+            self.head.schema
+        )
+        if (
+            starts is not None
+            and segment_id not in starts
+            and kept is not None
+            and segment_id not in kept
+        ) or line.strip() == "":
+            return self.head
+        return self.add_tokens(line, line.split(separator), segment_id)
+
+    def add_raw(self, line: bytes) -> Loop:
+        separator = self.raw_element_separator
+        end = line.find(separator)
+        segment_id = (line if end == -1 else line[:end]).decode(ENCODING)
+        starts, kept, _ = self.plans.get(self.head.schema) or self.plan(
+            self.head.schema
+        )
+        if (
+            starts is not None
+            and segment_id not in starts
+            and kept is not None
+            and segment_id not in kept
+        ) or line.strip() == b"":
+            return self.head
+        tokens = line.split(separator)
+        return self.add_tokens(line, RawElements(tokens), segment_id)
+
+    def add_tokens(
+        self, line: str | bytes, tokens: Sequence[str], segment_id: str
+    ) -> Loop:
+        found = self.locate(tokens, segment_id)
+        if found:
+            parent_loop, schema = found
+            if self.plan(schema)[2]:
+                self.head = parent_loop.add_loop(schema)
+            else:
+                self.head = detached_loop(parent_loop, schema)
+
+        kept = self.plan(self.head.schema)[1]
+        if kept is None or segment_id in kept:
+            self.head.add_segment(line, tokens)
+        return self.head
+
+    def plan(
+        self, schema: Schema
+    ) -> tuple[frozenset[str] | None, frozenset[str] | None, bool]:
+        """
+        Segment IDs possibly starting a loop from the loop of the loop schema,
+        the kept segment IDs of the loop (a segment is skipped if neither
+        of them) and whether the loop is kept, i.e. the loop schema or any
+        of its descendants is projected, cached by the loop schema.
+        """
+
+        plan = self.plans.get(schema)
+        if plan is None:
+            schema.compile()
+            tables = [
+                table
+                for found in (schema.children_table, schema.ancestors_table)
+                for _, table in found.tables()
+            ]
+            starts = (
+                None
+                if any(table.generic for table in tables)
+                else frozenset(
+                    segment_id for table in tables for segment_id in table.segments
+                )
+            )
+            kept = self.projection.get(schema.loop_name, frozenset())
+            projected = any(
+                node.loop_name in self.projection for node, _ in schema.walk()
+            )
+            plan = self.plans[schema] = (starts, kept, projected)
+        return plan
+
+
+class HierarchyBuilder(Builder):
+    """
+    Builder linking the HL loops by the HL parent ID (HL02) rather than
+    by the position: a new HL loop is attached under the HL loop of its parent
+    ID (found by the HL ID in the hierarchy of the transaction set), if its loop
+    schema is a child loop schema of the parent one, otherwise it is kept where
+    matched. The HL loops are indexed by the HL ID and by the level code
+    as they are added, see Loop.hierarchy. The validation is not supported,
+    as a relinked loop would be added under an already closed loop.
+    """
+
+    def add_tokens(
+        self, line: str | bytes, tokens: Sequence[str], segment_id: str
+    ) -> Loop:
+        previous = self.head
+        head = super().add_tokens(line, tokens, segment_id)
+        if head is not previous and segment_id == "HL":
+            parent = head.parent
+            if parent.hierarchy is None:
+                # The first top level HL loop of the transaction set.
+                parent.hierarchy = Hierarchy()
+            parent.hierarchy.add(
+                head, element(tokens, 1), element(tokens, 2), element(tokens, 3)
+            )
+        return head
+
+    def locate(
+        self, tokens: Sequence[str], segment_id: str
+    ) -> Tuple[Loop, Schema] | None:
+        found = super().locate(tokens, segment_id)
+        if segment_id != "HL" or not found:
+            return found
+        parent_id = element(tokens, 2)
+        if not parent_id:
+            return found
+
+        loop = self.head
+        while loop is not None and loop.hierarchy is None:
+            loop = loop.parent
+        parent = loop.hierarchy.find(parent_id) if loop is not None else None
+        if parent is None or parent is found[0]:
+            return found
+        schema = find_child_schema(parent.schema, tokens, segment_id)
+        return (parent, schema) if schema else found
+
+
+def create_builder(
+    x12: Schema,
+    context: Context,
+    validator: Validator | None = None,
+    stats: Stats | None = None,
+    projection: Projection | None = None,
+    hierarchy: bool = False,
+) -> Builder:
+    """
+    Loop tree builder of the parsing: instrumented if the stats are given,
+    projected if the projection is given (without the validator nor the stats),
+    linking the HL loops if the hierarchy is linked (without the validator, the stats
+    nor the projection).
+    """
+
+    if projection is not None:
+        if hierarchy:
+            raise ValueError("projection cannot link the hierarchy")
+        if validator or stats:
+            raise ValueError("projection cannot be validated nor instrumented")
+        return ProjectedBuilder(x12, context, projection)
+    if hierarchy:
+        if validator or stats:
+            raise ValueError("hierarchy cannot be validated nor instrumented")
+        return HierarchyBuilder(x12, context)
+    if stats is not None:
+        return InstrumentedBuilder(x12, context, stats, validator)
+    return Builder(x12, context, validator)
+
+
+class LoopEmitter:
+    """
+    Builder wrapper emitting the loops of given loop schema name (e.g. ST
+    transaction) as soon as they are closed, detached from their parent loop,
+    see iter_parse. When rejecting the invalid loops (the builder validator
+    is required), the invalid loops are not emitted and discarded.
+    """
+
+    def __init__(
+        self, builder: Builder, loop_name: str, reject_invalid: bool = False
+    ) -> None:
+        self.builder = builder
+        self.loop_name = loop_name
+        self.reject_invalid = reject_invalid
+        # Loop being built, to be emitted once closed.
+        self.current: Loop | None = None
+        self.rejected = False
+
+    def add(self, line: str | bytes) -> Loop | None:
+        """
+        Add a segment line (raw if bytes) into the tree, returns the loop
+        closed by the segment, if any.
+        """
+
+        builder = self.builder
+        previous = builder.head
+        head = builder.add_raw(line) if isinstance(line, bytes) else builder.add(line)
+        self.release()
+
+        res = None
+        current = self.current
+        if current is not None and head is not current and head.depth <= current.depth:
+            # The loop is closed once the head moves to a loop outside of it.
+            current.detach()
+            if not self.rejected:
+                res = current
+            self.current, self.rejected = None, False
+        elif self.rejected and builder.discarding is None:
+            builder.discard(current)
+
+        if (
+            self.current is None
+            and head is not previous
+            and head.schema.loop_name == self.loop_name
+        ):
+            self.current = head
+        return res
+
+    def close(self) -> list[Loop]:
+        """Close the builder, returns the last loop (if any and not rejected)."""
+
+        self.builder.close()
+        self.release()
+        if self.current is None or self.rejected:
+            return []
+        return [self.current.detach()]
+
+    def release(self):
+        """Check the current loop against the loops found invalid meanwhile."""
+
+        builder = self.builder
+        if self.current is not None and self.reject_invalid and not self.rejected:
+            self.rejected = any(
+                is_within(loop, self.current) for loop in builder.invalid
+            )
+        builder.invalid.clear()
+
+
+def element(tokens: Sequence[str], index: int) -> str:
+    """Segment element (token) at given index, an empty string if missing."""
+
+    return tokens[index] if index < len(tokens) else ""
 
-        parent = find_parent_loop_schema(schema, tokens, head)
-        if parent:
-            parent_loop, parent_schema = parent
-            schema = parent_schema
-            head = parent_loop.add_loop(schema)
-            head.add_segment(line)
-            continue
 
-        head.add_segment(line)
+def detached_loop(parent_loop: Loop, schema: Schema) -> Loop:
+    """New loop within the parent loop, not added to it (i.e. not kept)."""
 
-    return root
+    loop = Loop(schema, parent_loop.context)
+    loop.depth = parent_loop.depth + 1
+    loop.parent = parent_loop
+    return loop
 
 
-def find_child_schema(schema: Schema, tokens: list[str]) -> Schema | None:
+def find_child_schema(
+    schema: Schema, tokens: list[str], segment_id: str | None = None
+) -> Schema | None:
     """
     Find matching child loop schema by schema predicate for given segment (tokens).
     """
 
-    for node in schema.children:
-        if is_matching_loop(node, tokens):
-            return node
-    return None
+    found = schema.compile().children_table.find(tokens, segment_id)
+    return found[1] if found else None
 
 
 def find_parent_loop_schema(
-    schema: Schema, tokens: list[str], loop: Loop
+    schema: Schema, tokens: list[str], loop: Loop, segment_id: str | None = None
 ) -> Tuple[Loop, Schema] | None:
     """
-    Find recursively matching parent loop and schema,
+    Find matching parent loop and schema, climbing up the tree,
     by schema predicate for given segment (tokens).
     """
 
-    if not schema.parent or not loop.parent:
+    found = schema.compile().ancestors_table.find(tokens, segment_id)
+    if not found:
         return None
 
-    for node in schema.parent.children:
-        if is_matching_loop(node, tokens):
-            return (loop.parent, node)
+    levels, node = found
+    for _ in range(levels):
+        loop = loop.parent
+        if not loop:
+            return None
 
-    return find_parent_loop_schema(schema.parent, tokens, loop.parent)
+    return (loop, node)
 
 
 def is_matching_loop(schema: Schema, tokens: list[str]) -> bool:
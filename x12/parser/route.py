@@ -0,0 +1,379 @@
+"""
+X12 splitter and router, finding the envelope boundaries by scanning only
+the envelope segment IDs and copying the transaction sets (ST..SE) byte ranges
+straight to the outputs, with the envelope headers copied and the trailers
+rewritten, i.e. without building the loop tree.
+"""
+
+import re
+from itertools import chain
+from typing import BinaryIO, Callable, Iterator
+
+from x12.parser.context import ENCODING, Context
+from x12.parser.parse import map_file, resolve_buffer_context
+
+# Envelope segment IDs, the transaction set boundaries are found by.
+ENVELOPE = ("ISA", "IEA", "GS", "GE", "ST", "SE")
+
+# Number of the outputs kept open at once by a router.
+MAX_OPEN = 64
+
+# Output factory of the output key, reopening the output in the append mode
+# if the append flag is set (e.g. opened as "ab" rather than "wb").
+OpenOutput = Callable[[str, bool], BinaryIO]
+
+
+class Header:
+    # pylint: disable=too-few-public-methods
+    """
+    Envelope header segment (ISA or GS): its elements, its raw content
+    (the segment line along with the following lines up to the next envelope
+    segment, e.g. the line-break) and the segment terminator of the trailers.
+    """
+
+    __slots__ = ("elements", "raw", "context", "terminator")
+
+    def __init__(
+        self, elements: list[str], raw: bytes, context: Context, terminator: str
+    ) -> None:
+        self.elements = elements
+        self.raw = raw
+        self.context = context
+        self.terminator = terminator
+
+    def element(self, index: int) -> str:
+        """Element at given index, an empty string if missing."""
+
+        return self.elements[index] if index < len(self.elements) else ""
+
+    def trailer(self, count: int) -> bytes:
+        """
+        Trailer segment (IEA of ISA, GE of GS) of the given count, along with
+        the control number of the header (ISA13, GS06).
+        """
+
+        segment_id, control = ("IEA", 13) if self.elements[0] == "ISA" else ("GE", 6)
+        separator = self.context.element_separator
+        return (
+            f"{segment_id}{separator}{count}{separator}{self.element(control)}"
+            f"{self.terminator}"
+        ).encode(ENCODING)
+
+
+class Transaction:
+    # pylint: disable=too-few-public-methods
+    """
+    Transaction set found in the content: its interchange (ISA) and group (GS)
+    headers (None if outside of any), the ST segment elements and the raw
+    content of the ST..SE segments. The transaction sets of the same
+    interchange/group share the same header objects.
+    """
+
+    __slots__ = ("interchange", "group", "header", "content")
+
+    def __init__(
+        self,
+        interchange: Header | None,
+        group: Header | None,
+        header: list[str],
+        content: bytes,
+    ) -> None:
+        self.interchange = interchange
+        self.group = group
+        self.header = header
+        self.content = content
+
+    def to_bytes(self) -> bytes:
+        """The transaction set as a standalone interchange of a single group."""
+
+        res = [self.content]
+        if self.group:
+            res = [self.group.raw, *res, self.group.trailer(1)]
+        if self.interchange:
+            res = [self.interchange.raw, *res, self.interchange.trailer(1)]
+        return b"".join(res)
+
+
+class Output:
+    # pylint: disable=too-few-public-methods
+    """
+    Router output: the file object (None if closed meanwhile), the open
+    interchange and group headers and the number of the groups
+    and the transaction sets written into them.
+    """
+
+    __slots__ = ("fp", "interchange", "group", "groups", "transactions")
+
+    def __init__(self, fp: BinaryIO | None) -> None:
+        self.fp = fp
+        self.interchange: Header | None = None
+        self.group: Header | None = None
+        self.groups = 0
+        self.transactions = 0
+
+
+class Router:
+    """
+    Router of the transaction sets into the outputs by the key of the transaction
+    set (e.g. the sender, see by_sender). An output is opened by the output
+    factory on the first transaction set of its key. The envelope headers
+    are copied into the output as the transaction sets of a new interchange/group
+    arrive, the trailers are written with the counts of the output once
+    the interchange/group is closed.
+
+    At most the max open number of the outputs are kept open, the least
+    recently used one is closed (without the trailers of its open envelope)
+    and reopened in the append mode once needed again. If the key is unique
+    (i.e. a key per transaction set, see by_transaction), each output
+    is closed along with its envelope as soon as its transaction set
+    is written.
+    """
+
+    __slots__ = ("key", "open_output", "max_open", "unique", "outputs", "opened")
+
+    def __init__(
+        self,
+        key: Callable[[Transaction], str],
+        open_output: OpenOutput,
+        max_open: int = MAX_OPEN,
+        unique: bool = False,
+    ) -> None:
+        self.key = key
+        self.open_output = open_output
+        self.max_open = max_open
+        self.unique = unique
+        self.outputs: dict[str, Output] = {}
+        # Outputs kept open, from the least recently used.
+        self.opened: dict[str, Output] = {}
+
+    def __enter__(self) -> "Router":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def route(self, transaction: Transaction) -> str:
+        """Write the transaction set into the output of its key, returns the key."""
+
+        key = self.key(transaction)
+        output = self.acquire(key)
+
+        fp = output.fp
+        if output.interchange is not transaction.interchange:
+            close_interchange(output)
+            output.interchange = transaction.interchange
+            if transaction.interchange:
+                fp.write(transaction.interchange.raw)
+        if output.group is not transaction.group:
+            close_group(output)
+            output.group = transaction.group
+            if transaction.group:
+                fp.write(transaction.group.raw)
+                output.groups += 1
+
+        fp.write(transaction.content)
+        output.transactions += 1
+        if self.unique:
+            close_interchange(output)
+            self.release(key)
+        return key
+
+    def acquire(self, key: str) -> Output:
+        """Output of the key, opened (or reopened) if not open."""
+
+        output = self.opened.pop(key, None)
+        if output is None:
+            output = self.outputs.get(key)
+            append = output is not None
+            if output is None:
+                output = self.outputs[key] = Output(None)
+            while self.opened and len(self.opened) >= self.max_open:
+                self.release(next(iter(self.opened)))
+            output.fp = self.open_output(key, append)
+        self.opened[key] = output
+        return output
+
+    def release(self, key: str) -> None:
+        """Close the file object of the output, the output envelope is kept."""
+
+        output = self.opened.pop(key)
+        output.fp.close()
+        output.fp = None
+
+    def close(self) -> None:
+        """Write the trailers of the open interchanges/groups, close the outputs."""
+
+        for key, output in self.outputs.items():
+            if output.interchange or output.group:
+                self.acquire(key)
+                close_interchange(output)
+        for key in list(self.opened):
+            self.release(key)
+        self.outputs = {}
+
+
+def close_group(output: Output) -> None:
+    """Write the trailer of the open group of the output, if any."""
+
+    if output.group:
+        output.fp.write(output.group.trailer(output.transactions))
+    output.group = None
+    output.transactions = 0
+
+
+def close_interchange(output: Output) -> None:
+    """Write the trailers of the open interchange (and group) of the output."""
+
+    close_group(output)
+    if output.interchange:
+        output.fp.write(output.interchange.trailer(output.groups))
+    output.interchange = None
+    output.groups = 0
+
+
+def route(
+    buffer,
+    key: Callable[[Transaction], str],
+    open_output: OpenOutput,
+    context: Context | None = None,
+    max_open: int = MAX_OPEN,
+    unique: bool = False,
+) -> dict[str, int]:
+    """
+    Route the transaction sets of the x12 content bytes-like buffer into
+    the outputs by their key, see Router. Returns the number of the transaction
+    sets by the key.
+    """
+
+    counts: dict[str, int] = {}
+    with Router(key, open_output, max_open, unique) as router:
+        for transaction in iter_transactions(buffer, context):
+            routed = router.route(transaction)
+            counts[routed] = counts.get(routed, 0) + 1
+    return counts
+
+
+def route_file(
+    file_path: str,
+    key: Callable[[Transaction], str],
+    open_output: OpenOutput,
+    context: Context | None = None,
+    max_open: int = MAX_OPEN,
+    unique: bool = False,
+) -> dict[str, int]:
+    """Route the transaction sets of the x12 file, over its memory map, see route."""
+
+    with map_file(file_path) as buffer:
+        return route(buffer, key, open_output, context, max_open, unique)
+
+
+def by_sender(transaction: Transaction) -> str:
+    """Key of the transaction set by the group sender (GS02)."""
+
+    return transaction.group.element(2) if transaction.group else ""
+
+
+def by_interchange_sender(transaction: Transaction) -> str:
+    """Key of the transaction set by the interchange sender (ISA06)."""
+
+    return transaction.interchange.element(6).strip() if transaction.interchange else ""
+
+
+def by_transaction(transaction: Transaction) -> str:
+    """
+    Key of the transaction set by its control numbers (ISA13, GS06, ST02),
+    i.e. an output per transaction set.
+    """
+
+    return "-".join(
+        (
+            transaction.interchange.element(13) if transaction.interchange else "",
+            transaction.group.element(6) if transaction.group else "",
+            transaction.header[2] if len(transaction.header) > 2 else "",
+        )
+    )
+
+
+def scan_envelope(buffer, context: Context) -> Iterator[tuple[str, int, int]]:
+    """
+    Scan the x12 content bytes-like buffer for the envelope segments, yielding
+    the segment ID, the start of the segment and the start of the next envelope
+    segment (or the end of the content). Only the envelope segment IDs are
+    matched, the other segments are skipped over by the regular expression.
+    """
+
+    # The pattern starts with the segment separator literal, so the regular
+    # expression engine skips fast to the separators, the content start
+    # is matched on its own.
+    segment = (
+        rb"[\r\n]*("
+        + b"|".join(segment_id.encode(ENCODING) for segment_id in ENVELOPE)
+        + rb")"
+        + re.escape(context.element_separator.encode(ENCODING))
+    )
+    first = re.compile(segment).match(buffer)
+    matches = re.compile(
+        re.escape(context.segment_separator.encode(ENCODING)) + segment
+    ).finditer(buffer)
+
+    previous: tuple[str, int] | None = None
+    for match in chain([first] if first else [], matches):
+        if previous:
+            yield (*previous, match.start(1))
+        previous = (match.group(1).decode(ENCODING), match.start(1))
+    if previous:
+        yield (*previous, len(buffer))
+
+
+def iter_transactions(buffer, context: Context | None = None) -> Iterator[Transaction]:
+    """
+    Find the transaction sets (ST..SE) of the x12 content bytes-like buffer
+    (bytes, mmap, etc.), along with their envelope headers. If the context
+    is not given, it is detected from the ISA header. The envelope trailers
+    (GE, IEA) of the content are skipped, so they could be rewritten.
+    """
+
+    context = resolve_buffer_context(buffer, context)
+    separator = context.segment_separator.encode(ENCODING)
+    element_separator = context.element_separator.encode(ENCODING)
+
+    interchange: Header | None = None
+    group: Header | None = None
+    start: int | None = None
+    header: list[str] = []
+    for segment_id, begin, end in scan_envelope(buffer, context):
+        if segment_id == "ST":
+            start = begin
+            header = segment_elements(buffer, begin, end, separator, element_separator)
+        elif segment_id == "SE":
+            if start is not None:
+                yield Transaction(interchange, group, header, buffer[start:end])
+                start = None
+        elif segment_id in ("ISA", "GS"):
+            raw = buffer[begin:end]
+            # The line-break following the header is kept for the trailers.
+            after = raw.find(separator) + len(separator)
+            line_break = raw[after:]
+            line_break = line_break[: len(line_break) - len(line_break.lstrip(b"\r\n"))]
+            found = Header(
+                segment_elements(raw, 0, len(raw), separator, element_separator),
+                raw,
+                context,
+                context.segment_separator + line_break.decode(ENCODING),
+            )
+            if segment_id == "ISA":
+                interchange, group = found, None
+            else:
+                group = found
+
+
+def segment_elements(
+    buffer, start: int, end: int, separator: bytes, element_separator: bytes
+) -> list[str]:
+    """Elements of the segment starting at given position of the buffer."""
+
+    stop = buffer.find(separator, start, end)
+    if stop != -1:
+        end = stop
+    line = buffer[start:end]
+    return [element.decode(ENCODING) for element in line.split(element_separator)]
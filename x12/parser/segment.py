@@ -1,39 +1,170 @@
 """X12 Loop Segment."""
 
+from collections.abc import Sequence
+from sys import intern
+from typing import Iterator, TextIO
+
 from x12.common.colors import color_cyan
-from x12.parser.context import Context
+from x12.parser.context import ENCODING, Context
 
 
 class Segment:
     """X12 Loop Segment object."""
 
+    __slots__ = ("context", "raw", "_elements", "_split", "values")
+
     def __init__(self, context: Context) -> None:
         self.context = context
-        self.elements = []
+        # Segment line (or raw encoded line) until the elements are accessed.
+        self.raw: str | bytes | None = None
+        self._elements: list[str] | None = []
+        self._split: dict[tuple[str, int], list[str]] | None = None
+        # Typed element values, once decoded (see x12.parser.decode).
+        self.values: list | None = None
+
+    @property
+    def elements(self) -> list[str]:
+        """
+        Segment elements. The segment line is split (and decoded)
+        on the first access and released afterwards.
+        """
+
+        if self._elements is None:
+            line = (
+                self.raw.decode(ENCODING) if isinstance(self.raw, bytes) else self.raw
+            )
+            self._elements = split_elements(line, self.context.element_separator)
+            self.raw = None
+        return self._elements
 
-    def add_elements(self, segment: str):
-        """Add segment elements from a segment line."""
+    @elements.setter
+    def elements(self, elements: list[str]) -> None:
+        self.raw = None
+        self._elements = elements
+        self._split = None
+        self.values = None
 
-        self.elements = segment.split(self.context.element_separator) if segment else []
+    @property
+    def segment_id(self) -> str:
+        """Segment ID, read without splitting the whole segment line."""
+
+        if self._elements is not None:
+            return self._elements[0] if self._elements else ""
+        if isinstance(self.raw, bytes):
+            separator = self.context.element_separator.encode(ENCODING)
+            return intern(self.raw.split(separator, 1)[0].decode(ENCODING))
+        return intern(self.raw.split(self.context.element_separator, 1)[0])
+
+    def add_elements(self, segment: str, elements: list[str] | None = None):
+        """
+        Add segment elements from a segment line. The line is split only once
+        the elements are accessed, unless the already split elements are given.
+        """
+
+        if elements is None:
+            self.raw, self._elements = segment, None
+        else:
+            if elements:
+                # Share the segment ID string among all the same segments.
+                elements[0] = intern(elements[0])
+            self.raw, self._elements = None, elements
+        self._split = None
+        self.values = None
         return self
 
+    def add_raw(self, segment: bytes):
+        """
+        Add segment elements from a raw (encoded) segment line,
+        the elements are decoded only once accessed.
+        """
+
+        self.raw, self._elements = segment, None
+        self._split = None
+        self.values = None
+        return self
+
+    def value(self, index: int):
+        """
+        Typed value of the element at given index once decoded, otherwise
+        the element string. None if the element is missing or empty.
+        """
+
+        values = self.values if self.values is not None else self.elements
+        if index >= len(values) or values[index] == "":
+            return None
+        return values[index]
+
+    def composite(self, index: int) -> list[str]:
+        """
+        Composite element at given index split into the component elements.
+        The split elements are cached until the segment elements are replaced.
+        """
+
+        return self.split_element(index, self.context.composite_element_separator)
+
+    def repetitions(self, index: int) -> list[str]:
+        """
+        Repeating element at given index split into the repetitions.
+        The split elements are cached until the segment elements are replaced.
+        """
+
+        return self.split_element(index, self.context.repetition_separator)
+
+    def split_element(self, index: int, separator: str | None) -> list[str]:
+        """Element at given index split by given separator, cached."""
+
+        elements = self.elements
+        if index >= len(elements) or elements[index] == "":
+            return []
+        if not separator:
+            return [elements[index]]
+
+        if self._split is None:
+            self._split = {}
+        key = (separator, index)
+        if key not in self._split:
+            self._split[key] = elements[index].split(separator)
+        return self._split[key]
+
     def to_xml(self, depth: int = 0) -> str:
         """Serialize segment into XML."""
 
-        if len(self.elements) == 0:
-            return ""
+        return "".join(self.iter_xml(depth))
+
+    def iter_xml(self, depth: int = 0, indent: bool = True) -> Iterator[str]:
+        """
+        Serialize segment into XML chunks. Without the indentation,
+        the XML is compact, i.e. without the indentation and the line breaks.
+        """
+
+        elements = self.elements
+        if len(elements) == 0:
+            return
+
+        segment_id = elements[0]
+        prefix, child_prefix = (
+            ("  " * depth, "  " * (depth + 1)) if indent else ("", "")
+        )
+        line_break = "\n" if indent else ""
+
+        res = [f"{prefix}<{segment_id}>{line_break}"]
+        for index in range(1, len(elements)):
+            tag = segment_id + str(index).zfill(2)
+            res.append(
+                f"{child_prefix}<{tag}><![CDATA[{escape_cdata(elements[index])}]]>"
+                f"</{tag}>{line_break}"
+            )
+        res.append(f"{prefix}</{segment_id}>{line_break}")
+        yield "".join(res)
+
+    def write_xml(self, fp: TextIO, depth: int = 0, indent: bool = True) -> None:
+        """Serialize segment into XML, written to a text file object."""
 
-        res = f"{'  '*depth}<{self.elements[0]}>\n"
-        for index, element in enumerate(self.elements[1:], 1):
-            tag = self.elements[0] + str(index).zfill(2)
-            res += f"{'  '*(depth+1)}<{tag}><![CDATA[{element}]]></{tag}>"
-            res += "\n" if index <= len(self.elements) else ""
-        res += f"{'  '*depth}</{self.elements[0]}>\n"
-        return res
+        fp.writelines(self.iter_xml(depth, indent))
 
     def __str__(self) -> str:
         return (
-            self.context.element_separator.join(element for element in self.elements)
+            self.context.element_separator.join(self.elements)
             + self.context.segment_separator
         )
 
@@ -45,7 +176,41 @@ class Segment:
 
         return (
             f"{color_cyan(self.elements[0])}{self.context.element_separator}"
-            + self.context.element_separator.join(
-                element for element in self.elements[1:]
-            )
+            + self.context.element_separator.join(self.elements[1:])
         )
+
+
+class RawElements(Sequence):
+    """
+    Raw (encoded) segment elements (tokens), decoded on access.
+    Used to match the loop schemas without decoding the whole segment.
+    """
+
+    __slots__ = ("tokens",)
+
+    def __init__(self, tokens: list[bytes]) -> None:
+        self.tokens = tokens
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [token.decode(ENCODING) for token in self.tokens[index]]
+        return self.tokens[index].decode(ENCODING)
+
+
+def split_elements(segment: str, element_separator: str) -> list[str]:
+    """Split a segment line into the segment elements."""
+
+    elements = segment.split(element_separator) if segment else []
+    if elements:
+        # Share the segment ID string among all the same segments.
+        elements[0] = intern(elements[0])
+    return elements
+
+
+def escape_cdata(value: str) -> str:
+    """Escape the CDATA section end within a value, wrapped in a CDATA section."""
+
+    return value.replace("]]>", "]]]]><![CDATA[>") if "]]>" in value else value
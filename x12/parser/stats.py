@@ -0,0 +1,209 @@
+"""
+Parser instrumentation: the counters and the timings collected by an
+instrumented parse (see x12.parser.parse) or analyze, along with the optional
+callback hooks. The instrumentation is opt-in, the parser without the stats
+runs the uninstrumented code path.
+"""
+
+import heapq
+from itertools import islice
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from x12.parser.loop import Loop
+from x12.parser.validate import loop_path
+from x12.schema.schema import DispatchTable, Schema
+
+# Number of the items (e.g. segment lines) timed at once.
+BATCH_SIZE = 1024
+
+# End of the timed iteration marker.
+STOP = object()
+
+
+class Stats:
+    """
+    Parser counters and timings:
+    - counters: the number of the segments, loops, etc.
+    - timings: seconds spent by the stage (io, tokenize, build, analyze).
+    - evaluations: the loop schema predicate evaluations (or the indexed
+      value lookups) by the loop schema.
+    - climbs: the histogram of the number of the levels climbed up the tree
+      to add a new loop (0 for a child loop of the current loop).
+    - largest: the largest loops by the number of the segments, as
+      (segments, loop path), once the parsing is finished, the loops
+      of the same size in the document order.
+
+    The hooks are called on a new loop (the loop and the climbed levels),
+    on a new segment (the loop and the segment line) and once the parsing
+    (or analysis) is finished (the stats).
+    """
+
+    __slots__ = (
+        "counters",
+        "timings",
+        "evaluations",
+        "climbs",
+        "largest",
+        "max_largest",
+        "on_loop",
+        "on_segment",
+        "on_finish",
+    )
+
+    def __init__(
+        self,
+        max_largest: int = 10,
+        on_loop: Callable[[Loop, int], Any] | None = None,
+        on_segment: Callable[[Loop, str | bytes], Any] | None = None,
+        on_finish: Callable[["Stats"], Any] | None = None,
+    ) -> None:
+        self.counters: dict[str, int] = {}
+        self.timings: dict[str, float] = {}
+        self.evaluations: dict[Schema, int] = {}
+        self.climbs: dict[int, int] = {}
+        self.largest: list[tuple[int, tuple[str, ...]]] = []
+        self.max_largest = max_largest
+        self.on_loop = on_loop
+        self.on_segment = on_segment
+        self.on_finish = on_finish
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Increment the counter."""
+
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def time(self, name: str, seconds: float) -> None:
+        """Add the time spent by the stage."""
+
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def timed(self, name: str, items: Iterable) -> Iterator:
+        """Iterate the items, adding the time spent producing them to the stage."""
+
+        iterator = iter(items)
+        while True:
+            start = perf_counter()
+            item = next(iterator, STOP)
+            self.time(name, perf_counter() - start)
+            if item is STOP:
+                return
+            yield item
+
+    def batches(
+        self,
+        name: str,
+        items: Iterable,
+        nested: str | None = None,
+        size: int = BATCH_SIZE,
+    ) -> Iterator[list]:
+        """
+        Iterate the items in batches, adding the time spent producing them
+        to the stage, except the time added to the nested stage meanwhile
+        (e.g. the items are produced from another timed iteration).
+        The batches keep the timing overhead per item negligible.
+        """
+
+        timings = self.timings
+        iterator = iter(items)
+        while True:
+            before = timings.get(nested, 0.0) if nested else 0.0
+            start = perf_counter()
+            batch = list(islice(iterator, size))
+            elapsed = perf_counter() - start
+            if nested:
+                elapsed -= timings.get(nested, 0.0) - before
+            self.time(name, elapsed)
+            if not batch:
+                return
+            yield batch
+
+    def collect_largest(self, root: Loop) -> None:
+        """Collect the largest loops of the loop tree."""
+
+        loops = [loop for loop, _ in root.walk()]
+        self.largest = [
+            (len(loop.segments), loop_path(loop))
+            for loop in heapq.nlargest(
+                self.max_largest, loops, key=lambda loop: len(loop.segments)
+            )
+        ]
+
+    def finish(self) -> None:
+        """Finish the collection, calls the finish hook."""
+
+        if self.on_finish:
+            self.on_finish(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Stats as a plain (JSON compatible) dict."""
+
+        # Loop schemas of the same path (e.g. by the qualifier) are summed up.
+        evaluations: dict[str, int] = {}
+        for schema, count in self.evaluations.items():
+            path = "/".join(schema_path(schema))
+            evaluations[path] = evaluations.get(path, 0) + count
+
+        return {
+            "counters": dict(self.counters),
+            "timings": dict(self.timings),
+            "evaluations": evaluations,
+            "climbs": dict(sorted(self.climbs.items())),
+            "largest": [[size, "/".join(path)] for size, path in self.largest],
+        }
+
+    def __str__(self) -> str:
+        stats = self.to_dict()
+        res = [f"{name}: {value}" for name, value in stats["counters"].items()]
+        res += [f"{name}: {value:.6f}s" for name, value in stats["timings"].items()]
+        res += [
+            f"evaluations {path}: {count}"
+            for path, count in sorted(
+                stats["evaluations"].items(), key=lambda item: -item[1]
+            )
+        ]
+        res += [
+            f"climbs {levels}: {count}" for levels, count in stats["climbs"].items()
+        ]
+        res += [f"largest {path}: {size}" for size, path in stats["largest"]]
+        return "\n".join(res)
+
+
+def find_counted(
+    table: DispatchTable,
+    tokens: Sequence[str],
+    segment_id: str | None,
+    evaluations: dict[Schema, int],
+) -> tuple[int, Schema] | None:
+    """
+    Find the matching candidate of the dispatch table (see DispatchTable.find),
+    counting the predicate evaluations by the loop schema. An indexed value
+    lookup is counted as an evaluation of the found candidate.
+    """
+
+    for offset, current in table.tables():
+        found = None
+        candidates = current.segments.get(segment_id)
+        if candidates and candidates.values is not None:
+            found = candidates.find(tokens)
+            if found:
+                evaluations[found[1]] = evaluations.get(found[1], 0) + 1
+        else:
+            for candidate in candidates.candidates if candidates else current.generic:
+                evaluations[candidate[1]] = evaluations.get(candidate[1], 0) + 1
+                if candidate[1].matches(tokens):
+                    found = candidate
+                    break
+        if found:
+            return (found[0] + offset, found[1]) if offset else found
+    return None
+
+
+def schema_path(schema: Schema) -> tuple[str, ...]:
+    """Loop schema names from the schema root to the loop schema."""
+
+    path = []
+    while schema is not None:
+        path.append(schema.loop_name)
+        schema = schema.parent
+    return tuple(reversed(path))
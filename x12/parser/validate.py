@@ -0,0 +1,295 @@
+"""Validation of the parsed x12 loops against the loop schema."""
+
+from enum import Enum
+from typing import Iterable, Iterator
+
+from x12.parser.loop import Loop
+from x12.parser.segment import Segment
+from x12.schema.schema import Schema
+from x12.schema.schema import Segment as SegmentSchema
+from x12.schema.schema import Usage
+
+
+class Occurrence(Enum):
+    """Loop/segment occurrence in the parsed x12 loop."""
+
+    EXPECTED = 0
+    UNEXPECTED = 1
+    MISSING = 2
+
+
+# Occurrence of a loop/segment in the parsed loop in the document order:
+# the occurrence, the loop, the position and the subject. The subject is
+# the loop (entered), the segment (expected or unexpected), the segment schema
+# (missing segment) or the child loop schema (missing loop). The position is
+# the segment index, the index of the segment preceded by the missing segment,
+# or the number of the child loops preceding the missing loop (-1 for a loop).
+Probe = tuple[Occurrence, Loop, int, Loop | Segment | SegmentSchema | Schema]
+
+
+class Issue:
+    # pylint: disable=too-few-public-methods
+    """
+    Missing or unexpected loop/segment. The path is the loop names from
+    the validated loop to the loop containing the issue, the position is
+    the segment (or child loop for a missing loop) index within the loop
+    and the name is the segment ID, segment schema name or loop name.
+    """
+
+    __slots__ = ("kind", "path", "position", "name", "is_loop")
+
+    def __init__(
+        self,
+        kind: Occurrence,
+        path: tuple[str, ...],
+        position: int,
+        name: str,
+        is_loop: bool = False,
+    ) -> None:
+        self.kind = kind
+        self.path = path
+        self.position = position
+        self.name = name
+        self.is_loop = is_loop
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Issue) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def key(self) -> tuple:
+        """Issue record as a tuple."""
+
+        return (self.kind, self.path, self.position, self.name, self.is_loop)
+
+    def __repr__(self) -> str:
+        return (
+            f"Issue({self.kind.name}, {'/'.join(self.path)}, {self.position}, "
+            f"{self.name}{', loop' if self.is_loop else ''})"
+        )
+
+
+class Validation:
+    # pylint: disable=too-few-public-methods
+    """
+    Validation result: the issues in the document order (unless counted only),
+    the number of the issues by the kind and whether the validation was
+    stopped before validating the whole loop.
+    """
+
+    __slots__ = ("issues", "counts", "truncated")
+
+    def __init__(self) -> None:
+        self.issues: list[Issue] = []
+        self.counts = {Occurrence.MISSING: 0, Occurrence.UNEXPECTED: 0}
+        self.truncated = False
+
+    @property
+    def valid(self) -> bool:
+        """Is the validated loop without issues."""
+
+        return sum(self.counts.values()) == 0
+
+
+def validate(
+    loop: Loop,
+    max_issues: int | None = None,
+    fail_fast: bool = False,
+    counts_only: bool = False,
+) -> Validation:
+    """
+    Validate the parsed loop against its loop schema, to determine missing
+    and unexpected segments/loops, in a single walk of the loop tree.
+
+    The validation stops at the first issue when failing fast or once
+    the max number of issues is reached, in which case the result is truncated.
+    When counting only, the issues are counted without being recorded.
+    """
+
+    validator = Validator(max_issues, fail_fast, counts_only)
+    validator.add(walk(loop, False), loop)
+    return validator.result
+
+
+class Validator:
+    """
+    Validation of the loops one by one, e.g. incrementally as the loops
+    are closed while parsing. The issues are collected into the result,
+    until the validation is stopped (see validate).
+    """
+
+    __slots__ = ("result", "limit", "counts_only")
+
+    def __init__(
+        self,
+        max_issues: int | None = None,
+        fail_fast: bool = False,
+        counts_only: bool = False,
+    ) -> None:
+        self.result = Validation()
+        self.limit = 1 if fail_fast else max_issues
+        self.counts_only = counts_only
+
+    def check(self, loop: Loop) -> int:
+        """
+        Validate the loop itself, i.e. its segments and its missing child loops
+        (not the child loops), returns the number of the found issues.
+        """
+
+        if self.result.truncated:
+            return 0
+        return self.add(loop_issues(loop))
+
+    def add(self, probes: Iterable[Probe], root: Loop | None = None) -> int:
+        """
+        Add the issues, the issue paths start at given root loop
+        (the tree root if not given), returns the number of the added issues.
+        """
+
+        result = self.result
+        count = 0
+        for occurrence, parent, position, subject in probes:
+            if self.limit is not None and sum(result.counts.values()) >= self.limit:
+                result.truncated = True
+                break
+
+            count += 1
+            result.counts[occurrence] += 1
+            if self.counts_only:
+                continue
+
+            if isinstance(subject, Segment):
+                name = subject.segment_id
+            elif isinstance(subject, Schema):
+                name = subject.loop_name
+            else:
+                name = subject.name
+            result.issues.append(
+                Issue(
+                    occurrence,
+                    loop_path(parent, root),
+                    position,
+                    name,
+                    isinstance(subject, Schema),
+                )
+            )
+        return count
+
+
+def loop_path(loop: Loop, root: Loop | None = None) -> tuple[str, ...]:
+    """Loop names from the root loop (the tree root if not given) to the loop."""
+
+    path = [loop.schema.loop_name]
+    while loop is not root and loop.parent:
+        loop = loop.parent
+        path.append(loop.schema.loop_name)
+    return tuple(reversed(path))
+
+
+def walk(loop: Loop, expected: bool = True) -> Iterator[Probe]:
+    """
+    Walk the loop tree in the document order (without recursion), yielding
+    the loop/segment occurrences, only the issues unless the expected ones.
+    The segments are matched by the segment schema lookup tables, the loops
+    are visited in the order of the child loop schemas.
+    """
+
+    loop.schema.compile()
+    stack: list[Loop | tuple[Loop, int, Schema]] = [loop]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, tuple):
+            yield (Occurrence.MISSING, *item)
+            continue
+
+        loop = item
+        if expected:
+            yield (Occurrence.EXPECTED, loop, -1, loop)
+        yield from walk_segments(loop, expected)
+        stack += reversed(child_loops(loop))
+
+
+def loop_issues(loop: Loop) -> Iterator[Probe]:
+    """Issues of the loop itself, i.e. its segments and missing child loops."""
+
+    loop.schema.compile()
+    yield from walk_segments(loop, False)
+    for item in child_loops(loop):
+        if isinstance(item, tuple):
+            yield (Occurrence.MISSING, *item)
+
+
+def child_loops(loop: Loop) -> list[Loop | tuple[Loop, int, Schema]]:
+    """
+    Child loops in the order of the child loop schemas, along with the missing
+    required child loops, as (loop, position, child loop schema). The child
+    loop schemas of the same name (e.g. by the qualifier) are alternatives,
+    i.e. their loops are listed once and the name is missing only if none.
+    """
+
+    loops: dict[str, list[Loop]] = {}
+    for child in loop.loops:
+        loops.setdefault(child.schema.loop_name, []).append(child)
+
+    res: list[Loop | tuple[Loop, int, Schema]] = []
+    count = 0
+    listed: set[str] = set()
+    for child_schema in loop.schema.children:
+        name = child_schema.loop_name
+        if name in listed:
+            continue
+        children = loops.get(name)
+        if children:
+            res += children
+            count += len(children)
+            listed.add(name)
+        elif child_schema.usage == Usage.REQUIRED:
+            res.append((loop, count, child_schema))
+            listed.add(name)
+    return res
+
+
+def walk_segments(loop: Loop, expected: bool = True) -> Iterator[Probe]:
+    """Match the loop segments against the loop segment schemas."""
+
+    schemas = loop.schema.segments
+    index = 0
+    # Position of the matched repeating segment schema, not to be reported
+    # missing while the matching stays at it.
+    repeating = -1
+    for position, segment, found in match_segments(loop):
+        if not found:
+            yield (Occurrence.UNEXPECTED, loop, position, segment)
+            continue
+
+        at_index = found[0]
+        for missing in range(index, at_index):
+            if schemas[missing].usage == Usage.REQUIRED and missing != repeating:
+                yield (Occurrence.MISSING, loop, position, schemas[missing])
+        if expected:
+            yield (Occurrence.EXPECTED, loop, position, segment)
+        index = at_index + (1 if found[1].unique else 0)
+        repeating = at_index
+
+    for missing in range(index, len(schemas)):
+        if schemas[missing].usage == Usage.REQUIRED and missing != repeating:
+            yield (Occurrence.MISSING, loop, len(loop.segments), schemas[missing])
+
+
+def match_segments(
+    loop: Loop,
+) -> Iterator[tuple[int, Segment, tuple[int, SegmentSchema] | None]]:
+    """
+    Match the loop segments against the loop segment schemas in the sequential
+    order, yielding the segment position, the segment and the position and
+    the matching segment schema (None for an unexpected segment).
+    """
+
+    table = loop.schema.compile().segments_table
+    index = 0
+    for position, segment in enumerate(loop.segments):
+        found = table.find(segment.elements, index, segment.segment_id)
+        if found:
+            index = found[0] + (1 if found[1].unique else 0)
+        yield (position, segment, found)
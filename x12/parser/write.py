@@ -0,0 +1,223 @@
+"""
+X12 writer, streaming the parsed loops (or segments) into a binary file object
+with buffered bulk writes, re-emitting the untouched segments from their raw
+lines and recomputing the envelope trailer counts.
+"""
+
+import io
+from typing import BinaryIO, Iterable
+
+from x12.parser.context import ENCODING, Context
+from x12.parser.loop import Loop
+from x12.parser.segment import Segment
+
+# Number of bytes buffered before written into the file object at once.
+BUFFER_SIZE = 64 * 1024
+
+# Envelope header and trailer segment IDs, counted when recounting.
+ENVELOPE = ("ISA", "IEA", "GS", "GE", "ST", "SE")
+
+
+class Writer:
+    """
+    Buffered x12 writer into a binary file object. The segments not accessed
+    since parsed (i.e. holding the segment line, see Segment.raw) are written
+    byte for byte from the line, the others are encoded from their elements,
+    with the separators of the segment context.
+
+    When recounting, the envelope trailer counts are recomputed as the segments
+    are written: SE01 the number of the transaction set segments, GE01
+    the number of the group transaction sets and IEA01 the number of
+    the interchange groups.
+    The line-break is written after each segment separator, if given.
+    """
+
+    __slots__ = (
+        "fp",
+        "recount",
+        "line_break",
+        "buffer_size",
+        "buffer",
+        "buffered",
+        "contexts",
+        "segments",
+        "transactions",
+        "groups",
+        "written",
+    )
+
+    def __init__(
+        self,
+        fp: BinaryIO,
+        recount: bool = True,
+        line_break: str = "",
+        buffer_size: int = BUFFER_SIZE,
+    ) -> None:
+        self.fp = fp
+        self.recount = recount
+        self.line_break = line_break
+        self.buffer_size = buffer_size
+        self.buffer: list[bytes] = []
+        self.buffered = 0
+        # Encoded segment terminator and envelope line prefixes by the context.
+        self.contexts: dict[Context, tuple[bytes, tuple, tuple]] = {}
+        # Segments of the transaction set, transaction sets of the group
+        # and groups of the interchange written so far.
+        self.segments = 0
+        self.transactions = 0
+        self.groups = 0
+        # Number of the segments written.
+        self.written = 0
+
+    def __enter__(self) -> "Writer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.flush()
+
+    def write_loop(self, loop: Loop) -> None:
+        """Write the loop segments and its child loops, in the document order."""
+
+        for node, _ in loop.walk():
+            for segment in node.segments:
+                self.write_segment(segment)
+
+    def write_segments(self, segments: Iterable[Segment]) -> None:
+        """Write the segments."""
+
+        for segment in segments:
+            self.write_segment(segment)
+
+    def write_segment(self, segment: Segment) -> None:
+        """Write the segment, recounting the trailer count if a trailer."""
+
+        context = segment.context
+        encoded = self.contexts.get(context)
+        if encoded is None:
+            encoded = self.contexts[context] = encode_context(context, self.line_break)
+        terminator, raw_prefixes, prefixes = encoded
+
+        # The envelope segments are told by the line prefix, so the segment ID
+        # is not decoded for every segment.
+        raw = segment.raw
+        if raw is None:
+            elements = segment.elements
+            if not elements:
+                return
+            envelope = elements[0] in ENVELOPE
+            line = context.element_separator.join(elements).encode(ENCODING)
+        elif isinstance(raw, bytes):
+            envelope = raw.startswith(raw_prefixes)
+            line = raw
+        else:
+            envelope = raw.startswith(prefixes)
+            line = raw.encode(ENCODING)
+
+        if self.recount:
+            if envelope:
+                count = self.count(segment.segment_id)
+                if count is not None:
+                    line = encode_segment(segment, count)
+            else:
+                self.segments += 1
+
+        self.buffer += (line, terminator)
+        self.buffered += len(line) + len(terminator)
+        self.written += 1
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def count(self, segment_id: str) -> int | None:
+        """
+        Count the envelope segment into the envelope counts, returns
+        the recomputed count if the segment is a trailer.
+        """
+
+        if segment_id == "ST":
+            self.segments = 0
+            self.transactions += 1
+        elif segment_id == "GS":
+            self.transactions = 0
+            self.groups += 1
+        elif segment_id == "ISA":
+            self.groups = 0
+        self.segments += 1
+
+        if segment_id == "SE":
+            return self.segments
+        if segment_id == "GE":
+            return self.transactions
+        if segment_id == "IEA":
+            return self.groups
+        return None
+
+    def flush(self) -> None:
+        """Write the buffered segments into the file object."""
+
+        if self.buffer:
+            self.fp.write(b"".join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+
+
+def write(
+    fp: BinaryIO,
+    source: Loop | Iterable[Segment],
+    recount: bool = True,
+    line_break: str = "",
+) -> int:
+    """
+    Write the loop (or the segments) into the binary file object, see Writer.
+    Returns the number of the segments written.
+    """
+
+    with Writer(fp, recount, line_break) as writer:
+        if isinstance(source, Loop):
+            writer.write_loop(source)
+        else:
+            writer.write_segments(source)
+    return writer.written
+
+
+def to_bytes(
+    source: Loop | Iterable[Segment], recount: bool = True, line_break: str = ""
+) -> bytes:
+    """Serialize the loop (or the segments) into bytes, see Writer."""
+
+    with io.BytesIO() as fp:
+        write(fp, source, recount, line_break)
+        return fp.getvalue()
+
+
+def encode_context(
+    context: Context, line_break: str = ""
+) -> tuple[bytes, tuple, tuple]:
+    """
+    Encoded segment terminator (the segment separator and the line-break)
+    and the envelope segment line prefixes, raw (encoded) and decoded.
+    """
+
+    prefixes = tuple(segment_id + context.element_separator for segment_id in ENVELOPE)
+    return (
+        (context.segment_separator + line_break).encode(ENCODING),
+        tuple(prefix.encode(ENCODING) for prefix in prefixes),
+        prefixes,
+    )
+
+
+def encode_segment(segment: Segment, count: int | None = None) -> bytes:
+    """
+    Encoded segment line (without the segment separator), from the raw line
+    unless accessed, with the first element replaced by given count if it differs.
+    """
+
+    raw = segment.raw
+    if raw is not None and count is None:
+        return raw if isinstance(raw, bytes) else raw.encode(ENCODING)
+
+    elements = segment.elements
+    if not elements:
+        return b""
+    if count is not None and (len(elements) < 2 or elements[1] != str(count)):
+        elements = [elements[0], str(count), *elements[2:]]
+    return segment.context.element_separator.join(elements).encode(ENCODING)
@@ -0,0 +1,232 @@
+"""
+Declarative X12 schema definition, i.e. the loop schema tree as plain
+(JSON compatible) dicts and lists, compiled into the Schema tree with
+the data-driven predicates, so the compiled schema could be pickled,
+cached across runs and sent to the worker processes.
+
+Loop definition:
+    {
+        "name": "2100",
+        "usage": "REQUIRED",
+        "predicate": {"segment": "CLP"},
+        "segments": [...],
+        "children": [...],
+    }
+
+Segment definition:
+    {
+        "name": "DTM",
+        "usage": "OPTIONAL",
+        "predicate": {"segment": "DTM", "element": 1, "values": ["232", "233"]},
+        "unique": False,
+        "elements": [...],
+    }
+
+Element definition:
+    {
+        "name": "DTM02",
+        "type": "DT",
+        "usage": "REQUIRED",
+        "min_length": 8,
+        "max_length": 8,
+        "codes": None,
+    }
+
+Only the name is required. The usage defaults to REQUIRED for the loops and
+segments (OPTIONAL for the elements), the segment predicate defaults to
+the segment ID of the segment name and the root loop has no predicate.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any
+
+from x12.common.walk import preorder
+from x12.schema.schema import (
+    DataType,
+    Element,
+    Schema,
+    Segment,
+    SegmentPredicate,
+    Usage,
+)
+
+# Version of the compiled schema cache, to be bumped on the schema model change.
+CACHE_VERSION = 3
+
+
+def child_definitions(definition: dict[str, Any]) -> list[dict[str, Any]]:
+    """Child loop definitions of the loop definition."""
+
+    return definition.get("children", [])
+
+
+def from_definition(definition: dict[str, Any]) -> Schema:
+    """Build the loop schema tree from the declarative loop definition."""
+
+    root = Schema(
+        definition["name"],
+        Usage[definition.get("usage", "REQUIRED")],
+        to_predicate(definition.get("predicate")),
+    )
+
+    stack = [(root, definition)]
+    while stack:
+        schema, loop = stack.pop()
+        schema.with_segments(
+            *[to_segment(segment) for segment in loop.get("segments", [])]
+        )
+        for child in child_definitions(loop):
+            stack.append(
+                (
+                    schema.add_child(
+                        child["name"],
+                        Usage[child.get("usage", "REQUIRED")],
+                        to_predicate(child.get("predicate")),
+                    ),
+                    child,
+                )
+            )
+
+    return root
+
+
+def to_predicate(definition: dict[str, Any] | None) -> SegmentPredicate | None:
+    """Build the segment predicate from the predicate definition."""
+
+    if definition is None:
+        return None
+    return SegmentPredicate(
+        definition["segment"], definition.get("element"), definition.get("values")
+    )
+
+
+def to_segment(definition: dict[str, Any]) -> Segment:
+    """Build the segment schema from the segment definition."""
+
+    segment = Segment(
+        definition["name"],
+        Usage[definition.get("usage", "REQUIRED")],
+        to_predicate(definition.get("predicate", {"segment": definition["name"]})),
+        definition.get("unique", True),
+    )
+    return segment.with_elements(
+        *[
+            Element(
+                element["name"],
+                DataType[element.get("type", "AN")],
+                Usage[element.get("usage", "OPTIONAL")],
+                element.get("min_length", 0),
+                element.get("max_length"),
+                element.get("codes"),
+            )
+            for element in definition.get("elements", [])
+        ]
+    )
+
+
+def to_definition(schema: Schema) -> dict[str, Any]:
+    """
+    Convert the loop schema tree into the declarative loop definition.
+    Only the built-in predicates (by_segment, by_segment_element) could be
+    converted, ValueError is raised for a custom predicate.
+    """
+
+    def predicate(owner: Schema | Segment, required: bool) -> dict[str, Any] | None:
+        value = owner.predicate
+        if value is None and not required:
+            return None
+        if not isinstance(value, SegmentPredicate):
+            name = owner.loop_name if isinstance(owner, Schema) else owner.name
+            raise ValueError(f"unable to convert the custom predicate of {name}")
+
+        res: dict[str, Any] = {"segment": value.segment_id}
+        if value.element_index is not None:
+            res["element"] = value.element_index
+            res["values"] = sorted(value.element_values)
+        return res
+
+    def segment(schema: Segment) -> dict[str, Any]:
+        return {
+            "name": schema.name,
+            "usage": schema.usage.name,
+            "predicate": predicate(schema, True),
+            "unique": schema.unique,
+            "elements": [
+                {
+                    "name": element.name,
+                    "type": element.data_type.name,
+                    "usage": element.usage.name,
+                    "min_length": element.min_length,
+                    "max_length": element.max_length,
+                    "codes": sorted(element.codes) if element.codes else None,
+                }
+                for element in schema.elements
+            ],
+        }
+
+    # The loop definitions in the pre-order, each added to its parent's children.
+    loops: dict[Schema, dict[str, Any]] = {}
+    for node, depth in schema.walk():
+        res: dict[str, Any] = {"name": node.loop_name, "usage": node.usage.name}
+        if node.predicate is not None:
+            res["predicate"] = predicate(node, False)
+        res["segments"] = [segment(child) for child in node.segments]
+        res["children"] = []
+        if depth:
+            loops[node.parent]["children"].append(res)
+        loops[node] = res
+
+    return loops[schema]
+
+
+def definition_hash(definition: dict[str, Any]) -> str:
+    """
+    Hash of the loop definition (and the cache version), hashed flat, i.e.
+    the loops in the pre-order with their depth, so not by recursion.
+    """
+
+    digest = hashlib.sha256(json.dumps(CACHE_VERSION).encode("utf-8"))
+    for loop, depth in preorder(definition, child_definitions):
+        fields = {key: value for key, value in loop.items() if key != "children"}
+        content = json.dumps([depth, fields], sort_keys=True)
+        digest.update(f"\n{content}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_schema(definition: dict[str, Any], cache_dir: str | None = None) -> Schema:
+    """
+    Load the compiled loop schema tree of the loop definition. If the cache
+    directory is given, the compiled schema is loaded from the cache keyed
+    by the definition hash, or built, compiled and stored into the cache.
+
+    The cache is a pickle, so the cache directory has to be trusted.
+    """
+
+    if cache_dir is None:
+        return from_definition(definition).compile()
+
+    file_path = os.path.join(
+        cache_dir, f"x12-schema-{definition_hash(definition)}.pickle"
+    )
+    try:
+        with open(file_path, "rb") as file:
+            schema = pickle.load(file)
+        if isinstance(schema, Schema):
+            return schema
+    except Exception:  # pylint: disable=broad-exception-caught
+        # Missing, corrupted or incompatible cache, rebuild it.
+        pass
+
+    schema = from_definition(definition).compile()
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write into a temporary file first, so a concurrent reader never reads
+    # a partially written cache.
+    descriptor, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(descriptor, "wb") as file:
+        pickle.dump(schema, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, file_path)
+    return schema
@@ -1,7 +1,14 @@
 """X12 schema"""
 
+from bisect import bisect_left
 from enum import Enum
-from typing import Callable
+from operator import attrgetter
+from typing import Callable, Iterator
+
+from x12.common.walk import postorder, preorder
+
+# Number of the nearest levels of the candidates held by an ancestors table.
+ANCESTORS_LEVELS = 16
 
 
 class Usage(Enum):
@@ -23,10 +30,42 @@ class Usage(Enum):
 Predicate = Callable[[list[str]], bool]
 
 
+class SegmentPredicate:
+    """
+    Loop/segment predicate by segment ID and optionally by element value(s)
+    at given element index. Unlike a custom predicate, the match criteria
+    are known, so the loops could be looked up by them (see DispatchTable).
+    """
+
+    __slots__ = ("segment_id", "element_index", "element_values")
+
+    def __init__(
+        self,
+        segment_id: str,
+        element_index: int | None = None,
+        element_values: list[str] | None = None,
+    ) -> None:
+        self.segment_id = segment_id
+        self.element_index = element_index
+        self.element_values = (
+            frozenset(element_values) if element_values is not None else None
+        )
+
+    def __call__(self, tokens: list[str]) -> bool:
+        if len(tokens) == 0 or tokens[0] != self.segment_id:
+            return False
+        if self.element_index is None:
+            return True
+        return (
+            len(tokens) > self.element_index
+            and tokens[self.element_index] in self.element_values
+        )
+
+
 def by_segment(segment_id: str) -> Predicate:
     """Loop/segment predicate by segment ID."""
 
-    return lambda tokens: len(tokens) > 0 and tokens[0] == segment_id
+    return SegmentPredicate(segment_id)
 
 
 def by_segment_element(
@@ -36,16 +75,77 @@ def by_segment_element(
     Loop/segment predicate by segment ID and element value(s) at given element index.
     """
 
-    return (
-        lambda tokens: by_segment(segment_id)(tokens)
-        and len(tokens) > element_index
-        and tokens[element_index] in element_value
-    )
+    return SegmentPredicate(segment_id, element_index, element_value)
+
+
+class DataType(Enum):
+    """Element data type."""
+
+    # Alphanumeric string.
+    AN = "AN"
+    # Identifier, i.e. a code.
+    ID = "ID"
+    # Decimal number, with an explicit decimal point if any.
+    R = "R"
+    # Numeric with the implied decimal point, e.g. N2 "12345" is 123.45.
+    N0 = "N0"
+    N1 = "N1"
+    N2 = "N2"
+    N3 = "N3"
+    N4 = "N4"
+    N5 = "N5"
+    N6 = "N6"
+    N7 = "N7"
+    N8 = "N8"
+    N9 = "N9"
+    # Date, CCYYMMDD (or YYMMDD).
+    DT = "DT"
+    # Time, HHMM[SS[d..]].
+    TM = "TM"
+
+
+class Element:
+    """X12 Element schema"""
+
+    # pylint: disable=too-few-public-methods, too-many-arguments
+    __slots__ = ("name", "data_type", "usage", "min_length", "max_length", "codes")
+
+    def __init__(
+        self,
+        name: str,
+        data_type: DataType = DataType.AN,
+        usage: Usage = Usage.OPTIONAL,
+        min_length: int = 0,
+        max_length: int | None = None,
+        codes: list[str] | None = None,
+    ) -> None:
+        self.name = name
+        self.data_type = data_type
+        self.usage = usage
+        self.min_length = min_length
+        self.max_length = max_length
+        self.codes = frozenset(codes) if codes is not None else None
+
+    def is_valid(self, value: str) -> bool:
+        """Is the element value valid by the usage, the length and the code list."""
+
+        if value == "":
+            return self.usage != Usage.REQUIRED
+        return (
+            self.min_length <= len(value)
+            and (self.max_length is None or len(value) <= self.max_length)
+            and (self.codes is None or value in self.codes)
+        )
+
+    def __str__(self) -> str:
+        return self.name
 
 
 class Segment:
     """X12 Segment schema"""
 
+    __slots__ = ("name", "usage", "predicate", "unique", "elements")
+
     def __init__(
         self, name: str, usage: Usage, predicate: Predicate, unique: bool = True
     ):
@@ -53,6 +153,15 @@ class Segment:
         self.usage = usage
         self.predicate = predicate
         self.unique = unique
+        # Element schemas of the segment elements following the segment ID.
+        self.elements: list[Element] = []
+
+    def with_elements(self, *elements: list[Element]):
+        """Add segment's element schemas, in the order of the segment elements."""
+
+        for element in elements:
+            self.elements.append(element)
+        return self
 
     def matches(self, tokens: list[str]) -> bool:
         """Does the loop matches given the segment elements (tokens)."""
@@ -63,9 +172,203 @@ class Segment:
         return self.name
 
 
+class DispatchCandidates:
+    """
+    Loop schema candidates sharing the same segment ID, in the declaration order.
+    When all the candidates are matched by the same element, the element value
+    is looked up directly, otherwise the candidates are matched one by one.
+    """
+
+    __slots__ = ("candidates", "element_index", "values", "default")
+
+    def __init__(self, candidates: list[tuple[int, "Schema"]]) -> None:
+        self.candidates = candidates
+        self.element_index = 0
+        self.values: dict[str, tuple[int, Schema]] | None = None
+        self.default: tuple[int, Schema] | None = None
+
+        predicates = [schema.predicate for _, schema in candidates]
+        if not all(isinstance(predicate, SegmentPredicate) for predicate in predicates):
+            return
+        indexes = {predicate.element_index for predicate in predicates} - {None}
+        if len(indexes) > 1:
+            return
+
+        self.element_index = indexes.pop() if indexes else 0
+        self.values = {}
+        for candidate, predicate in zip(candidates, predicates):
+            # Any following candidate is shadowed by the segment ID only candidate.
+            if predicate.element_index is None:
+                self.default = candidate
+                break
+            for value in predicate.element_values:
+                self.values.setdefault(value, candidate)
+
+    def find(self, tokens: list[str]) -> tuple[int, "Schema"] | None:
+        """Find the first matching candidate for given segment (tokens)."""
+
+        if self.values is not None:
+            if len(tokens) > self.element_index:
+                found = self.values.get(tokens[self.element_index])
+                if found:
+                    return found
+            return self.default
+
+        for candidate in self.candidates:
+            if candidate[1].matches(tokens):
+                return candidate
+        return None
+
+
+class DispatchTable:
+    """
+    Loop schema lookup table, dispatching a segment (tokens) by the segment ID
+    to the candidate loop schemas. Only the loop schemas with a custom predicate
+    are matched by calling the predicate for every segment.
+
+    The candidates are (levels, schema) pairs, where the levels is the number
+    of the parent loops to climb to reach the loop to add the candidate loop to.
+    The farther candidates (climbing further up the tree) could be held
+    by the farther table, shared by the loop schemas, along with the number
+    of the levels to add to its candidates levels, see Schema.compile.
+    """
+
+    __slots__ = ("generic", "segments", "farther")
+
+    def __init__(
+        self,
+        candidates: list[tuple[int, "Schema"]],
+        farther: tuple[int, "DispatchTable"] | None = None,
+    ) -> None:
+        # The candidates of each segment ID, along with the candidates
+        # with a custom predicate, in the declaration order.
+        self.generic: list[tuple[int, Schema]] = []
+        groups: dict[str, list[tuple[int, Schema]]] = {}
+        for candidate in candidates:
+            predicate = candidate[1].predicate
+            if isinstance(predicate, SegmentPredicate):
+                group = groups.get(predicate.segment_id)
+                if group is None:
+                    group = groups[predicate.segment_id] = list(self.generic)
+                group.append(candidate)
+            else:
+                self.generic.append(candidate)
+                for group in groups.values():
+                    group.append(candidate)
+
+        self.segments = {
+            segment_id: DispatchCandidates(group)
+            for segment_id, group in groups.items()
+        }
+        self.farther = farther
+
+    def find(
+        self, tokens: list[str], segment_id: str | None = None
+    ) -> tuple[int, "Schema"] | None:
+        """
+        Find the first matching candidate for given segment (tokens).
+        The segment ID could be provided when already known.
+        """
+
+        if segment_id is None:
+            segment_id = tokens[0] if len(tokens) > 0 else None
+        candidates = self.segments.get(segment_id)
+        if candidates:
+            found = candidates.find(tokens)
+        else:
+            found = None
+            for candidate in self.generic:
+                if candidate[1].matches(tokens):
+                    found = candidate
+                    break
+
+        if found is None and self.farther:
+            offset, table = self.farther
+            found = table.find(tokens, segment_id)
+            if found:
+                return (found[0] + offset, found[1])
+        return found
+
+    def tables(self) -> Iterator[tuple[int, "DispatchTable"]]:
+        """
+        The table and the farther tables, along with the number of the levels
+        to add to their candidates levels.
+        """
+
+        offset, table = 0, self
+        while table is not None:
+            yield (offset, table)
+            if table.farther is None:
+                return
+            offset, table = offset + table.farther[0], table.farther[1]
+
+
+class SegmentTable:
+    """
+    Segment schema lookup table of a loop schema, by the segment ID.
+    For each segment ID, the positions of the segment schemas possibly
+    matching the segment are kept in the declaration order, i.e. the segment
+    schemas of the segment ID along with the ones with a custom predicate.
+    """
+
+    __slots__ = ("schemas", "generic", "segments")
+
+    def __init__(self, schemas: list[Segment]) -> None:
+        def indexed(schema: Segment) -> bool:
+            return isinstance(schema.predicate, SegmentPredicate)
+
+        self.schemas = schemas
+        self.generic = [
+            index for index, schema in enumerate(schemas) if not indexed(schema)
+        ]
+        self.segments: dict[str, list[int]] = {}
+        for index, schema in enumerate(schemas):
+            if indexed(schema):
+                self.segments.setdefault(schema.predicate.segment_id, [])
+        for segment_id, indexes in self.segments.items():
+            indexes += [
+                index
+                for index, schema in enumerate(schemas)
+                if not indexed(schema) or schema.predicate.segment_id == segment_id
+            ]
+
+    def find(
+        self, tokens: list[str], offset: int = 0, segment_id: str | None = None
+    ) -> tuple[int, Segment] | None:
+        """
+        Find the first segment schema matching given segment (tokens),
+        at the given position or after it, along with its position.
+        The segment ID could be provided when already known.
+        """
+
+        if segment_id is None:
+            segment_id = tokens[0] if len(tokens) > 0 else None
+        indexes = self.segments.get(segment_id, self.generic)
+        for position in range(bisect_left(indexes, offset), len(indexes)):
+            index = indexes[position]
+            if self.schemas[index].matches(tokens):
+                return (index, self.schemas[index])
+        return None
+
+
 class Schema:
     """X12 Loop schema"""
 
+    __slots__ = (
+        "loop_name",
+        "usage",
+        "predicate",
+        "depth",
+        "children",
+        "segments",
+        "parent",
+        "root",
+        "compiled",
+        "children_table",
+        "ancestors_table",
+        "segments_table",
+    )
+
     def __init__(
         self, loop_name: str, usage: Usage = Usage.REQUIRED, predicate: Predicate = None
     ) -> None:
@@ -76,6 +379,11 @@ class Schema:
         self.children: list[Schema] = []
         self.segments: list[Segment] = []
         self.parent: Schema | None = None
+        self.root: Schema = self
+        self.compiled = False
+        self.children_table: DispatchTable | None = None
+        self.ancestors_table: DispatchTable | None = None
+        self.segments_table: SegmentTable | None = None
 
     def add_child(self, loop_name: str, usage: Usage, predicate: Predicate):
         """Add a child loop schema."""
@@ -83,14 +391,52 @@ class Schema:
         child = Schema(loop_name, usage, predicate)
         child.depth = self.depth + 1
         child.parent = self
+        child.root = self.root
         self.children.append(child)
+        self.root.compiled = False
         return child
 
+    def compile(self):
+        """
+        Build the loop dispatch tables of the whole schema tree, i.e. the child
+        loop schemas and the ancestors' child loop schemas (in the order
+        of climbing up the tree) of each loop schema, by the segment ID,
+        and the segment schema lookup tables of each loop schema.
+        The tables are rebuilt only if the schema tree has changed.
+        """
+
+        if self.root.compiled:
+            return self
+
+        # The ancestors table holds the candidates of the nearest levels only,
+        # the farther ones are held by the table of the ancestor the levels up,
+        # so the tables are not copied down a deep tree.
+        for node, _ in self.root.walk():
+            node.children_table = DispatchTable([(0, child) for child in node.children])
+
+            ancestors = []
+            levels, ancestor = 1, node
+            while ancestor.parent and levels <= ANCESTORS_LEVELS:
+                ancestors += [(levels, child) for child in ancestor.parent.children]
+                levels, ancestor = levels + 1, ancestor.parent
+            # The ancestor table is built already, as it precedes in the pre-order.
+            farther = (
+                (ANCESTORS_LEVELS, ancestor.ancestors_table)
+                if ancestor.parent
+                else None
+            )
+            node.ancestors_table = DispatchTable(ancestors, farther)
+            node.segments_table = SegmentTable(node.segments)
+
+        self.root.compiled = True
+        return self
+
     def with_segments(self, *segments: list[Segment]):
         """Add loop's segment schemas."""
 
         for segment in segments:
             self.segments.append(segment)
+        self.root.compiled = False
         return self
 
     def matches(self, tokens: list[str]) -> bool:
@@ -98,14 +444,70 @@ class Schema:
 
         return not self.predicate or self.predicate(tokens)
 
+    def walk(self, post: bool = False) -> Iterator[tuple["Schema", int]]:
+        """
+        Walk the loop schema subtree without recursion, in the pre-order
+        or the post-order, yielding the loop schema and its depth relative
+        to this loop schema.
+        """
+
+        return (postorder if post else preorder)(self, CHILDREN)
+
+    def __reduce__(self):
+        """
+        Pickle the loop schema tree flat, as its loops in the pre-order (with
+        their depth), rebuilt and recompiled on load, so a deep tree is not
+        pickled by recursion through its links and dispatch tables. A loop
+        schema below the root is pickled as the root and its path.
+        """
+
+        if self.parent is not None:
+            path = []
+            node = self
+            while node.parent is not None:
+                path.append(node.parent.children.index(node))
+                node = node.parent
+            return (schema_at, (self.root, tuple(reversed(path))))
+
+        loops = [
+            (depth, node.loop_name, node.usage, node.predicate, node.segments)
+            for node, depth in self.walk()
+        ]
+        return (from_loops, (loops, self.compiled))
+
     def __str__(self) -> str:
-        res = f"{'|  '*self.depth}+--{self.loop_name}"
-        res += (
-            f" ({', '.join(str(segment) for segment in self.segments)})"
-            if len(self.segments) > 0
-            else ""
-        )
+        res = []
+        for node, _ in self.walk():
+            res.append(f"{'|  '*node.depth}+--{node.loop_name}")
+            if node.segments:
+                res.append(
+                    f" ({', '.join([str(segment) for segment in node.segments])})"
+                )
+            res.append("\n")
+        return "".join(res)
+
+
+# Child loop schemas of a loop schema, see Schema.walk.
+CHILDREN = attrgetter("children")
+
+
+def from_loops(loops: list[tuple], compiled: bool) -> Schema:
+    """Rebuild the loop schema tree pickled by Schema.__reduce__."""
+
+    path: list[Schema] = []
+    for depth, loop_name, usage, predicate, segments in loops:
+        if depth:
+            del path[depth:]
+            path.append(path[-1].add_child(loop_name, usage, predicate))
+        else:
+            path.append(Schema(loop_name, usage, predicate))
+        path[-1].with_segments(*segments)
+    return path[0].compile() if compiled else path[0]
+
+
+def schema_at(root: Schema, path: tuple[int, ...]) -> Schema:
+    """Loop schema of the path of child indexes from the root."""
 
-        res += "\n"
-        res += "".join(str(child) for child in self.children)
-        return res
+    for index in path:
+        root = root.children[index]
+    return root
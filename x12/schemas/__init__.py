@@ -0,0 +1,107 @@
+"""
+Bundled schemas of the common HIPAA 5010 transactions, i.e. the declarative
+definitions (see x12.schema.definition) of the transaction set (ST) loops,
+along with the segment ordering, and the registry to build the X12 envelope
+schema dispatching the transaction sets by the implementation convention
+version (GS08) and the transaction set identifier (ST01), so a file with
+mixed transaction types is parsed with a single schema.
+
+The segments following the child loops of a loop (e.g. PLB of 835, IK5 and
+AK9 of 999) are modeled as the single segment child loops, the same way as
+the envelope trailers (SE, GE, IEA).
+"""
+
+from typing import Any, Iterable
+
+from x12.schema.definition import load_schema
+from x12.schema.schema import Schema
+from x12.schemas import x270, x276, x835, x837, x999
+from x12.schemas.common import SITUATIONAL, Transaction, loop, segment
+
+# Registered transactions by the name.
+TRANSACTIONS: dict[str, Transaction] = {
+    transaction.name: transaction
+    for module in (x835, x837, x270, x276, x999)
+    for transaction in module.TRANSACTIONS
+}
+
+
+def register(transaction: Transaction) -> None:
+    """Register the transaction, replacing the one of the same name."""
+
+    TRANSACTIONS[transaction.name] = transaction
+
+
+def find_transaction(version: str, transaction_set_id: str) -> Transaction | None:
+    """Find the registered transaction by GS08 and ST01 values."""
+
+    for transaction in TRANSACTIONS.values():
+        if (
+            transaction.version == version
+            and transaction.transaction_set_id == transaction_set_id
+        ):
+            return transaction
+    return None
+
+
+def envelope_definition(names: Iterable[str] | None = None) -> dict[str, Any]:
+    """
+    Declarative definition of the X12 envelope schema with the transaction set
+    loops of the given registered transactions (all by default). A functional
+    group of an unknown version, or a transaction set of an unknown type, is
+    parsed as a generic loop without the segment schemas.
+    """
+
+    transactions = [
+        TRANSACTIONS[name] for name in (TRANSACTIONS if names is None else names)
+    ]
+    versions: dict[str, list[Transaction]] = {}
+    for transaction in transactions:
+        versions.setdefault(transaction.version, []).append(transaction)
+
+    def group(qualifiers: list[str] | None, children: list[dict]) -> dict[str, Any]:
+        return loop(
+            "GS",
+            "GS",
+            qualifiers,
+            segments=[segment("GS")],
+            children=[
+                *children,
+                loop("ST", "ST", usage=SITUATIONAL),
+                loop("SE", "SE", segments=[segment("SE")]),
+            ],
+            element=8,
+        )
+
+    return {
+        "name": "X12",
+        "children": [
+            loop(
+                "ISA",
+                "ISA",
+                segments=[segment("ISA")],
+                children=[
+                    *[
+                        group(
+                            [version],
+                            [transaction.definition for transaction in members],
+                        )
+                        for version, members in versions.items()
+                    ],
+                    group(None, []),
+                    loop("GE", "GE", segments=[segment("GE")]),
+                ],
+            ),
+            loop("IEA", "IEA", segments=[segment("IEA")]),
+        ],
+    }
+
+
+def load(names: Iterable[str] | None = None, cache_dir: str | None = None) -> Schema:
+    """
+    Load the compiled X12 envelope schema with the given registered
+    transactions (all by default), see envelope_definition. If the cache
+    directory is given, the compiled schema is cached (see load_schema).
+    """
+
+    return load_schema(envelope_definition(names), cache_dir)
@@ -0,0 +1,110 @@
+"""Helpers to define the bundled transaction set schemas."""
+
+from typing import Any, Iterable
+
+REQUIRED = "REQUIRED"
+SITUATIONAL = "SITUATIONAL"
+
+
+class Transaction:
+    # pylint: disable=too-few-public-methods
+    """
+    Transaction set schema definition, i.e. the declarative definition
+    of the ST loop (see x12.schema.definition) of the transaction set
+    identifier (ST01) and the implementation convention version (GS08).
+    """
+
+    __slots__ = ("name", "version", "transaction_set_id", "definition")
+
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        transaction_set_id: str,
+        definition: dict[str, Any],
+    ) -> None:
+        self.name = name
+        self.version = version
+        self.transaction_set_id = transaction_set_id
+        self.definition = definition
+
+
+def loop(
+    name: str,
+    segment_id: str,
+    qualifiers: Iterable[str] | None = None,
+    usage: str = REQUIRED,
+    segments: Iterable[dict[str, Any]] = (),
+    children: Iterable[dict[str, Any]] = (),
+    element: int = 1,
+) -> dict[str, Any]:
+    """
+    Loop definition, started by the segment of given ID, optionally
+    qualified by the values of the element at given index.
+    """
+
+    predicate: dict[str, Any] = {"segment": segment_id}
+    if qualifiers is not None:
+        predicate.update(element=element, values=list(qualifiers))
+    return {
+        "name": name,
+        "usage": usage,
+        "predicate": predicate,
+        "segments": list(segments),
+        "children": list(children),
+    }
+
+
+def hl_loop(
+    name: str,
+    level_code: str,
+    usage: str = REQUIRED,
+    segments: Iterable[dict[str, Any]] = (),
+    children: Iterable[dict[str, Any]] = (),
+) -> dict[str, Any]:
+    """Hierarchical level loop, started by HL segment of given level code (HL03)."""
+
+    return loop(
+        name, "HL", [level_code], usage, [segment("HL"), *segments], children, 3
+    )
+
+
+def name_loop(
+    name: str,
+    qualifiers: Iterable[str] | None,
+    usage: str = REQUIRED,
+    segments: Iterable[dict[str, Any]] = (),
+    children: Iterable[dict[str, Any]] = (),
+) -> dict[str, Any]:
+    """Name loop, started by NM1 segment of given entity identifier (NM101)."""
+
+    return loop(name, "NM1", qualifiers, usage, [segment("NM1"), *segments], children)
+
+
+def segment(
+    segment_id: str,
+    usage: str = REQUIRED,
+    repeat: bool = False,
+    qualifiers: Iterable[str] | None = None,
+    element: int = 1,
+) -> dict[str, Any]:
+    """
+    Segment definition of given ID, optionally qualified by the values
+    of the element at given index. The repeating segment could occur
+    multiple times in a row.
+    """
+
+    res: dict[str, Any] = {"name": segment_id, "usage": usage, "unique": not repeat}
+    if qualifiers is not None:
+        res["predicate"] = {
+            "segment": segment_id,
+            "element": element,
+            "values": list(qualifiers),
+        }
+    return res
+
+
+def situational(segment_id: str, repeat: bool = False) -> dict[str, Any]:
+    """Situational segment definition of given ID."""
+
+    return segment(segment_id, SITUATIONAL, repeat)
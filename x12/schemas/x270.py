@@ -0,0 +1,228 @@
+"""
+270/271 Health Care Eligibility Benefit Inquiry and Response (005010X279A1).
+"""
+
+from typing import Any
+
+from x12.schemas.common import (
+    SITUATIONAL,
+    Transaction,
+    hl_loop,
+    loop,
+    name_loop,
+    segment,
+    situational,
+)
+
+VERSION = "005010X279A1"
+
+
+def inquiry_person(name: str, qualifiers: list[str], suffix: str) -> dict[str, Any]:
+    """Subscriber/dependent name loop (2100x) with the inquiry loops (2110x)."""
+
+    return name_loop(
+        name,
+        qualifiers,
+        segments=[
+            situational("REF", True),
+            situational("N3"),
+            situational("N4"),
+            situational("PRV"),
+            situational("DMG"),
+            situational("INS"),
+            situational("HI"),
+            situational("DTP", True),
+        ],
+        children=[
+            loop(
+                f"2110{suffix}",
+                "EQ",
+                usage=SITUATIONAL,
+                segments=[
+                    segment("EQ"),
+                    situational("AMT", True),
+                    situational("III", True),
+                    situational("REF"),
+                    situational("DTP"),
+                ],
+            ),
+        ],
+    )
+
+
+def response_person(name: str, qualifiers: list[str], suffix: str) -> dict[str, Any]:
+    """Subscriber/dependent name loop (2100x) with the benefit loops (2110x)."""
+
+    return name_loop(
+        name,
+        qualifiers,
+        segments=[
+            situational("REF", True),
+            situational("N3"),
+            situational("N4"),
+            situational("AAA", True),
+            situational("PRV"),
+            situational("DMG"),
+            situational("INS"),
+            situational("HI"),
+            situational("DTP", True),
+            situational("MPI"),
+        ],
+        children=[
+            loop(
+                f"2110{suffix}",
+                "EB",
+                usage=SITUATIONAL,
+                segments=[
+                    segment("EB"),
+                    situational("HSD", True),
+                    situational("REF", True),
+                    situational("DTP", True),
+                    situational("AAA", True),
+                    situational("MSG", True),
+                    situational("LS"),
+                ],
+                children=[
+                    loop(
+                        f"2115{suffix}",
+                        "III",
+                        usage=SITUATIONAL,
+                        segments=[segment("III", repeat=True)],
+                    ),
+                    name_loop(
+                        f"2120{suffix}",
+                        None,
+                        SITUATIONAL,
+                        [
+                            situational("N3"),
+                            situational("N4"),
+                            situational("PER", True),
+                            situational("PRV"),
+                        ],
+                    ),
+                    # Loop trailer, following the benefit related entity loops.
+                    loop("LE", "LE", usage=SITUATIONAL, segments=[segment("LE")]),
+                ],
+            ),
+        ],
+    )
+
+
+INQUIRY = Transaction(
+    "270",
+    VERSION,
+    "270",
+    loop(
+        "ST",
+        "ST",
+        ["270"],
+        segments=[segment("ST"), segment("BHT")],
+        children=[
+            hl_loop(
+                "2000A",
+                "20",
+                children=[
+                    name_loop("2100A", None),
+                    hl_loop(
+                        "2000B",
+                        "21",
+                        children=[
+                            name_loop(
+                                "2100B",
+                                None,
+                                segments=[
+                                    situational("REF", True),
+                                    situational("N3"),
+                                    situational("N4"),
+                                    situational("PRV"),
+                                ],
+                            ),
+                            hl_loop(
+                                "2000C",
+                                "22",
+                                segments=[situational("TRN", True)],
+                                children=[
+                                    inquiry_person("2100C", ["IL"], "C"),
+                                    hl_loop(
+                                        "2000D",
+                                        "23",
+                                        SITUATIONAL,
+                                        segments=[situational("TRN", True)],
+                                        children=[inquiry_person("2100D", ["03"], "D")],
+                                    ),
+                                ],
+                            ),
+                        ],
+                    ),
+                ],
+            ),
+        ],
+    ),
+)
+
+RESPONSE = Transaction(
+    "271",
+    VERSION,
+    "271",
+    loop(
+        "ST",
+        "ST",
+        ["271"],
+        segments=[segment("ST"), segment("BHT")],
+        children=[
+            hl_loop(
+                "2000A",
+                "20",
+                segments=[situational("AAA", True)],
+                children=[
+                    name_loop(
+                        "2100A",
+                        None,
+                        segments=[
+                            situational("PER", True),
+                            situational("AAA", True),
+                        ],
+                    ),
+                    hl_loop(
+                        "2000B",
+                        "21",
+                        SITUATIONAL,
+                        children=[
+                            name_loop(
+                                "2100B",
+                                None,
+                                segments=[
+                                    situational("REF", True),
+                                    situational("N3"),
+                                    situational("N4"),
+                                    situational("AAA", True),
+                                    situational("PRV"),
+                                ],
+                            ),
+                            hl_loop(
+                                "2000C",
+                                "22",
+                                SITUATIONAL,
+                                segments=[situational("TRN", True)],
+                                children=[
+                                    response_person("2100C", ["IL"], "C"),
+                                    hl_loop(
+                                        "2000D",
+                                        "23",
+                                        SITUATIONAL,
+                                        segments=[situational("TRN", True)],
+                                        children=[
+                                            response_person("2100D", ["03"], "D")
+                                        ],
+                                    ),
+                                ],
+                            ),
+                        ],
+                    ),
+                ],
+            ),
+        ],
+    ),
+)
+
+TRANSACTIONS = (INQUIRY, RESPONSE)
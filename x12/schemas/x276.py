@@ -0,0 +1,201 @@
+"""
+276/277 Health Care Claim Status Request and Response (005010X212).
+"""
+
+from typing import Any
+
+from x12.schemas.common import (
+    SITUATIONAL,
+    Transaction,
+    hl_loop,
+    loop,
+    name_loop,
+    segment,
+    situational,
+)
+
+VERSION = "005010X212"
+
+
+def request_patient(
+    name: str, level_code: str, qualifier: str, suffix: str, *levels: dict[str, Any]
+) -> dict[str, Any]:
+    """Subscriber/dependent level loop with the claim status tracking loops."""
+
+    return hl_loop(
+        name,
+        level_code,
+        SITUATIONAL,
+        segments=[situational("DMG")],
+        children=[
+            name_loop(f"2100{suffix}", [qualifier]),
+            loop(
+                f"2200{suffix}",
+                "TRN",
+                segments=[
+                    segment("TRN"),
+                    situational("REF", True),
+                    situational("AMT"),
+                    situational("DTP"),
+                ],
+                children=[
+                    loop(
+                        f"2210{suffix}",
+                        "SVC",
+                        usage=SITUATIONAL,
+                        segments=[
+                            segment("SVC"),
+                            situational("REF"),
+                            situational("DTP"),
+                        ],
+                    ),
+                ],
+            ),
+            *levels,
+        ],
+    )
+
+
+def response_patient(
+    name: str, level_code: str, qualifier: str, suffix: str, *levels: dict[str, Any]
+) -> dict[str, Any]:
+    """Subscriber/dependent level loop with the claim status tracking loops."""
+
+    return hl_loop(
+        name,
+        level_code,
+        SITUATIONAL,
+        children=[
+            name_loop(f"2100{suffix}", [qualifier]),
+            loop(
+                f"2200{suffix}",
+                "TRN",
+                segments=[
+                    segment("TRN"),
+                    situational("STC", True),
+                    situational("REF", True),
+                    situational("DTP"),
+                ],
+                children=[
+                    loop(
+                        f"2220{suffix}",
+                        "SVC",
+                        usage=SITUATIONAL,
+                        segments=[
+                            segment("SVC"),
+                            segment("STC", repeat=True),
+                            situational("REF"),
+                            situational("DTP"),
+                        ],
+                    ),
+                ],
+            ),
+            *levels,
+        ],
+    )
+
+
+def status_tracking(name: str) -> dict[str, Any]:
+    """Situational claim status tracking loop of the provider levels."""
+
+    return loop(
+        name,
+        "TRN",
+        usage=SITUATIONAL,
+        segments=[
+            segment("TRN"),
+            situational("STC", True),
+            situational("REF", True),
+            situational("QTY", True),
+            situational("AMT", True),
+        ],
+    )
+
+
+REQUEST = Transaction(
+    "276",
+    VERSION,
+    "276",
+    loop(
+        "ST",
+        "ST",
+        ["276"],
+        segments=[segment("ST"), segment("BHT")],
+        children=[
+            hl_loop(
+                "2000A",
+                "20",
+                children=[
+                    name_loop("2100A", ["PR"]),
+                    hl_loop(
+                        "2000B",
+                        "21",
+                        children=[
+                            name_loop("2100B", ["41"]),
+                            hl_loop(
+                                "2000C",
+                                "19",
+                                children=[
+                                    name_loop("2100C", ["1P"]),
+                                    request_patient(
+                                        "2000D",
+                                        "22",
+                                        "IL",
+                                        "D",
+                                        request_patient("2000E", "23", "QC", "E"),
+                                    ),
+                                ],
+                            ),
+                        ],
+                    ),
+                ],
+            ),
+        ],
+    ),
+)
+
+RESPONSE = Transaction(
+    "277",
+    VERSION,
+    "277",
+    loop(
+        "ST",
+        "ST",
+        ["277"],
+        segments=[segment("ST"), segment("BHT")],
+        children=[
+            hl_loop(
+                "2000A",
+                "20",
+                children=[
+                    name_loop("2100A", ["PR"], segments=[situational("PER", True)]),
+                    hl_loop(
+                        "2000B",
+                        "21",
+                        children=[
+                            name_loop("2100B", ["41"]),
+                            status_tracking("2200B"),
+                            hl_loop(
+                                "2000C",
+                                "19",
+                                children=[
+                                    name_loop("2100C", ["1P"]),
+                                    status_tracking("2200C"),
+                                    response_patient(
+                                        "2000D",
+                                        "22",
+                                        "IL",
+                                        "D",
+                                        response_patient("2000E", "23", "QC", "E"),
+                                    ),
+                                ],
+                            ),
+                        ],
+                    ),
+                ],
+            ),
+        ],
+    ),
+)
+
+TRANSACTIONS = (REQUEST, RESPONSE)
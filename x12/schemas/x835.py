@@ -0,0 +1,107 @@
+"""835 Health Care Claim Payment/Advice (005010X221A1)."""
+
+from x12.schemas.common import (
+    SITUATIONAL,
+    Transaction,
+    loop,
+    segment,
+    situational,
+)
+
+TRANSACTIONS = (
+    Transaction(
+        "835",
+        "005010X221A1",
+        "835",
+        loop(
+            "ST",
+            "ST",
+            ["835"],
+            segments=[
+                segment("ST"),
+                segment("BPR"),
+                segment("TRN"),
+                situational("CUR"),
+                segment("REF", SITUATIONAL, qualifiers=["EV"]),
+                segment("REF", SITUATIONAL, qualifiers=["F2"]),
+                segment("DTM", SITUATIONAL, qualifiers=["405"]),
+            ],
+            children=[
+                loop(
+                    "1000A",
+                    "N1",
+                    ["PR"],
+                    segments=[
+                        segment("N1"),
+                        segment("N3"),
+                        segment("N4"),
+                        situational("REF", True),
+                        situational("PER", True),
+                    ],
+                ),
+                loop(
+                    "1000B",
+                    "N1",
+                    ["PE"],
+                    segments=[
+                        segment("N1"),
+                        situational("N3"),
+                        situational("N4"),
+                        situational("REF", True),
+                        situational("RDM"),
+                    ],
+                ),
+                loop(
+                    "2000",
+                    "LX",
+                    usage=SITUATIONAL,
+                    segments=[segment("LX"), situational("TS3"), situational("TS2")],
+                    children=[
+                        loop(
+                            "2100",
+                            "CLP",
+                            segments=[
+                                segment("CLP"),
+                                situational("CAS", True),
+                                segment("NM1", qualifiers=["QC"]),
+                                segment("NM1", SITUATIONAL, qualifiers=["IL"]),
+                                segment("NM1", SITUATIONAL, qualifiers=["74"]),
+                                segment("NM1", SITUATIONAL, qualifiers=["82"]),
+                                segment("NM1", SITUATIONAL, qualifiers=["TT"]),
+                                segment("NM1", SITUATIONAL, qualifiers=["PR"]),
+                                segment("NM1", SITUATIONAL, qualifiers=["GB"]),
+                                situational("MIA"),
+                                situational("MOA"),
+                                situational("REF", True),
+                                situational("DTM", True),
+                                situational("PER", True),
+                                situational("AMT", True),
+                                situational("QTY", True),
+                            ],
+                            children=[
+                                loop(
+                                    "2110",
+                                    "SVC",
+                                    usage=SITUATIONAL,
+                                    segments=[
+                                        segment("SVC"),
+                                        situational("DTM", True),
+                                        situational("CAS", True),
+                                        situational("REF", True),
+                                        situational("AMT", True),
+                                        situational("QTY", True),
+                                        situational("LQ", True),
+                                    ],
+                                ),
+                            ],
+                        ),
+                    ],
+                ),
+                # Provider adjustments, following the header number loops.
+                loop(
+                    "PLB", "PLB", usage=SITUATIONAL, segments=[situational("PLB", True)]
+                ),
+            ],
+        ),
+    ),
+)
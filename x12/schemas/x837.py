@@ -0,0 +1,423 @@
+"""
+837 Health Care Claim: Professional (005010X222A1), Institutional
+(005010X223A2) and Dental (005010X224A2).
+"""
+
+from typing import Any
+
+from x12.schemas.common import (
+    SITUATIONAL,
+    Transaction,
+    hl_loop,
+    loop,
+    name_loop,
+    segment,
+    situational,
+)
+
+
+def provider(name: str, qualifier: str, *segments: dict[str, Any]) -> dict[str, Any]:
+    """Situational provider name loop with the reference identifications."""
+
+    return name_loop(
+        name, [qualifier], SITUATIONAL, [*segments, situational("REF", True)]
+    )
+
+
+def address(name: str, qualifier: str) -> dict[str, Any]:
+    """Situational name loop with the address."""
+
+    return name_loop(name, [qualifier], SITUATIONAL, [segment("N3"), segment("N4")])
+
+
+def other_subscriber(
+    names: list[tuple[str, str]], *segments: dict[str, Any]
+) -> dict[str, Any]:
+    """Other subscriber information loop (2320) with the name loops (2330x)."""
+
+    return loop(
+        "2320",
+        "SBR",
+        usage=SITUATIONAL,
+        segments=[
+            segment("SBR"),
+            situational("CAS", True),
+            situational("AMT", True),
+            segment("OI"),
+            *segments,
+        ],
+        children=[
+            name_loop(
+                "2330A",
+                ["IL"],
+                segments=[situational("N3"), situational("N4"), situational("REF")],
+            ),
+            name_loop(
+                "2330B",
+                ["PR"],
+                segments=[
+                    situational("N3"),
+                    situational("N4"),
+                    situational("DTP"),
+                    situational("REF", True),
+                ],
+            ),
+            *[provider(name, qualifier) for name, qualifier in names],
+        ],
+    )
+
+
+def service_line(
+    service: str,
+    segments: list[dict[str, Any]],
+    names: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Service line loop (2400) with the drug, name and adjudication loops."""
+
+    return loop(
+        "2400",
+        "LX",
+        segments=[segment("LX"), segment(service), *segments],
+        children=[
+            loop(
+                "2410",
+                "LIN",
+                usage=SITUATIONAL,
+                segments=[segment("LIN"), segment("CTP"), situational("REF")],
+            ),
+            *names,
+            loop(
+                "2430",
+                "SVD",
+                usage=SITUATIONAL,
+                segments=[
+                    segment("SVD"),
+                    situational("CAS", True),
+                    segment("DTP"),
+                    situational("AMT"),
+                ],
+            ),
+        ],
+    )
+
+
+def claim(
+    segments: list[dict[str, Any]],
+    names: list[dict[str, Any]],
+    subscriber: dict[str, Any],
+    line: dict[str, Any],
+) -> dict[str, Any]:
+    """Claim information loop (2300)."""
+
+    return loop(
+        "2300",
+        "CLM",
+        usage=SITUATIONAL,
+        segments=[segment("CLM"), *segments],
+        children=[*names, subscriber, line],
+    )
+
+
+def claim_transaction(name: str, version: str, claim_loop: dict) -> Transaction:
+    """837 transaction of given claim loop (2300) and the common hierarchy."""
+
+    return Transaction(
+        name,
+        version,
+        "837",
+        loop(
+            "ST",
+            "ST",
+            ["837"],
+            segments=[segment("ST"), segment("BHT")],
+            children=[
+                name_loop("1000A", ["41"], segments=[segment("PER", repeat=True)]),
+                name_loop("1000B", ["40"]),
+                hl_loop(
+                    "2000A",
+                    "20",
+                    segments=[situational("PRV"), situational("CUR")],
+                    children=[
+                        name_loop(
+                            "2010AA",
+                            ["85"],
+                            segments=[
+                                segment("N3"),
+                                segment("N4"),
+                                segment("REF", repeat=True),
+                                situational("PER", True),
+                            ],
+                        ),
+                        address("2010AB", "87"),
+                        name_loop(
+                            "2010AC",
+                            ["PE"],
+                            SITUATIONAL,
+                            [
+                                segment("N3"),
+                                segment("N4"),
+                                situational("REF", True),
+                            ],
+                        ),
+                        hl_loop(
+                            "2000B",
+                            "22",
+                            segments=[segment("SBR"), situational("PAT")],
+                            children=[
+                                name_loop(
+                                    "2010BA",
+                                    ["IL"],
+                                    segments=[
+                                        situational("N3"),
+                                        situational("N4"),
+                                        situational("DMG"),
+                                        situational("REF", True),
+                                        situational("PER"),
+                                    ],
+                                ),
+                                name_loop(
+                                    "2010BB",
+                                    ["PR"],
+                                    segments=[
+                                        situational("N3"),
+                                        situational("N4"),
+                                        situational("REF", True),
+                                    ],
+                                ),
+                                claim_loop,
+                                hl_loop(
+                                    "2000C",
+                                    "23",
+                                    SITUATIONAL,
+                                    segments=[segment("PAT")],
+                                    children=[
+                                        name_loop(
+                                            "2010CA",
+                                            ["QC"],
+                                            segments=[
+                                                segment("N3"),
+                                                segment("N4"),
+                                                segment("DMG"),
+                                                situational("REF", True),
+                                                situational("PER"),
+                                            ],
+                                        ),
+                                        claim_loop,
+                                    ],
+                                ),
+                            ],
+                        ),
+                    ],
+                ),
+            ],
+        ),
+    )
+
+
+PROFESSIONAL = claim_transaction(
+    "837P",
+    "005010X222A1",
+    claim(
+        [
+            situational("DTP", True),
+            situational("PWK", True),
+            situational("CN1"),
+            situational("AMT"),
+            situational("REF", True),
+            situational("K3", True),
+            situational("NTE"),
+            situational("CR1"),
+            situational("CR2"),
+            situational("CRC", True),
+            segment("HI", repeat=True),
+            situational("HCP"),
+        ],
+        [
+            provider("2310A", "DN"),
+            provider("2310B", "82", situational("PRV")),
+            name_loop(
+                "2310C",
+                ["77"],
+                SITUATIONAL,
+                [
+                    segment("N3"),
+                    segment("N4"),
+                    situational("REF", True),
+                    situational("PER"),
+                ],
+            ),
+            provider("2310D", "DQ"),
+            address("2310E", "PW"),
+            address("2310F", "45"),
+        ],
+        other_subscriber(
+            [
+                ("2330C", "DN"),
+                ("2330D", "82"),
+                ("2330E", "77"),
+                ("2330F", "DQ"),
+                ("2330G", "85"),
+            ],
+            situational("MOA"),
+        ),
+        service_line(
+            "SV1",
+            [
+                situational("SV5"),
+                situational("PWK", True),
+                situational("CR1"),
+                situational("CR3"),
+                situational("CRC", True),
+                segment("DTP", repeat=True),
+                situational("QTY", True),
+                situational("MEA", True),
+                situational("CN1"),
+                situational("REF", True),
+                situational("AMT", True),
+                situational("K3", True),
+                situational("NTE", True),
+                situational("PS1"),
+                situational("HCP"),
+            ],
+            [
+                provider("2420A", "82", situational("PRV")),
+                provider("2420B", "QB"),
+                provider("2420C", "77", segment("N3"), segment("N4")),
+                provider("2420D", "DQ"),
+                name_loop(
+                    "2420E",
+                    ["DK"],
+                    SITUATIONAL,
+                    [
+                        situational("N3"),
+                        situational("N4"),
+                        situational("REF", True),
+                        situational("PER"),
+                    ],
+                ),
+                provider("2420F", "DN"),
+                address("2420G", "PW"),
+                address("2420H", "45"),
+                loop(
+                    "2440",
+                    "LQ",
+                    usage=SITUATIONAL,
+                    segments=[segment("LQ"), segment("FRM", repeat=True)],
+                ),
+            ],
+        ),
+    ),
+)
+
+INSTITUTIONAL = claim_transaction(
+    "837I",
+    "005010X223A2",
+    claim(
+        [
+            segment("DTP", repeat=True),
+            segment("CL1"),
+            situational("PWK", True),
+            situational("CN1"),
+            situational("AMT"),
+            situational("REF", True),
+            situational("K3", True),
+            situational("NTE", True),
+            situational("CRC", True),
+            segment("HI", repeat=True),
+            situational("HCP"),
+        ],
+        [
+            provider("2310A", "71", situational("PRV")),
+            provider("2310B", "72"),
+            provider("2310C", "ZZ"),
+            provider("2310D", "82"),
+            provider("2310E", "77", segment("N3"), segment("N4")),
+            provider("2310F", "DN"),
+        ],
+        other_subscriber(
+            [
+                ("2330C", "71"),
+                ("2330D", "72"),
+                ("2330E", "ZZ"),
+                ("2330F", "77"),
+                ("2330G", "82"),
+                ("2330H", "DN"),
+                ("2330I", "85"),
+            ],
+            situational("MIA"),
+            situational("MOA"),
+        ),
+        service_line(
+            "SV2",
+            [
+                situational("PWK"),
+                situational("DTP"),
+                situational("REF", True),
+                situational("AMT", True),
+                situational("NTE"),
+                situational("HCP"),
+            ],
+            [
+                provider("2420A", "72"),
+                provider("2420B", "ZZ"),
+                provider("2420C", "82"),
+                provider("2420D", "DN"),
+            ],
+        ),
+    ),
+)
+
+DENTAL = claim_transaction(
+    "837D",
+    "005010X224A2",
+    claim(
+        [
+            situational("DTP", True),
+            situational("DN1"),
+            situational("DN2", True),
+            situational("PWK", True),
+            situational("CN1"),
+            situational("AMT"),
+            situational("REF", True),
+            situational("NTE"),
+            situational("HI", True),
+            situational("HCP"),
+        ],
+        [
+            provider("2310A", "DN", situational("PRV")),
+            provider("2310B", "82", situational("PRV")),
+            provider("2310C", "77", segment("N3"), segment("N4")),
+            provider("2310D", "DD", situational("PRV")),
+        ],
+        other_subscriber(
+            [
+                ("2330C", "DN"),
+                ("2330D", "82"),
+                ("2330E", "DD"),
+                ("2330F", "77"),
+                ("2330G", "85"),
+            ],
+            situational("MOA"),
+        ),
+        service_line(
+            "SV3",
+            [
+                situational("TOO", True),
+                situational("DTP", True),
+                situational("QTY", True),
+                situational("REF", True),
+                situational("AMT", True),
+                situational("NTE"),
+                situational("HCP"),
+            ],
+            [
+                provider("2420A", "82", situational("PRV")),
+                provider("2420B", "DD", situational("PRV")),
+                provider("2420C", "DQ"),
+                provider("2420D", "77", segment("N3"), segment("N4")),
+            ],
+        ),
+    ),
+)
+
+TRANSACTIONS = (PROFESSIONAL, INSTITUTIONAL, DENTAL)
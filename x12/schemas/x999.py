@@ -0,0 +1,55 @@
+"""999 Implementation Acknowledgment (005010X231A1)."""
+
+from x12.schemas.common import (
+    SITUATIONAL,
+    Transaction,
+    loop,
+    segment,
+    situational,
+)
+
+TRANSACTIONS = (
+    Transaction(
+        "999",
+        "005010X231A1",
+        "999",
+        loop(
+            "ST",
+            "ST",
+            ["999"],
+            segments=[segment("ST"), segment("AK1")],
+            children=[
+                loop(
+                    "2000",
+                    "AK2",
+                    usage=SITUATIONAL,
+                    segments=[segment("AK2")],
+                    children=[
+                        loop(
+                            "2100",
+                            "IK3",
+                            usage=SITUATIONAL,
+                            segments=[segment("IK3"), situational("CTX", True)],
+                            children=[
+                                loop(
+                                    "2110",
+                                    "IK4",
+                                    usage=SITUATIONAL,
+                                    segments=[
+                                        segment("IK4"),
+                                        situational("CTX", True),
+                                    ],
+                                ),
+                            ],
+                        ),
+                        # Transaction set response trailer, following the error
+                        # identification loops.
+                        loop("IK5", "IK5", segments=[segment("IK5")]),
+                    ],
+                ),
+                # Functional group response trailer.
+                loop("AK9", "AK9", segments=[segment("AK9")]),
+            ],
+        ),
+    ),
+)